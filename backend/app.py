@@ -1,21 +1,90 @@
 """API for SafeHome System."""
 
-import os
+import asyncio
+from contextlib import asynccontextmanager
 
 from fastapi import FastAPI
-from fastapi.staticfiles import StaticFiles
 
 from .common import router as common_router
+from .common.assets import asset_store
+from .common.assets import router as assets_router
+from .common.device import SensorDB
+from .common.sensor_state import SensorStateTable
+from .common.store import SharedStateStore
 from .security import router as security_router
+from .surveillance.motion import MOTION_ENV
+from .surveillance.recorder import RECORDING_ENV
+from .surveillance.surveillance import (
+    background_enabled,
+    capture_alarm_snapshots,
+    clip_pipeline,
+    dump_camera_ptz,
+    export_queued_clips,
+    load_camera_ptz,
+    record_camera_frames,
+    render_pool,
+    snapshot_pipeline,
+    warm_up_cameras,
+    warmup_progress,
+    watch_camera_health,
+    watch_camera_motion,
+)
 from .surveillance.surveillance import router as surveillance_router
 
-app = FastAPI(title="SafeHome API", version="1.0")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Start background work without delaying server readiness."""
+    # Cameras are created and their views rendered after startup completes,
+    # so neither startup nor the event loop waits for them; /health reports
+    # the progress.
+    tasks = [
+        asyncio.create_task(warm_up_cameras()),
+        asyncio.create_task(asyncio.to_thread(asset_store.preload)),
+        asyncio.create_task(watch_camera_health()),
+        asyncio.create_task(snapshot_pipeline.run(capture_alarm_snapshots)),
+        asyncio.create_task(clip_pipeline.run(export_queued_clips)),
+    ]
+    # Opt-in, since they render every enabled camera twice a second
+    if background_enabled(MOTION_ENV):
+        tasks.append(asyncio.create_task(watch_camera_motion()))
+    if background_enabled(RECORDING_ENV):
+        tasks.append(asyncio.create_task(record_camera_frames()))
+    yield
+    for task in tasks:
+        task.cancel()
+    if render_pool is not None:
+        render_pool.close()
+
+
+app = FastAPI(title="SafeHome API", version="1.0", lifespan=lifespan)
+
+# Set SAFEHOME_STATE_DB to share state between `uvicorn --workers N` processes.
+shared_state = SharedStateStore.from_env()
+if shared_state is not None:
+    shared_state.register_section("camera_ptz", dump_camera_ptz, load_camera_ptz)
+    shared_state.install(app)
+
+# Set SAFEHOME_SENSOR_SHM to keep sensor flags in shared memory.
+SensorDB.use_state_table(SensorStateTable.from_env())
 
 app.include_router(common_router)
 app.include_router(surveillance_router)
 app.include_router(security_router)
+# /static/<name> → camera images and floor plan
+app.include_router(assets_router)
+
 
-BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "../.."))
+@app.get("/health", summary="Server health, warm-up progress and alarm queues")
+async def health():
+    """Report that the server is up, its warm-up and its alarm queues.
 
-# /static → safehome/
-app.mount("/static", StaticFiles(directory=BASE_DIR), name="static")
+    The server is ready as soon as it answers; cameras that are still
+    warming up are served, just more slowly.
+    """
+    return {
+        "status": "ok",
+        "warmup": warmup_progress.snapshot(),
+        "snapshots": snapshot_pipeline.stats(),
+        "clips": clip_pipeline.stats(),
+    }
@@ -0,0 +1,279 @@
+"""Static assets: camera source images and the floor plan."""
+
+import gzip
+import hashlib
+import os
+import threading
+from email.utils import formatdate
+from typing import NamedTuple
+
+from fastapi import APIRouter, HTTPException, Request, Response
+
+ASSET_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "../.."))
+
+ASSET_NAMES = ("camera1.jpg", "camera2.jpg", "camera3.jpg", "floorplan.png")
+
+MEDIA_TYPES = {".jpg": "image/jpeg", ".png": "image/png"}
+
+# Clients reuse an asset for an hour, then revalidate it with its ETag
+ASSET_CACHE_CONTROL = "public, max-age=3600"
+
+# A gzip variant is only kept when it is at least this much smaller.
+# JPEG and PNG are already compressed, so the shipped images never are.
+GZIP_MIN_SAVING = 0.1
+
+
+class Asset(NamedTuple):
+    """An asset file held in memory."""
+
+    name: str
+    media_type: str
+    data: bytes
+    etag: str
+    last_modified: str
+    version: tuple[int, int]  # (mtime_ns, size)
+    gzip_data: bytes | None = None
+
+    @property
+    def gzip_etag(self) -> str:
+        """ETag of the gzip variant, which is a different representation."""
+        return self.etag[:-1] + '-gzip"'
+
+
+def load_asset(name: str, path: str) -> Asset:
+    """Read an asset file and prepare its ETag and gzip variant.
+
+    Args:
+        name: Asset name
+        path: File path
+
+    Raises:
+        FileNotFoundError: If the file does not exist.
+    """
+    with open(path, "rb") as f:
+        stat = os.fstat(f.fileno())
+        data = f.read()
+    compressed = gzip.compress(data, mtime=0)
+    if len(compressed) > len(data) * (1 - GZIP_MIN_SAVING):
+        compressed = None
+    return Asset(
+        name=name,
+        media_type=MEDIA_TYPES.get(
+            os.path.splitext(name)[1], "application/octet-stream"
+        ),
+        data=data,
+        etag='"' + hashlib.sha256(data).hexdigest()[:32] + '"',
+        last_modified=formatdate(stat.st_mtime, usegmt=True),
+        version=(stat.st_mtime_ns, stat.st_size),
+        gzip_data=compressed,
+    )
+
+
+class AssetStore:
+    """In-memory copies of a fixed set of asset files.
+
+    Only the listed names are served, so a request can never reach other
+    files of the tree. Each file is read once and kept with its ETag; it is
+    read again when its modification time or size changes.
+    """
+
+    def __init__(self, directory: str, names=ASSET_NAMES):
+        """Create a store serving names from directory.
+
+        Args:
+            directory: Directory containing the asset files
+            names: File names that may be served
+        """
+        self.directory = directory
+        self.names = frozenset(names)
+        self._assets: dict[str, Asset] = {}
+        self._lock = threading.Lock()
+
+    def get(self, name: str) -> Asset | None:
+        """Return the current version of an asset, or None if unknown."""
+        if name not in self.names:
+            return None
+        path = os.path.join(self.directory, name)
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return None
+        with self._lock:
+            asset = self._assets.get(name)
+        if asset is not None and asset.version == (stat.st_mtime_ns, stat.st_size):
+            return asset
+        try:
+            asset = load_asset(name, path)
+        except FileNotFoundError:
+            return None
+        with self._lock:
+            self._assets[name] = asset
+        return asset
+
+    def preload(self) -> None:
+        """Read and compress every asset ahead of its first request."""
+        for name in self.names:
+            self.get(name)
+
+
+def _matching_etag(header: str, etags: tuple[str, ...]) -> str | None:
+    """Weak comparison of an If-None-Match header against ETags.
+
+    Returns the first of etags the header matches, or None.
+    """
+    if header.strip() == "*":
+        return etags[0]
+    tags = set()
+    for tag in header.split(","):
+        tag = tag.strip()
+        tags.add(tag[2:] if tag.startswith("W/") else tag)
+    return next((etag for etag in etags if etag in tags), None)
+
+
+def _accepts_gzip(header: str) -> bool:
+    """Whether an Accept-Encoding header allows a gzip response.
+
+    An explicit gzip (or x-gzip) entry wins over "*"; either is refused by
+    a q-value of 0. Entries with a malformed q-value are ignored.
+    """
+    qualities = {}
+    for entry in header.split(","):
+        coding, *params = entry.split(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        quality = 1.0
+        for param in params:
+            key, _, value = param.partition("=")
+            if key.strip().lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = None
+        if quality is not None:
+            qualities[coding] = quality
+    for coding in ("gzip", "x-gzip", "*"):
+        if coding in qualities:
+            return qualities[coding] > 0
+    return False
+
+
+def _byte_range(header: str, size: int) -> tuple[int, int] | None:
+    """Parse a single-range Range header into inclusive (start, end).
+
+    Returns None for headers that should be ignored (other units, several
+    ranges or bad syntax), in which case the whole asset is sent.
+
+    Raises:
+        ValueError: If the range does not overlap the asset.
+    """
+    unit, _, spec = header.partition("=")
+    if unit.strip().lower() != "bytes" or "," in spec:
+        return None
+    first, sep, last = spec.strip().partition("-")
+    if not sep or not (first or last):
+        return None
+    if any(part and not part.isdigit() for part in (first, last)):
+        return None
+    if first:
+        start = int(first)
+        end = int(last) if last else size - 1
+        if last and end < start:
+            return None
+    else:
+        length = int(last)
+        if length == 0:
+            raise ValueError("empty suffix range")
+        start, end = max(size - length, 0), size - 1
+    if start >= size:
+        raise ValueError("range starts past the end")
+    return start, min(end, size - 1)
+
+
+router = APIRouter(prefix="/static")
+
+asset_store = AssetStore(ASSET_DIR)
+
+
+@router.api_route(
+    "/{name}",
+    methods=["GET", "HEAD"],
+    summary="Get a camera source image or the floor plan.",
+    response_class=Response,
+    responses={
+        200: {"content": {"image/jpeg": {}, "image/png": {}}},
+        206: {"description": "Requested byte range"},
+        304: {"description": "Not modified"},
+        404: {"description": "Asset not found"},
+        416: {"description": "Range not satisfiable"},
+    },
+)
+def get_asset(name: str, request: Request) -> Response:
+    """Serve an asset with ETag revalidation, byte ranges and gzip.
+
+    Args:
+        name: Asset file name, e.g. camera1.jpg
+        request: Incoming request, for the conditional and range headers
+    """
+    asset = asset_store.get(name)
+    if asset is None:
+        raise HTTPException(status_code=404, detail="Asset not found")
+
+    headers = {
+        "Cache-Control": ASSET_CACHE_CONTROL,
+        "Last-Modified": asset.last_modified,
+        "Accept-Ranges": "bytes",
+    }
+    if asset.gzip_data is not None:
+        headers["Vary"] = "Accept-Encoding"
+
+    range_header = request.headers.get("range")
+    if_range = request.headers.get("if-range")
+    if range_header is not None and if_range not in (None, asset.etag):
+        # The client's partial copy is stale: send the whole new version
+        range_header = None
+    gzip = (
+        asset.gzip_data is not None
+        and range_header is None
+        and _accepts_gzip(request.headers.get("accept-encoding", ""))
+    )
+
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        # Echo the ETag of the copy being revalidated, preferring the
+        # variant this request would get
+        etags = tuple(etag for etag in (asset.etag, asset.gzip_etag) if etag)
+        etag = _matching_etag(if_none_match, etags[::-1] if gzip else etags)
+        if etag is not None:
+            headers["ETag"] = etag
+            return Response(status_code=304, headers=headers)
+
+    status_code = 200
+    body = asset.data
+    headers["ETag"] = asset.etag
+
+    if range_header is not None:
+        try:
+            byte_range = _byte_range(range_header, len(asset.data))
+        except ValueError:
+            headers["Content-Range"] = f"bytes */{len(asset.data)}"
+            return Response(status_code=416, headers=headers)
+        if byte_range is not None:
+            start, end = byte_range
+            status_code = 206
+            body = asset.data[start : end + 1]
+            headers["Content-Range"] = f"bytes {start}-{end}/{len(asset.data)}"
+    elif gzip:
+        body = asset.gzip_data
+        headers["ETag"] = asset.gzip_etag
+        headers["Content-Encoding"] = "gzip"
+
+    headers["Content-Length"] = str(len(body))
+    if request.method == "HEAD":
+        body = b""
+    return Response(
+        content=body,
+        status_code=status_code,
+        headers=headers,
+        media_type=asset.media_type,
+    )
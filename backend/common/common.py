@@ -30,7 +30,7 @@ router = APIRouter()
         }
     },
 )
-def control_panel_login(request: ControlPanelLoginRequest):
+async def control_panel_login(request: ControlPanelLoginRequest):
     """UC1.a. Log onto the system through control panel."""
     user = UserDB.find_user_by_id(request.user_id)
     if not user:
@@ -60,7 +60,7 @@ def control_panel_login(request: ControlPanelLoginRequest):
         }
     },
 )
-def login(request: LoginRequest):
+async def login(request: LoginRequest):
     """UC1.b. Log onto the system through web browser."""
     user = UserDB.find_user_by_id(request.user_id)
     if not user:
@@ -98,7 +98,7 @@ def login(request: LoginRequest):
         },
     },
 )
-def config(request: ConfigRequest):
+async def config(request: ConfigRequest):
     """UC1.c. Configure system setting."""
     user = UserDB.find_user_by_id(request.user_id)
     if not user:
@@ -131,7 +131,7 @@ def config(request: ConfigRequest):
         }
     },
 )
-def get_config(request: GetConfigRequest):
+async def get_config(request: GetConfigRequest):
     """UC1.c. Get system configuration."""
     user = UserDB.find_user_by_id(request.user_id)
     if not user:
@@ -162,7 +162,7 @@ def get_config(request: GetConfigRequest):
         }
     },
 )
-def power_on(request: PowerRequest):
+async def power_on(request: PowerRequest):
     """UC1.d. Turn the system on."""
     user = UserDB.find_user_by_id(request.user_id)
     if not user:
@@ -188,7 +188,7 @@ def power_on(request: PowerRequest):
         }
     },
 )
-def power_off(request: PowerRequest):
+async def power_off(request: PowerRequest):
     """UC1.e. Turn the system off."""
     user = UserDB.find_user_by_id(request.user_id)
     if not user:
@@ -1,9 +1,12 @@
 """Device."""
 
-from dataclasses import dataclass
+import threading
+from dataclasses import dataclass, field
 from datetime import datetime
 from enum import Enum
 
+from .sensor_state import SensorFlags, SensorStateTable
+
 
 class DeviceType(Enum):
     """Device Type Enum."""
@@ -43,6 +46,10 @@ class AlarmEvent:
     location: str
     description: str
     is_resolved: bool = False
+    # Recorded camera clips of the event, added once they are exported
+    clip_urls: list[str] = field(default_factory=list)
+    # Camera snapshots taken when a sensor fired, added once they are stored
+    snapshot_urls: list[str] = field(default_factory=list)
 
 
 @dataclass
@@ -84,6 +91,8 @@ class CameraInfo:
     has_password: bool = False
     password: str | None = None
     url: str = ""  # Camera thumbnail file path
+    # Locations of the sensors in view, e.g. to take snapshots of their alarms
+    sensor_locations: tuple[str, ...] = ()
 
 
 @dataclass
@@ -100,7 +109,14 @@ class SensorInfo:
 
 @dataclass
 class CameraDB:
-    """Camera database class."""
+    """Camera database class.
+
+    Cameras are read by background threads (motion detection, recording)
+    while handlers update them, so multi-field reads and updates hold a
+    lock instead of relying on the GIL.
+    """
+
+    _lock = threading.RLock()
 
     cameras = {
         1: CameraInfo(
@@ -111,6 +127,12 @@ class CameraDB:
             has_password=False,
             password=None,
             url="/static/camera1.jpg",
+            sensor_locations=(
+                "Main Motion Sensor",
+                "Living Room North Window",
+                "Living Room Northeast Window",
+                "Living Room Southeast Window",
+            ),
         ),
         2: CameraInfo(
             camera_id=2,
@@ -120,6 +142,7 @@ class CameraDB:
             has_password=True,
             password="camera123",
             url="/static/camera2.jpg",
+            sensor_locations=("Front Door",),
         ),
         3: CameraInfo(
             camera_id=3,
@@ -140,17 +163,30 @@ class CameraDB:
     @classmethod
     def get_all_cameras(cls) -> list[CameraInfo]:
         """Get all cameras."""
-        return list(cls.cameras.values())
+        with cls._lock:
+            return list(cls.cameras.values())
+
+    @classmethod
+    def get_cameras_by_sensor_location(cls) -> dict[str, list[CameraInfo]]:
+        """Get all cameras keyed by the locations of the sensors they see."""
+        index: dict[str, list[CameraInfo]] = {}
+        with cls._lock:
+            for camera in cls.cameras.values():
+                for location in camera.sensor_locations:
+                    index.setdefault(location, []).append(camera)
+        return index
 
     @classmethod
     def update_camera(cls, camera_id: int, **kwargs) -> bool:
         """Update camera configuration."""
-        if camera_id in cls.cameras:
+        with cls._lock:
+            camera = cls.cameras.get(camera_id)
+            if camera is None:
+                return False
             for key, value in kwargs.items():
-                if hasattr(cls.cameras[camera_id], key):
-                    setattr(cls.cameras[camera_id], key, value)
+                if hasattr(camera, key):
+                    setattr(camera, key, value)
             return True
-        return False
 
     @classmethod
     def get_url(cls, camera_id: int) -> str:
@@ -161,7 +197,13 @@ class CameraDB:
 
 @dataclass
 class SensorDB:
-    """Sensor database class."""
+    """Sensor database class.
+
+    Refreshing a sensor's flags from the state table and updating them
+    are read-modify-write sequences, so they hold a lock.
+    """
+
+    _lock = threading.RLock()
 
     motion_sensors = {
         1: SensorInfo(sensor_id=1, sensor_type="motion", location="Main Motion Sensor"),
@@ -189,42 +231,121 @@ class SensorDB:
         8: SensorInfo(sensor_id=2, sensor_type="door", location="Back Door"),
     }
 
+    # Optional shared-memory table holding the armed/triggered/opened flags
+    state_table = None
+
+    @classmethod
+    def use_state_table(cls, table: SensorStateTable | None) -> None:
+        """Keep sensor flags in a table shared with other processes.
+
+        Sensors missing from the table are seeded with their current flags.
+        Pass None to go back to purely in-memory flags.
+        """
+        with cls._lock:
+            cls.state_table = table
+            if table is None:
+                return
+            for kind, sensors in (
+                ("motion", cls.motion_sensors),
+                ("windoor", cls.windoor_sensors),
+            ):
+                for sensor_id, sensor in sensors.items():
+                    if table.read(kind, sensor_id) is None:
+                        table.write(kind, sensor_id, _flags_of(sensor))
+
+    @classmethod
+    def _load_flags(
+        cls, kind: str, sensor_id: int, sensor: SensorInfo | None
+    ) -> SensorInfo | None:
+        """Refresh a sensor's flags from the state table, if any."""
+        table = cls.state_table
+        if table is not None and sensor is not None:
+            with cls._lock:
+                flags = table.read(kind, sensor_id)
+                if flags is not None:
+                    sensor.is_armed, sensor.is_triggered, sensor.is_opened = flags
+        return sensor
+
+    @classmethod
+    def _update_sensor(
+        cls, kind: str, sensor_id: int, sensor: SensorInfo, changes: dict
+    ) -> None:
+        """Apply changes to a sensor, updating its flags in the state table.
+
+        With a state table, the flags are read and written there in one
+        step under its writer lock, so updates from other processes are
+        not lost. Must be called with cls._lock held.
+        """
+        changes = {key: value for key, value in changes.items() if hasattr(sensor, key)}
+        table = cls.state_table
+        if table is not None:
+            flags = {
+                key: changes.pop(key) for key in SensorFlags._fields if key in changes
+            }
+            updated = table.update(kind, sensor_id, **flags)
+            if updated is not None:
+                sensor.is_armed, sensor.is_triggered, sensor.is_opened = updated
+            else:
+                changes.update(flags)
+        for key, value in changes.items():
+            setattr(sensor, key, value)
+
     @classmethod
     def get_motion_sensor(cls, sensor_id: int) -> SensorInfo | None:
         """Get motion sensor by ID."""
-        return cls.motion_sensors.get(sensor_id)
+        return cls._load_flags("motion", sensor_id, cls.motion_sensors.get(sensor_id))
 
     @classmethod
     def get_windoor_sensor(cls, sensor_id: int) -> SensorInfo | None:
         """Get windoor sensor by ID."""
-        return cls.windoor_sensors.get(sensor_id)
+        return cls._load_flags("windoor", sensor_id, cls.windoor_sensors.get(sensor_id))
+
+    @classmethod
+    def get_motion_sensors_by_id(cls) -> dict[int, SensorInfo]:
+        """Get all motion sensors keyed by sensor ID."""
+        return {
+            sensor_id: cls._load_flags("motion", sensor_id, sensor)
+            for sensor_id, sensor in cls.motion_sensors.items()
+        }
+
+    @classmethod
+    def get_windoor_sensors_by_id(cls) -> dict[int, SensorInfo]:
+        """Get all windoor sensors keyed by sensor ID."""
+        return {
+            sensor_id: cls._load_flags("windoor", sensor_id, sensor)
+            for sensor_id, sensor in cls.windoor_sensors.items()
+        }
 
     @classmethod
     def get_all_motion_sensors(cls) -> list[SensorInfo]:
         """Get all motion sensors."""
-        return list(cls.motion_sensors.values())
+        return list(cls.get_motion_sensors_by_id().values())
 
     @classmethod
     def get_all_windoor_sensors(cls) -> list[SensorInfo]:
         """Get all windoor sensors."""
-        return list(cls.windoor_sensors.values())
+        return list(cls.get_windoor_sensors_by_id().values())
 
     @classmethod
     def update_motion_sensor(cls, sensor_id: int, **kwargs) -> bool:
         """Update motion sensor configuration."""
-        if sensor_id in cls.motion_sensors:
-            for key, value in kwargs.items():
-                if hasattr(cls.motion_sensors[sensor_id], key):
-                    setattr(cls.motion_sensors[sensor_id], key, value)
+        with cls._lock:
+            sensor = cls.motion_sensors.get(sensor_id)
+            if sensor is None:
+                return False
+            cls._update_sensor("motion", sensor_id, sensor, kwargs)
             return True
-        return False
 
     @classmethod
     def update_windoor_sensor(cls, sensor_id: int, **kwargs) -> bool:
         """Update windoor sensor configuration."""
-        if sensor_id in cls.windoor_sensors:
-            for key, value in kwargs.items():
-                if hasattr(cls.windoor_sensors[sensor_id], key):
-                    setattr(cls.windoor_sensors[sensor_id], key, value)
+        with cls._lock:
+            sensor = cls.windoor_sensors.get(sensor_id)
+            if sensor is None:
+                return False
+            cls._update_sensor("windoor", sensor_id, sensor, kwargs)
             return True
-        return False
+
+
+def _flags_of(sensor: SensorInfo) -> SensorFlags:
+    return SensorFlags(sensor.is_armed, sensor.is_triggered, sensor.is_opened)
@@ -0,0 +1,179 @@
+"""Shared-memory table of sensor flags."""
+
+import contextlib
+import os
+import struct
+import tempfile
+import threading
+import time
+from multiprocessing import shared_memory
+from typing import NamedTuple
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - not available on Windows
+    fcntl = None
+
+SENSOR_SHM_ENV = "SAFEHOME_SENSOR_SHM"
+
+KINDS = ("motion", "windoor")
+CAPACITY = 64  # Sensors per kind; keys 1..CAPACITY
+
+# Each row is 16 bytes: an 8-byte sequence counter followed by the flags.
+_SEQ = struct.Struct("<Q")
+_FLAGS = struct.Struct("<????")
+ROW_SIZE = 16
+TABLE_SIZE = len(KINDS) * CAPACITY * ROW_SIZE
+
+
+class SensorFlags(NamedTuple):
+    """Flags stored for one sensor."""
+
+    is_armed: bool
+    is_triggered: bool
+    is_opened: bool
+
+
+class SensorStateTable:
+    """Fixed-layout sensor flag table in ``multiprocessing.shared_memory``.
+
+    Worker processes and device simulators attach to the same segment by
+    name and read or write flags directly, without IPC round-trips.
+
+    Rows are protected by a seqlock. A writer bumps the row's sequence
+    counter to an odd value, writes the flags and bumps it again to an even
+    value; a reader retries until it sees the same even counter before and
+    after reading the flags, so it never returns a half-written row. Writers
+    are serialized with a file lock so the counter has a single writer at a
+    time; ``update`` reads and writes a row under that lock, so concurrent
+    updates of different flags from different processes are not lost.
+
+    The segment is not tied to the process that created it: it outlives
+    worker restarts and is only destroyed by ``unlink``.
+    """
+
+    def __init__(self, name: str):
+        """Attach to the table called name, creating it if needed.
+
+        Args:
+            name: Shared memory segment name shared by all processes
+        """
+        self.name = name
+        # New segments are zero-filled, i.e. every row starts out not present.
+        try:
+            self._shm = shared_memory.SharedMemory(
+                name=name, create=True, size=TABLE_SIZE, track=False
+            )
+        except FileExistsError:
+            self._shm = shared_memory.SharedMemory(name=name, track=False)
+        self._thread_lock = threading.Lock()
+        self._lock_path = os.path.join(tempfile.gettempdir(), f"{name}.lock")
+
+    @classmethod
+    def from_env(cls) -> "SensorStateTable | None":
+        """Attach to the table named by SAFEHOME_SENSOR_SHM, if set."""
+        name = os.environ.get(SENSOR_SHM_ENV)
+        return cls(name) if name else None
+
+    @staticmethod
+    def _offset(kind: str, key: int) -> int | None:
+        if kind not in KINDS or not 1 <= key <= CAPACITY:
+            return None
+        return (KINDS.index(kind) * CAPACITY + key - 1) * ROW_SIZE
+
+    def read(self, kind: str, key: int) -> SensorFlags | None:
+        """Return a consistent snapshot of one sensor's flags.
+
+        Args:
+            kind: "motion" or "windoor"
+            key: Sensor key in SensorDB
+
+        Returns:
+            The flags, or None if the sensor has never been written.
+        """
+        offset = self._offset(kind, key)
+        if offset is None:
+            return None
+        buf = self._shm.buf
+        while True:
+            (seq,) = _SEQ.unpack_from(buf, offset)
+            if seq & 1:
+                time.sleep(0)  # A writer is in the middle of this row
+                continue
+            flags = _FLAGS.unpack_from(buf, offset + _SEQ.size)
+            if _SEQ.unpack_from(buf, offset)[0] == seq:
+                break
+        present, is_armed, is_triggered, is_opened = flags
+        if not present:
+            return None
+        return SensorFlags(is_armed, is_triggered, is_opened)
+
+    def write(self, kind: str, key: int, flags: SensorFlags) -> bool:
+        """Store one sensor's flags.
+
+        Returns:
+            False if the sensor does not fit in the table.
+        """
+        offset = self._offset(kind, key)
+        if offset is None:
+            return False
+        with self._writer():
+            self._write_row(offset, flags)
+        return True
+
+    def update(self, kind: str, key: int, **flags: bool) -> SensorFlags | None:
+        """Change some of one sensor's flags atomically across processes.
+
+        Args:
+            kind: "motion" or "windoor"
+            key: Sensor key in SensorDB
+            **flags: New values of SensorFlags fields; the others are kept,
+                or False if the sensor has never been written
+
+        Returns:
+            The updated flags, or None if the sensor does not fit in the table.
+        """
+        offset = self._offset(kind, key)
+        if offset is None:
+            return None
+        with self._writer():
+            # Holding the writer lock, no row can be half-written
+            present, *current = _FLAGS.unpack_from(self._shm.buf, offset + _SEQ.size)
+            base = (
+                SensorFlags(*current) if present else SensorFlags(False, False, False)
+            )
+            updated = base._replace(**flags)
+            self._write_row(offset, updated)
+        return updated
+
+    def _write_row(self, offset: int, flags: SensorFlags) -> None:
+        """Write a row; the caller holds the writer lock."""
+        buf = self._shm.buf
+        (seq,) = _SEQ.unpack_from(buf, offset)
+        _SEQ.pack_into(buf, offset, seq + 1)
+        _FLAGS.pack_into(buf, offset + _SEQ.size, True, *flags)
+        _SEQ.pack_into(buf, offset, seq + 2)
+
+    @contextlib.contextmanager
+    def _writer(self):
+        """Serialize writers within this process and across processes."""
+        with self._thread_lock:
+            if fcntl is None:
+                yield
+                return
+            with open(self._lock_path, "a") as lock_file:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def close(self) -> None:
+        """Detach from the table."""
+        self._shm.close()
+
+    def unlink(self) -> None:
+        """Destroy the table for every process."""
+        self._shm.unlink()
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(self._lock_path)
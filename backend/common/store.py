@@ -0,0 +1,595 @@
+"""Shared state store for running the backend with several workers."""
+
+import asyncio
+import dataclasses
+import io
+import os
+import pickle
+import sqlite3
+import threading
+from collections.abc import Callable, Hashable
+from typing import NamedTuple, TypeVar
+
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse
+
+from .device import CameraDB, SensorDB
+from .user import User, UserDB
+
+STATE_DB_ENV = "SAFEHOME_STATE_DB"
+
+READ_METHODS = {"GET", "HEAD", "OPTIONS"}
+
+# How often publish_state runs a change again after losing a race with
+# another worker
+PUBLISH_ATTEMPTS = 5
+
+T = TypeVar("T")
+
+# A stored row: (section, repr of its key, pickled (key, value))
+Row = tuple[str, str, bytes]
+
+
+class Section(NamedTuple):
+    """State registered with the store; see ``register_section``."""
+
+    dump: Callable[[], dict]
+    load: Callable[[dict], None]
+    changes: Callable[[], dict] | None
+    shared: bool
+
+
+class SharedStateStore:
+    """SQLite-backed copy of the in-memory databases, kept row by row.
+
+    Every worker process keeps serving requests from its own ``UserDB``,
+    ``SensorDB`` and ``CameraDB``. The store keeps each user, sensor, camera
+    and alarm event pickled in a row of its own, tagged with the store
+    version that last wrote it:
+
+    * Before a request the worker reads the store version, a single
+      integer, and when another worker has moved it on loads just the rows
+      written since.
+    * A mutating request runs without holding any cross-process lock.
+      Afterwards the rows it changed are written in a short transaction,
+      unless another worker wrote one of them in the meantime: the request
+      then gets 409 Conflict and its changes are dropped. Requests that fail
+      or change nothing write nothing. Within a worker, writes take turns on
+      an asyncio lock so that each one's changes are known exactly.
+    * Background work changes state the same way through ``publish_state``,
+      which runs the change again after a conflict.
+
+    Alarm events are never compared: users report the events they add or
+    change (see ``UserDB.track_alarm_events``), so the cost of a write does
+    not grow with the alarm history. Event ids are reserved in the store,
+    so workers never hand out the same one.
+
+    Extra state that lives outside the three databases can take part through
+    ``register_section``.
+    """
+
+    def __init__(self, path: str):
+        """Open (and create if needed) the store at path.
+
+        Args:
+            path: SQLite database file shared by all workers
+        """
+        self.path = path
+        self.version = 0
+        self._sections: dict[str, Section] = {}
+        # (section, key repr) -> (key, pickled value) as last stored or
+        # loaded, for sections that are compared to find their changes
+        self._stored: dict[tuple[str, str], tuple[Hashable, bytes]] = {}
+        self._conn = sqlite3.connect(
+            path, timeout=30, isolation_level=None, check_same_thread=False
+        )
+        # The connection is used from threadpool workers; sqlite3 connections
+        # must not be used by two threads at once.
+        self._conn_lock = threading.Lock()
+        self._write_lock = asyncio.Lock()
+
+        with self._conn_lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS meta ("
+                "id INTEGER PRIMARY KEY CHECK (id = 1), "
+                "version INTEGER NOT NULL)"
+            )
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS rows ("
+                "section TEXT NOT NULL, "
+                "key TEXT NOT NULL, "
+                "version INTEGER NOT NULL, "
+                "data BLOB NOT NULL, "
+                "PRIMARY KEY (section, key))"
+            )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS rows_version ON rows (version)"
+            )
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS counters ("
+                "name TEXT PRIMARY KEY, "
+                "value INTEGER NOT NULL)"
+            )
+
+        self.register_section("sensors", _dump_sensors, _load_sensors, shared=True)
+        self.register_section("cameras", _dump_cameras, _load_cameras, shared=True)
+        self.register_section("users", _dump_users, _load_users)
+        self.register_section(
+            "alarm_events",
+            _dump_alarm_events,
+            _load_alarm_events,
+            changes=UserDB.take_alarm_changes,
+        )
+        UserDB.track_alarm_events(self.next_alarm_event_id)
+
+    @classmethod
+    def from_env(cls) -> "SharedStateStore | None":
+        """Create a store when SAFEHOME_STATE_DB is set, otherwise None."""
+        path = os.environ.get(STATE_DB_ENV)
+        return cls(path) if path else None
+
+    def register_section(
+        self,
+        name: str,
+        dump: Callable[[], dict],
+        load: Callable[[dict], None],
+        *,
+        changes: Callable[[], dict] | None = None,
+        shared: bool = False,
+    ) -> None:
+        """Add state to the store.
+
+        Each section is a set of rows. Rows are written when they change,
+        and loaded when another worker changed them.
+
+        Args:
+            name: Section name
+            dump: Callable returning every row of the section as {key: value}
+            load: Callable applying changed rows given as {key: value}, where
+                a value of None means the row was removed
+            changes: Callable returning just the rows changed since it was
+                last called, value None for removed ones; without it the
+                changed rows are found by comparing every row with the
+                stored one
+            shared: Whether rows of other sections reference these rows.
+                References are stored by key and resolved when loading, so
+                load must update the existing objects in place.
+        """
+        self._sections[name] = Section(dump, load, changes, shared)
+        # Shared sections are loaded first, so references resolve to the
+        # updated objects
+        self._sections = dict(
+            sorted(self._sections.items(), key=lambda item: not item[1].shared)
+        )
+
+    def next_alarm_event_id(self, user: User) -> int:
+        """Reserve the id of a user's next alarm event in every worker.
+
+        Called with the user's alarm events locked, which keep their order
+        of ids.
+        """
+        name = f"alarm_events:{user.user_id}"
+        last = user.alarm_events[-1].id if user.alarm_events else 0
+        with self._conn_lock:
+            self._conn.execute(
+                "INSERT OR IGNORE INTO counters (name, value) VALUES (?, ?)",
+                (name, last),
+            )
+            (event_id,) = self._conn.execute(
+                "UPDATE counters SET value = value + 1 WHERE name = ? RETURNING value",
+                (name,),
+            ).fetchone()
+        return event_id
+
+    def fetch(self) -> tuple[int, list[Row]] | None:
+        """Return the stored version and the rows written since ours.
+
+        Returns None if the store is still at our version, which costs a
+        single-row read. The first worker to start seeds the store with its
+        initial state.
+        """
+        with self._conn_lock:
+            row = self._conn.execute("SELECT version FROM meta").fetchone()
+            if row is None:
+                return self._seed()
+            if row[0] == self.version:
+                return None
+            # Read the version and its rows from one snapshot
+            self._conn.execute("BEGIN")
+            try:
+                (version,) = self._conn.execute("SELECT version FROM meta").fetchone()
+                rows = self._conn.execute(
+                    "SELECT section, key, data FROM rows WHERE version > ?",
+                    (self.version,),
+                ).fetchall()
+            finally:
+                self._conn.execute("COMMIT")
+        return version, rows
+
+    def apply(self, fetched: tuple[int, list[Row]] | None) -> None:
+        """Load fetched rows into the in-memory state.
+
+        Runs on the event loop thread so that handlers never observe half
+        applied rows.
+        """
+        if fetched is None:
+            return
+        version, rows = fetched
+        self._load(rows)
+        self.version = version
+
+    async def middleware(self, request, call_next):
+        """HTTP middleware keeping this worker in sync with the store."""
+        if request.method in READ_METHODS:
+            # Loading rows in the middle of a write would overwrite its
+            # changes unseen; the read waits for the next refresh instead.
+            if not self._write_lock.locked():
+                self.apply(await run_in_threadpool(self.fetch))
+            return await call_next(request)
+
+        async with self._write_lock:
+            self.apply(await run_in_threadpool(self.fetch))
+            try:
+                response = await call_next(request)
+            except BaseException:
+                await self._discard()
+                raise
+            if response.status_code >= 400:
+                await self._discard()
+            elif not await self._commit():
+                return JSONResponse(
+                    status_code=409,
+                    content={"detail": "Changed by another request, try again"},
+                )
+            return response
+
+    async def publish(self, mutate: Callable[[], T]) -> T:
+        """Run mutate on the latest state and store what it changed.
+
+        For changes made outside a request, such as by background tasks.
+        When another worker changed the same rows first, mutate runs again
+        on the updated state.
+
+        Raises:
+            RuntimeError: If every attempt lost to another worker.
+        """
+        async with self._write_lock:
+            for _ in range(PUBLISH_ATTEMPTS):
+                self.apply(await run_in_threadpool(self.fetch))
+                try:
+                    result = mutate()
+                except BaseException:
+                    await self._discard()
+                    raise
+                if await self._commit():
+                    return result
+        raise RuntimeError(f"State change lost {PUBLISH_ATTEMPTS} races in a row")
+
+    async def _commit(self) -> bool:
+        """Store the rows changed since the last sync.
+
+        Returns:
+            bool: False if another worker changed one of the rows first, in
+            which case the local changes are replaced by the stored rows.
+        """
+        changed = self._changed_rows()
+        if not changed:
+            return True
+        version, rows = await run_in_threadpool(self._write, changed)
+        self._load(rows)
+        if version is None:
+            return False
+        for (name, key_repr), (key, data) in changed.items():
+            if self._sections[name].changes is None:
+                self._stored[name, key_repr] = (key, data)
+        self.version = version
+        return True
+
+    async def _discard(self) -> None:
+        """Drop the changes since the last sync by loading the stored rows."""
+        changed = self._changed_rows()
+        if changed:
+            self._load(await run_in_threadpool(self._read, changed))
+
+    def _write(
+        self, changed: dict[tuple[str, str], tuple[Hashable, bytes]]
+    ) -> tuple[int | None, list[Row]]:
+        """Write changed rows unless another worker wrote one since our version.
+
+        Returns:
+            tuple: The new version, None on a conflict, and the rows to load:
+            those other workers wrote since our version, and on a conflict
+            the stored copies of the changed rows.
+        """
+        with self._conn_lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                rows = self._conn.execute(
+                    "SELECT section, key, data FROM rows WHERE version > ?",
+                    (self.version,),
+                ).fetchall()
+                if any((name, key_repr) in changed for name, key_repr, _ in rows):
+                    self._conn.execute("ROLLBACK")
+                    return None, rows + self._read_locked(changed)
+                (version,) = self._conn.execute(
+                    "UPDATE meta SET version = version + 1 RETURNING version"
+                ).fetchone()
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO rows (section, key, version, data) "
+                    "VALUES (?, ?, ?, ?)",
+                    [
+                        (name, key_repr, version, data)
+                        for (name, key_repr), (_, data) in changed.items()
+                    ],
+                )
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+        return version, rows
+
+    def _read(self, keys: dict[tuple[str, str], tuple[Hashable, bytes]]) -> list[Row]:
+        """Return the stored rows of keys; removed rows for those not stored."""
+        with self._conn_lock:
+            return self._read_locked(keys)
+
+    def _read_locked(self, keys) -> list[Row]:
+        rows = []
+        for (name, key_repr), (key, _) in keys.items():
+            row = self._conn.execute(
+                "SELECT data FROM rows WHERE section = ? AND key = ?",
+                (name, key_repr),
+            ).fetchone()
+            data = row[0] if row else _pickle_row(key, None, {})
+            rows.append((name, key_repr, data))
+        return rows
+
+    def _seed(self) -> tuple[int, list[Row]]:
+        """Store our state as the first version, unless another worker did.
+
+        Must be called with the connection lock held.
+        """
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            if self._conn.execute("SELECT version FROM meta").fetchone() is not None:
+                rows = self._conn.execute("SELECT section, key, data FROM rows")
+                rows = rows.fetchall()
+                (version,) = self._conn.execute("SELECT version FROM meta").fetchone()
+                self._conn.execute("COMMIT")
+                return version, rows
+
+            self._conn.execute("INSERT INTO meta (id, version) VALUES (1, 1)")
+            dumped = self._dump_rows(changes=False)
+            self._conn.executemany(
+                "INSERT INTO rows (section, key, version, data) VALUES (?, ?, 1, ?)",
+                [
+                    (name, key_repr, data)
+                    for (name, key_repr), (_, data) in dumped.items()
+                ],
+            )
+        except BaseException:
+            self._conn.execute("ROLLBACK")
+            raise
+        self._conn.execute("COMMIT")
+        for (name, key_repr), row in dumped.items():
+            if self._sections[name].changes is None:
+                self._stored[name, key_repr] = row
+        return 1, []
+
+    def _dump_rows(
+        self, changes: bool = True
+    ) -> dict[tuple[str, str], tuple[Hashable, bytes]]:
+        """Pickle the rows of every section, or only the changed ones.
+
+        Sections with a ``changes`` callable report their own changes;
+        other sections' rows are changed if they pickle differently from
+        the stored ones.
+        """
+        shared = {
+            name: section.dump()
+            for name, section in self._sections.items()
+            if section.shared
+        }
+        refs = _references(shared)
+        rows: dict[tuple[str, str], tuple[Hashable, bytes]] = {}
+        for name, section in self._sections.items():
+            tracked = changes and section.changes is not None
+            values = section.changes() if tracked else shared.get(name)
+            if values is None:
+                values = section.dump()
+            for key, value in values.items():
+                data = _pickle_row(key, value, refs)
+                stored = self._stored.get((name, repr(key)))
+                if tracked or not changes or stored is None or stored[1] != data:
+                    rows[name, repr(key)] = (key, data)
+            if changes and not tracked:
+                for (stored_name, key_repr), (key, _) in self._stored.items():
+                    if stored_name == name and key not in values:
+                        rows[name, key_repr] = (key, _pickle_row(key, None, refs))
+        return rows
+
+    def _changed_rows(self) -> dict[tuple[str, str], tuple[Hashable, bytes]]:
+        return self._dump_rows(changes=True)
+
+    def _load(self, rows: list[Row]) -> None:
+        """Apply stored rows to the in-memory state."""
+        by_section: dict[str, list[bytes]] = {}
+        for name, _, data in rows:
+            by_section.setdefault(name, []).append(data)
+
+        shared: dict[str, dict] = {}
+        for name, section in self._sections.items():
+            if name in by_section:
+                values = dict(_unpickle_row(data, shared) for data in by_section[name])
+                if section.changes is None:
+                    # Remember our own pickle of the loaded rows, so that
+                    # unchanged rows compare equal later on
+                    refs = _references(shared)
+                    for key, value in values.items():
+                        if value is None:
+                            self._stored.pop((name, repr(key)), None)
+                        else:
+                            data = _pickle_row(key, value, refs)
+                            self._stored[name, repr(key)] = (key, data)
+                section.load(values)
+            if section.shared:
+                shared[name] = section.dump()
+
+    def install(self, app) -> None:
+        """Keep app in sync with the store and let publish_state use it."""
+        global _installed
+        app.middleware("http")(self.middleware)
+        _installed = self
+
+    def close(self) -> None:
+        """Close the underlying connection and stop tracking alarm events."""
+        if UserDB.alarm_event_ids == self.next_alarm_event_id:
+            UserDB.track_alarm_events(None)
+        with self._conn_lock:
+            self._conn.close()
+
+
+# The store installed in this worker, if any
+_installed: SharedStateStore | None = None
+
+
+async def publish_state(mutate: Callable[[], T]) -> T:
+    """Change the databases outside a request, sharing it with other workers.
+
+    Without a shared state store mutate is just called.
+
+    Args:
+        mutate: Callable making the change; it must look up the objects it
+            changes itself, since the state may be reloaded first, and may
+            be called more than once
+    """
+    if _installed is None:
+        return mutate()
+    return await _installed.publish(mutate)
+
+
+class _RowPickler(pickle.Pickler):
+    """Pickler storing references to rows of shared sections by key.
+
+    Memoization is off, so equal rows pickle the same whichever objects they
+    share, which is what comparing rows relies on.
+    """
+
+    def __init__(self, file, refs: dict[int, tuple[str, Hashable]], row):
+        super().__init__(file, protocol=pickle.HIGHEST_PROTOCOL)
+        self.fast = True
+        self._refs = refs
+        self._row = row
+
+    def persistent_id(self, obj):
+        if obj is self._row:
+            return None
+        return self._refs.get(id(obj))
+
+
+class _RowUnpickler(pickle.Unpickler):
+    """Unpickler resolving references stored by ``_RowPickler``."""
+
+    def __init__(self, file, shared: dict[str, dict]):
+        super().__init__(file)
+        self._shared = shared
+
+    def persistent_load(self, pid):
+        name, key = pid
+        return self._shared[name][key]
+
+
+def _references(shared: dict[str, dict]) -> dict[int, tuple[str, Hashable]]:
+    return {
+        id(value): (name, key)
+        for name, values in shared.items()
+        for key, value in values.items()
+    }
+
+
+def _pickle_row(key, value, refs: dict[int, tuple[str, Hashable]]) -> bytes:
+    file = io.BytesIO()
+    _RowPickler(file, refs, value).dump((key, value))
+    return file.getvalue()
+
+
+def _unpickle_row(data: bytes, shared: dict[str, dict]) -> tuple:
+    return _RowUnpickler(io.BytesIO(data), shared).load()
+
+
+def _dump_users():
+    # Alarm events are rows of their own
+    return {
+        user.user_id: dataclasses.replace(user, alarm_events=[])
+        for user in UserDB.users
+    }
+
+
+def _load_users(rows):
+    users = {user.user_id: user for user in UserDB.users}
+    for user_id, user in rows.items():
+        if user is None:
+            users.pop(user_id, None)
+            continue
+        if user_id in users:
+            # Keep the list, so events other threads are adding are not lost
+            user.alarm_events = users[user_id].alarm_events
+        users[user_id] = user
+    UserDB.users = list(users.values())
+
+
+def _dump_alarm_events():
+    return {
+        (user.user_id, event.id): event
+        for user in UserDB.users
+        for event in user.alarm_events
+    }
+
+
+def _load_alarm_events(rows):
+    for (user_id, event_id), event in rows.items():
+        user = UserDB.find_user_by_id(user_id)
+        if user is not None:
+            user.replace_alarm_event(event_id, event)
+
+
+def _dump_sensors():
+    with SensorDB._lock:
+        return {
+            **{("motion", k): v for k, v in SensorDB.motion_sensors.items()},
+            **{("windoor", k): v for k, v in SensorDB.windoor_sensors.items()},
+        }
+
+
+def _load_sensors(rows):
+    with SensorDB._lock:
+        for (kind, sensor_id), sensor in rows.items():
+            _load_in_place(
+                SensorDB.motion_sensors
+                if kind == "motion"
+                else SensorDB.windoor_sensors,
+                sensor_id,
+                sensor,
+            )
+
+
+def _dump_cameras():
+    with CameraDB._lock:
+        return dict(CameraDB.cameras)
+
+
+def _load_cameras(rows):
+    with CameraDB._lock:
+        for camera_id, camera in rows.items():
+            _load_in_place(CameraDB.cameras, camera_id, camera)
+
+
+def _load_in_place(objects: dict, key, value) -> None:
+    """Update objects[key] in place, keeping references to it valid."""
+    if value is None:
+        objects.pop(key, None)
+    elif key in objects:
+        vars(objects[key]).update(vars(value))
+    else:
+        objects[key] = value
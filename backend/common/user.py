@@ -1,5 +1,8 @@
 """User."""
 
+import bisect
+import threading
+from collections.abc import Callable
 from dataclasses import dataclass, field
 from datetime import datetime
 
@@ -14,6 +17,10 @@ from .device import (
     SensorDB,
 )
 
+# Alarm events may be added from any thread. The lock is module-level so
+# that User objects stay picklable for the shared state store.
+_alarm_events_lock = threading.Lock()
+
 
 @dataclass
 class User:
@@ -53,23 +60,89 @@ class User:
 
     def add_alarm_event(
         self, alarm_type, device_id: int | None, location: str, description: str
-    ) -> int:
-        """Add an alarm event and return its ID."""
-        event_id = len(self.alarm_events) + 1
-        event = AlarmEvent(
-            id=event_id,
-            timestamp=datetime.now(),
-            alarm_type=alarm_type,
-            device_id=device_id,
-            location=location,
-            description=description,
-        )
-        self.alarm_events.append(event)
-        return event_id
+    ) -> AlarmEvent:
+        """Add an alarm event and return it (thread-safe)."""
+        with _alarm_events_lock:
+            next_id = UserDB.alarm_event_ids
+            if next_id is None:
+                event_id = len(self.alarm_events) + 1
+            else:
+                event_id = next_id(self)
+            event = AlarmEvent(
+                id=event_id,
+                timestamp=datetime.now(),
+                alarm_type=alarm_type,
+                device_id=device_id,
+                location=location,
+                description=description,
+            )
+            self.alarm_events.append(event)
+            UserDB.alarm_event_changed(self, event_id)
+        return event
+
+    def find_alarm_event(self, event_id: int) -> AlarmEvent | None:
+        """Find an alarm event by ID; events are kept in order of ID."""
+        events = self.alarm_events
+        index = bisect.bisect_left(events, event_id, key=lambda e: e.id)
+        if index < len(events) and events[index].id == event_id:
+            return events[index]
+        return None
+
+    def attach_alarm_urls(self, event: AlarmEvent, field_name: str, urls) -> int:
+        """Add URLs to a list field of an alarm event (thread-safe).
+
+        The event is looked up by ID and timestamp, since the user's events
+        may have been reloaded since it was raised.
+
+        Args:
+            event: AlarmEvent as it was when raised
+            field_name: "snapshot_urls" or "clip_urls"
+            urls: URLs to add
+
+        Returns:
+            int: Number of URLs attached, 0 if the event is gone.
+        """
+        with _alarm_events_lock:
+            current = self.find_alarm_event(event.id)
+            if current is None or current.timestamp != event.timestamp:
+                return 0
+            getattr(current, field_name).extend(urls)
+            UserDB.alarm_event_changed(self, event.id)
+        return len(urls)
+
+    def replace_alarm_event(self, event_id: int, event: AlarmEvent | None) -> None:
+        """Store another copy of an alarm event, or remove it if None."""
+        with _alarm_events_lock:
+            events = self.alarm_events
+            index = bisect.bisect_left(events, event_id, key=lambda e: e.id)
+            found = index < len(events) and events[index].id == event_id
+            if event is None:
+                if found:
+                    del events[index]
+            elif found:
+                events[index] = event
+            else:
+                events.insert(index, event)
 
 
 class UserDB:
-    """User database class."""
+    """User database class.
+
+    Handlers that touch users are ``async def`` and run on the event loop
+    thread, so a handler that does not ``await`` between reading and
+    mutating a user cannot be interleaved with another request. Keep such
+    read-modify-write sequences free of ``await`` instead of adding locks.
+
+    Code running on other threads cannot rely on that, nor on the GIL,
+    which the free-threaded build does not have: it only mutates users
+    through ``User.add_alarm_event`` and ``User.attach_alarm_urls``, which
+    hold a lock. ``users`` itself
+    is only ever replaced as a whole, so lookups read it once.
+    """
+
+    # Set by the shared state store; see track_alarm_events
+    alarm_event_ids: Callable[[User], int] | None = None
+    _alarm_changes: set[tuple[str, int]] | None = None
 
     users = [
         User(
@@ -175,7 +248,45 @@ class UserDB:
         )
     ]
 
+    @classmethod
+    def track_alarm_events(cls, next_id: Callable[[User], int] | None) -> None:
+        """Record which alarm events are added or changed.
+
+        Args:
+            next_id: Callable returning the ID of a user's next alarm event,
+                called with the events locked; None to stop tracking
+        """
+        with _alarm_events_lock:
+            cls.alarm_event_ids = next_id
+            cls._alarm_changes = None if next_id is None else set()
+
+    @classmethod
+    def alarm_event_changed(cls, user: User, event_id: int) -> None:
+        """Record a change to an alarm event; called with the events locked."""
+        if cls._alarm_changes is not None:
+            cls._alarm_changes.add((user.user_id, event_id))
+
+    @classmethod
+    def take_alarm_changes(cls) -> dict[tuple[str, int], AlarmEvent | None]:
+        """Return the alarm events changed since the last call.
+
+        Returns:
+            dict: Events keyed by (user ID, event ID), None for events that
+            are gone.
+        """
+        with _alarm_events_lock:
+            changes = cls._alarm_changes or set()
+            if cls._alarm_changes is not None:
+                cls._alarm_changes = set()
+        events = {}
+        for user_id, event_id in changes:
+            user = cls.find_user_by_id(user_id)
+            event = user.find_alarm_event(event_id) if user else None
+            events[user_id, event_id] = event
+        return events
+
     @classmethod
     def find_user_by_id(cls, user_id: str) -> User | None:
         """Find a user by ID."""
-        return next((u for u in cls.users if u.user_id == user_id), None)
+        users = cls.users
+        return next((u for u in users if u.user_id == user_id), None)
@@ -64,7 +64,7 @@ def _serialize_device(device: Device) -> dict:
         }
     },
 )
-def reconfirm(request: ReconfirmRequest):
+async def reconfirm(request: ReconfirmRequest):
     """Reconfirm user with address and phone number."""
     user = UserDB.find_user_by_id(request.user_id)
     if not user:
@@ -110,7 +110,7 @@ def reconfirm(request: ReconfirmRequest):
         }
     },
 )
-def get_safety_zones(user_id: str):
+async def get_safety_zones(user_id: str):
     """Get safety zones for a user."""
     user = UserDB.find_user_by_id(user_id)
     if not user:
@@ -146,7 +146,7 @@ def get_safety_zones(user_id: str):
         }
     },
 )
-def arm(user_id: str):
+async def arm(user_id: str):
     """UC2.a/b. Arm system."""
     user = UserDB.find_user_by_id(user_id)
     if not user:
@@ -174,7 +174,7 @@ def arm(user_id: str):
         }
     },
 )
-def disarm(user_id: str):
+async def disarm(user_id: str):
     """UC2.a/b. Disarm system."""
     user = UserDB.find_user_by_id(user_id)
     if not user:
@@ -212,7 +212,7 @@ def disarm(user_id: str):
         },
     },
 )
-def arm_safety_zone(request: SafetyZoneRequest):
+async def arm_safety_zone(request: SafetyZoneRequest):
     """UC2.c. Arm safety zone selectively."""
     user = UserDB.find_user_by_id(request.user_id)
     if not user:
@@ -268,7 +268,7 @@ def arm_safety_zone(request: SafetyZoneRequest):
         },
     },
 )
-def disarm_safety_zone(request: SafetyZoneRequest):
+async def disarm_safety_zone(request: SafetyZoneRequest):
     """UC2.c. Disarm safety zone selectively."""
     user = UserDB.find_user_by_id(request.user_id)
     if not user:
@@ -328,7 +328,7 @@ def disarm_safety_zone(request: SafetyZoneRequest):
         },
     },
 )
-def create_safety_zone(request: SafetyZoneRequest):
+async def create_safety_zone(request: SafetyZoneRequest):
     """UC2.f. Create new safety zone."""
     user = UserDB.find_user_by_id(request.user_id)
     if not user:
@@ -395,7 +395,7 @@ def create_safety_zone(request: SafetyZoneRequest):
         },
     },
 )
-def delete_safety_zone(request: SafetyZoneRequest):
+async def delete_safety_zone(request: SafetyZoneRequest):
     """UC2.g. Delete safety zone."""
     user = UserDB.find_user_by_id(request.user_id)
     if not user:
@@ -446,7 +446,7 @@ def delete_safety_zone(request: SafetyZoneRequest):
         },
     },
 )
-def update_safety_zone(request: SafetyZoneRequest):
+async def update_safety_zone(request: SafetyZoneRequest):
     """UC2.h. Update existing safety zone."""
     user = UserDB.find_user_by_id(request.user_id)
     if not user:
@@ -502,7 +502,7 @@ def update_safety_zone(request: SafetyZoneRequest):
         }
     },
 )
-def configure_safehome_modes(request: SafeHomeModeRequest):
+async def configure_safehome_modes(request: SafeHomeModeRequest):
     """UC2.i. Configure SafeHome modes."""
     user = UserDB.find_user_by_id(request.user_id)
     if not user:
@@ -544,7 +544,7 @@ def configure_safehome_modes(request: SafeHomeModeRequest):
         }
     },
 )
-def get_safehome_modes(user_id: str):
+async def get_safehome_modes(user_id: str):
     """Get SafeHome modes configuration."""
     user = UserDB.find_user_by_id(user_id)
     if not user:
@@ -581,7 +581,7 @@ def get_safehome_modes(user_id: str):
         }
     },
 )
-def set_safehome_mode(request: SetModeRequest):
+async def set_safehome_mode(request: SetModeRequest):
     """Set current SafeHome mode."""
     user = UserDB.find_user_by_id(request.user_id)
     if not user:
@@ -629,7 +629,7 @@ def set_safehome_mode(request: SetModeRequest):
         }
     },
 )
-def alarm_condition_encountered(request: AlarmEventRequest):
+async def alarm_condition_encountered(request: AlarmEventRequest):
     """UC2.d. Alarm condition encountered."""
     user = UserDB.find_user_by_id(request.user_id)
     if not user:
@@ -641,7 +641,7 @@ def alarm_condition_encountered(request: AlarmEventRequest):
         raise HTTPException(status_code=400, detail="Device not found")
 
     # Record alarm event
-    event_id = user.add_alarm_event(
+    event = user.add_alarm_event(
         alarm_type=request.alarm_type,
         device_id=request.device_id,
         location=request.location,
@@ -650,7 +650,7 @@ def alarm_condition_encountered(request: AlarmEventRequest):
 
     # Simulate alarm actions based on use case
     response_data = {
-        "event_id": event_id,
+        "event_id": event.id,
         "message": "Alarm condition encountered",
         "actions_taken": [
             "Audible alarm activated",
@@ -684,7 +684,7 @@ def alarm_condition_encountered(request: AlarmEventRequest):
         }
     },
 )
-def view_intrusion_log(request: ViewLogRequest):
+async def view_intrusion_log(request: ViewLogRequest):
     """UC2.j. View intrusion log."""
     user = UserDB.find_user_by_id(request.user_id)
     if not user:
@@ -720,6 +720,8 @@ def view_intrusion_log(request: ViewLogRequest):
                 "location": event.location,
                 "description": event.description,
                 "is_resolved": event.is_resolved,
+                "clip_urls": list(event.clip_urls),
+                "snapshot_urls": list(event.snapshot_urls),
             }
         )
 
@@ -742,14 +744,14 @@ def view_intrusion_log(request: ViewLogRequest):
         }
     },
 )
-def panic_call_monitoring_service(request: PanicRequest):
+async def panic_call_monitoring_service(request: PanicRequest):
     """UC2.k. Call monitoring service through control panel (panic function)."""
     user = UserDB.find_user_by_id(request.user_id)
     if not user:
         raise HTTPException(status_code=401, detail="Invalid user ID")
 
     # Record panic event
-    event_id = user.add_alarm_event(
+    event = user.add_alarm_event(
         alarm_type=AlarmType.PANIC,
         device_id=None,
         location=request.location,
@@ -757,7 +759,7 @@ def panic_call_monitoring_service(request: PanicRequest):
     )
 
     return {
-        "event_id": event_id,
+        "event_id": event.id,
         "message": "Panic call initiated - monitoring service contacted immediately",
         "actions_taken": [
             "Panic alarm activated",
@@ -785,7 +787,7 @@ def panic_call_monitoring_service(request: PanicRequest):
         }
     },
 )
-def configure_safety_zone_interface(user_id: str):
+async def configure_safety_zone_interface(user_id: str):
     """UC2.e. Configure safety zone - main interface."""
     user = UserDB.find_user_by_id(user_id)
     if not user:
@@ -0,0 +1,100 @@
+"""Background work attached to alarms, such as camera snapshots and clips."""
+
+import asyncio
+from collections.abc import Awaitable, Callable
+from time import monotonic
+from typing import NamedTuple
+
+# Alarms waiting for their worker; further alarms are dropped
+ALARM_QUEUE_SIZE = 32
+
+
+class AlarmJob(NamedTuple):
+    """An alarm event waiting for media of the cameras that saw it."""
+
+    event: object  # AlarmEvent to attach the media to
+    sensor: object  # SensorInfo that fired, None for camera motion
+    queued_at: float  # monotonic seconds, the time of the alarm
+
+
+class AlarmPipeline:
+    """Bounded queue between alarms and the work that attaches media to them.
+
+    Alarm endpoints only ``submit`` a job, which never waits: when the
+    queue is full the job is dropped and counted, so a burst of alarms
+    cannot make triggers slow or grow memory without bound. A single
+    worker started with ``run`` takes jobs in order and hands each one to
+    the handler, which looks up the cameras, renders or encodes their
+    media and stores it.
+
+    The counters make overload visible: ``dropped`` alarms got no media,
+    and ``max_wait`` is the longest time a job spent queued. The queue is
+    created by ``run`` on the running event loop; until then there is no
+    worker and submitted jobs are dropped.
+    """
+
+    def __init__(self, maxsize: int = ALARM_QUEUE_SIZE):
+        """Create an empty pipeline.
+
+        Args:
+            maxsize: Number of jobs that can wait for the worker
+        """
+        self.maxsize = maxsize
+        self.submitted = 0
+        self.dropped = 0
+        self.completed = 0
+        self.failed = 0
+        self.attached = 0
+        self.max_wait = 0.0
+        self._queue: asyncio.Queue[AlarmJob] | None = None
+
+    def submit(self, event, sensor=None) -> bool:
+        """Queue work for an alarm event.
+
+        Returns:
+            bool: False if the job was dropped because the queue was full
+            or no worker is running.
+        """
+        self.submitted += 1
+        if self._queue is None:
+            self.dropped += 1
+            return False
+        try:
+            self._queue.put_nowait(AlarmJob(event, sensor, monotonic()))
+        except asyncio.QueueFull:
+            self.dropped += 1
+            return False
+        return True
+
+    async def run(self, handle: Callable[[AlarmJob], Awaitable[int]]) -> None:
+        """Process jobs until cancelled.
+
+        Args:
+            handle: Coroutine function taking a job and returning the
+                number of files it attached
+        """
+        self._queue = queue = asyncio.Queue(self.maxsize)
+        while True:
+            job = await queue.get()
+            self.max_wait = max(self.max_wait, monotonic() - job.queued_at)
+            try:
+                self.attached += await handle(job)
+                self.completed += 1
+            except Exception as e:
+                self.failed += 1
+                print(f"ERROR: alarm job failed: {e}")
+            finally:
+                queue.task_done()
+
+    def stats(self) -> dict:
+        """Return the queue depth and counters as a JSON-serializable dict."""
+        return {
+            "queued": self._queue.qsize() if self._queue is not None else 0,
+            "capacity": self.maxsize,
+            "submitted": self.submitted,
+            "dropped": self.dropped,
+            "completed": self.completed,
+            "failed": self.failed,
+            "attached": self.attached,
+            "max_wait": round(self.max_wait, 3),
+        }
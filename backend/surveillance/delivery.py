@@ -0,0 +1,118 @@
+"""Client-negotiated frame sizes and qualities for camera delivery."""
+
+from typing import NamedTuple
+
+
+class DeliveryLevel(NamedTuple):
+    """Output size, encoder quality, rendering tier and frame rate cap."""
+
+    name: str
+    width: int
+    quality: int
+    tier: str
+    fps: float
+
+    def within(
+        self, max_width: int | None = None, quality: int | None = None
+    ) -> "DeliveryLevel":
+        """Return this level narrowed to a client's limits.
+
+        Only the lowest level can exceed them, for clients asking for less
+        than any level offers; the frames then keep to the client's limits
+        and are not shared with the rest of the level.
+        """
+        return self._replace(
+            width=min(self.width, max_width or self.width),
+            quality=min(self.quality, quality or self.quality),
+        )
+
+
+# Ascending. Clients are snapped to one of these, so every client at a
+# level requests the same frames and they share one render and encode.
+DELIVERY_LEVELS = (
+    DeliveryLevel("low", 240, 50, "preview", 5.0),
+    DeliveryLevel("medium", 480, 65, "preview", 10.0),
+    DeliveryLevel("high", 720, 80, "full", 15.0),
+    DeliveryLevel("max", 1080, 90, "full", 30.0),
+)
+
+# Clients that give no max_width get at most this level; "max" is only
+# delivered to clients that ask for frames that wide.
+DEFAULT_LEVEL = 2
+
+# An adaptive stream steps down after this many late frames in a row...
+ADAPT_DOWN_AFTER = 2
+# ...and back up after this many frames in a row sent on time
+ADAPT_UP_AFTER = 20
+
+
+def negotiate_level(max_width: int | None = None, quality: int | None = None) -> int:
+    """Return the index of the best level within a client's limits.
+
+    Args:
+        max_width: Widest frame the client wants, None for DEFAULT_LEVEL
+        quality: Highest encoder quality the client wants, None for no limit
+
+    Returns:
+        int: Index into DELIVERY_LEVELS; the lowest level if none fits,
+        which the caller narrows with DeliveryLevel.within.
+    """
+    ceiling = DEFAULT_LEVEL if max_width is None else len(DELIVERY_LEVELS) - 1
+    for index in reversed(range(ceiling + 1)):
+        level = DELIVERY_LEVELS[index]
+        if (max_width is None or level.width <= max_width) and (
+            quality is None or level.quality <= quality
+        ):
+            return index
+    return 0
+
+
+class AdaptiveLevel:
+    """The delivery level of one stream, following how well its client keeps up.
+
+    A frame is late when the client had not taken the previous one by the
+    time the next was due. After ADAPT_DOWN_AFTER late frames in a row the
+    stream drops one level; after ADAPT_UP_AFTER frames in a row on time
+    it climbs one level again, never above the negotiated ceiling.
+    """
+
+    def __init__(
+        self, ceiling: int, max_width: int | None = None, quality: int | None = None
+    ):
+        """Start a stream at its negotiated level.
+
+        Args:
+            ceiling: Index into DELIVERY_LEVELS the client negotiated
+            max_width: Widest frame the client wants
+            quality: Highest encoder quality the client wants
+        """
+        self.ceiling = ceiling
+        self.max_width = max_width
+        self.quality = quality
+        self.index = ceiling
+        self.changes = 0
+        self._late = 0
+        self._on_time = 0
+
+    @property
+    def level(self) -> DeliveryLevel:
+        """Return the current delivery level, within the client's limits."""
+        return DELIVERY_LEVELS[self.index].within(self.max_width, self.quality)
+
+    def record(self, late: bool) -> DeliveryLevel:
+        """Record whether a frame was late and return the level for the next."""
+        if late:
+            self._late += 1
+            self._on_time = 0
+            if self._late >= ADAPT_DOWN_AFTER and self.index > 0:
+                self.index -= 1
+                self.changes += 1
+                self._late = 0
+        else:
+            self._on_time += 1
+            self._late = 0
+            if self._on_time >= ADAPT_UP_AFTER and self.index < self.ceiling:
+                self.index += 1
+                self.changes += 1
+                self._on_time = 0
+        return self.level
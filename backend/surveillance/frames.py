@@ -0,0 +1,104 @@
+"""Encoded camera frame cache."""
+
+import asyncio
+import io
+import os
+import threading
+from collections import OrderedDict
+from collections.abc import Callable, Hashable
+from concurrent.futures import Future, ThreadPoolExecutor
+
+FRAME_FORMATS = {"jpeg": "image/jpeg", "webp": "image/webp"}
+
+
+def encode_image(img, image_format: str, quality: int) -> bytes:
+    """Encode a PIL image as JPEG or WebP.
+
+    Args:
+        img: PIL image to encode
+        image_format: "jpeg" or "webp"
+        quality: Encoder quality (1-100)
+    """
+    buf = io.BytesIO()
+    img.save(buf, format=image_format.upper(), quality=quality)
+    return buf.getvalue()
+
+
+class FrameCache:
+    """LRU cache of encoded frames with single-flight rendering.
+
+    Frames are keyed by everything that affects the encoded bytes, e.g.
+    (camera, pan, zoom, time, size, quality, format). Viewers of the same
+    camera within the same second therefore share one entry.
+
+    When several requests miss on the same key at once, only the first one
+    submits a render; the others await the same future, so a burst of
+    viewers costs one render and one encode. Renders run on a small thread
+    pool because PIL releases the GIL while resizing and encoding.
+    """
+
+    def __init__(self, max_entries: int = 256, workers: int | None = None):
+        """Create an empty cache.
+
+        Args:
+            max_entries: Number of encoded frames kept
+            workers: Render threads, defaults to the number of CPUs
+        """
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[Hashable, bytes] = OrderedDict()
+        self._inflight: dict[Hashable, Future] = {}
+        # Render futures complete on executor threads, so the cache is
+        # guarded by a thread lock rather than relying on the event loop.
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(
+            max_workers=workers or os.cpu_count() or 1,
+            thread_name_prefix="frame-render",
+        )
+
+    async def get(self, key: Hashable, render: Callable[[], bytes]) -> bytes:
+        """Return the frame for key, rendering it at most once.
+
+        Args:
+            key: Cache key describing the frame
+            render: Callable producing the encoded frame on a miss
+        """
+        with self._lock:
+            data = self._entries.get(key)
+            if data is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return data
+            future = self._inflight.get(key)
+            owner = future is None
+            if owner:
+                self.misses += 1
+                future = self._executor.submit(render)
+                self._inflight[key] = future
+        if owner:
+            # Registered outside the lock: the callback runs immediately if
+            # the render has already finished.
+            future.add_done_callback(lambda f: self._finish(key, f))
+        # A cancelled viewer must not cancel the render others are waiting on
+        return await asyncio.shield(asyncio.wrap_future(future))
+
+    def _finish(self, key: Hashable, future: Future) -> None:
+        with self._lock:
+            self._inflight.pop(key, None)
+            if future.cancelled() or future.exception() is not None:
+                return
+            self._entries[key] = future.result()
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        """Drop every cached frame and reset the counters."""
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+
+frame_cache = FrameCache()
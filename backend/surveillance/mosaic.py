@@ -0,0 +1,47 @@
+"""Multi-camera mosaic composition."""
+
+import io
+import math
+
+# Tiles are camera frames from the shared frame cache, encoded as JPEG at
+# this quality whatever the mosaic's own quality, so mosaics that differ
+# only in quality or format share them.
+TILE_QUALITY = 90
+
+
+def mosaic_layout(count: int, width: int, height: int):
+    """Arrange count tiles in a near-square grid filling width x height.
+
+    Args:
+        count: Number of tiles
+        width: Mosaic width in pixels
+        height: Mosaic height in pixels
+
+    Returns:
+        tuple: ((tile width, tile height), [(x, y) of each tile])
+    """
+    columns = math.ceil(math.sqrt(count))
+    rows = math.ceil(count / columns)
+    tile_size = (max(width // columns, 1), max(height // rows, 1))
+    positions = [
+        ((i % columns) * tile_size[0], (i // columns) * tile_size[1])
+        for i in range(count)
+    ]
+    return tile_size, positions
+
+
+def compose_mosaic(size, tiles, positions):
+    """Paste encoded tiles into one image, leaving unused cells black.
+
+    Args:
+        size: (width, height) of the mosaic
+        tiles: Encoded image bytes of each tile
+        positions: (x, y) of each tile
+    """
+    from PIL import Image
+
+    mosaic = Image.new("RGB", size, "black")
+    for data, position in zip(tiles, positions, strict=True):
+        with Image.open(io.BytesIO(data)) as tile:
+            mosaic.paste(tile, position)
+    return mosaic
@@ -0,0 +1,145 @@
+"""Per-camera PTZ command coalescing."""
+
+import asyncio
+import threading
+from concurrent.futures import Future
+from time import monotonic
+from typing import NamedTuple
+
+# Moves of one camera are applied at most this often
+PTZ_MIN_INTERVAL = 0.1
+
+
+class PTZResult(NamedTuple):
+    """Outcome of the batch of moves a command was applied with."""
+
+    pan: int
+    zoom: int
+    # Position the batch asked for after merging its commands (None: kept)
+    target_pan: int | None
+    target_zoom: int | None
+
+
+class _Pending:
+    """Merged target and waiters of the next move of one camera."""
+
+    def __init__(self):
+        self.pan = None
+        self.zoom = None
+        self.future: Future | None = None
+        self.scheduled = False
+        self.next_move = 0.0
+
+
+class PTZQueue:
+    """Coalesces PTZ commands per camera and applies them at a bounded rate.
+
+    Commands that arrive while a move of the same camera is waiting are
+    merged into its target, the last command winning on each axis. The
+    first command of a batch applies it, at most once every min_interval
+    seconds, with one ``set_position`` call. Every command of the batch
+    receives the same result.
+
+    Viewers can wait for the next move with ``wait_moved`` to push the new
+    frame as soon as it is applied instead of at their next tick.
+
+    Futures are thread-safe ``concurrent.futures`` futures, like in
+    ``FrameCache``, so the queue does not depend on a particular event loop.
+    """
+
+    def __init__(self, min_interval: float = PTZ_MIN_INTERVAL):
+        """Create an empty queue.
+
+        Args:
+            min_interval: Minimum seconds between two moves of one camera
+        """
+        self.min_interval = min_interval
+        self.commands = 0
+        self.moves = 0
+        self._pending: dict[int, _Pending] = {}
+        self._watchers: dict[int, set[Future]] = {}
+        self._lock = threading.Lock()
+
+    async def move(
+        self, camera_id: int, camera, pan: int | None, zoom: int | None
+    ) -> PTZResult:
+        """Queue a move and return the result of the batch that applied it.
+
+        Args:
+            camera_id: Camera identifier
+            camera: DeviceCamera to move
+            pan: Target pan position, or None to keep it
+            zoom: Target zoom level, or None to keep it
+        """
+        with self._lock:
+            self.commands += 1
+            pending = self._pending.setdefault(camera_id, _Pending())
+            if pan is not None:
+                pending.pan = pan
+            if zoom is not None:
+                pending.zoom = zoom
+            if pending.future is None:
+                pending.future = Future()
+            future = pending.future
+            leader = not pending.scheduled
+            pending.scheduled = True
+            delay = pending.next_move - monotonic()
+
+        if leader:
+            try:
+                if delay > 0:
+                    await asyncio.sleep(delay)
+            finally:
+                # Applied even if the leading request is cancelled, since
+                # other commands may be waiting on the batch.
+                self._apply(camera_id, camera)
+        return await asyncio.shield(asyncio.wrap_future(future))
+
+    def _apply(self, camera_id: int, camera) -> None:
+        with self._lock:
+            pending = self._pending[camera_id]
+            pan, zoom, future = pending.pan, pending.zoom, pending.future
+            pending.pan = pending.zoom = pending.future = None
+            pending.scheduled = False
+            pending.next_move = monotonic() + self.min_interval
+            self.moves += 1
+            watchers = self._watchers.pop(camera_id, set())
+
+        try:
+            result = PTZResult(*camera.set_position(pan, zoom), pan, zoom)
+        except Exception as e:
+            future.set_exception(e)
+            return
+        future.set_result(result)
+        for watcher in watchers:
+            if not watcher.done():
+                watcher.set_result(result)
+
+    async def wait_moved(self, camera_id: int, timeout: float) -> bool:
+        """Wait up to timeout seconds for the next move of a camera.
+
+        Returns:
+            bool: True if the camera moved, False on timeout.
+        """
+        watcher = Future()
+        with self._lock:
+            self._watchers.setdefault(camera_id, set()).add(watcher)
+        try:
+            await asyncio.wait_for(asyncio.wrap_future(watcher), timeout)
+            return True
+        except TimeoutError:
+            return False
+        finally:
+            with self._lock:
+                self._watchers.get(camera_id, set()).discard(watcher)
+
+    def clear(self) -> None:
+        """Forget pending rate limits and reset the counters."""
+        with self._lock:
+            for pending in self._pending.values():
+                pending.next_move = 0.0
+            self.commands = 0
+            self.moves = 0
+
+
+ptz_queue = PTZQueue()
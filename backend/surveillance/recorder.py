@@ -0,0 +1,260 @@
+"""Recent camera frames and alarm clips."""
+
+import contextlib
+import hashlib
+import io
+import os
+import re
+import tempfile
+import threading
+import time
+from collections import deque
+from collections.abc import Callable, Iterable
+from time import monotonic
+from typing import NamedTuple
+
+from ..common.user import UserDB
+
+CLIP_DIR_ENV = "SAFEHOME_CLIP_DIR"
+# Set to "1" to record the enabled cameras for alarm clips
+RECORDING_ENV = "SAFEHOME_CAMERA_RECORDING"
+
+# Seconds of video kept before and after an alarm
+CLIP_PRE_ROLL = 10.0
+CLIP_POST_ROLL = 10.0
+# Encoded frames of all cameras together never take more than this
+RECORDER_MAX_BYTES = 64 * 1024 * 1024
+# The background recorder samples every camera this often
+RECORD_INTERVAL = 0.5
+
+CLIP_QUALITY = 70
+# Files no alarm event links to are deleted once older than this, checked
+# at most every CLIP_PRUNE_INTERVAL
+CLIP_RETENTION = 24 * 3600.0
+CLIP_PRUNE_INTERVAL = 3600.0
+CLIP_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+# Media types of the files kept by ClipStore, by extension
+CLIP_MEDIA_TYPES = {"webp": "image/webp", "jpg": "image/jpeg"}
+
+_NAME_PATTERN = re.compile(r"^[0-9a-f]{16}\.(webp|jpg)$")
+
+
+class RecordedFrame(NamedTuple):
+    """An encoded frame and when it was recorded."""
+
+    recorded_at: float  # monotonic seconds
+    data: bytes
+
+
+class FrameRecorder:
+    """Ring buffers of recent encoded frames, one per camera.
+
+    Frames are stored as the bytes objects the renderer produced, without
+    copying them, so a frame shared with the frame cache takes its memory
+    once. Each ring keeps frames for max_age seconds. The total size over
+    all cameras is capped at max_bytes: when it is exceeded, the oldest
+    frames of any camera are evicted first, so cameras that stopped
+    recording lose their frames before active ones.
+    """
+
+    def __init__(
+        self,
+        max_bytes: int = RECORDER_MAX_BYTES,
+        max_age: float = CLIP_PRE_ROLL + CLIP_POST_ROLL + 1,
+    ):
+        """Create empty buffers.
+
+        Args:
+            max_bytes: Memory cap over all cameras, in encoded bytes
+            max_age: Seconds a frame is kept
+        """
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.total_bytes = 0
+        self.evicted = 0
+        self._rings: dict[int, deque[RecordedFrame]] = {}
+        self._lock = threading.Lock()
+
+    def add(self, camera_id: int, data: bytes, now: float | None = None) -> None:
+        """Append an encoded frame to a camera's ring.
+
+        Args:
+            camera_id: Camera identifier
+            data: Encoded frame; kept by reference, so it must not change
+            now: Monotonic time of the frame, defaults to now
+        """
+        if now is None:
+            now = monotonic()
+        with self._lock:
+            ring = self._rings.setdefault(camera_id, deque())
+            ring.append(RecordedFrame(now, data))
+            self.total_bytes += len(data)
+            while ring and now - ring[0].recorded_at > self.max_age:
+                self.total_bytes -= len(ring.popleft().data)
+            while self.total_bytes > self.max_bytes:
+                self._evict_oldest()
+
+    def _evict_oldest(self) -> None:
+        """Drop the oldest frame over all cameras. Needs the lock."""
+        camera_id = min(
+            (cid for cid, ring in self._rings.items() if ring),
+            key=lambda cid: self._rings[cid][0].recorded_at,
+        )
+        ring = self._rings[camera_id]
+        self.total_bytes -= len(ring.popleft().data)
+        self.evicted += 1
+        if not ring:
+            del self._rings[camera_id]
+
+    def frames(self, camera_id: int, start: float, end: float) -> list[RecordedFrame]:
+        """Return a camera's frames recorded between start and end."""
+        with self._lock:
+            ring = self._rings.get(camera_id, ())
+            return [f for f in ring if start <= f.recorded_at <= end]
+
+    def camera_ids(self) -> list[int]:
+        """Return the cameras with recorded frames."""
+        with self._lock:
+            return list(self._rings)
+
+    def clear(self) -> None:
+        """Drop every frame."""
+        with self._lock:
+            self._rings.clear()
+            self.total_bytes = 0
+            self.evicted = 0
+
+
+def encode_clip(frames: list[RecordedFrame], quality: int = CLIP_QUALITY) -> bytes:
+    """Encode frames as an animated WebP, each shown until the next one.
+
+    Args:
+        frames: Recorded JPEG frames in time order
+        quality: WebP quality
+    """
+    from PIL import Image
+
+    images = [Image.open(io.BytesIO(frame.data)) for frame in frames]
+    durations = [
+        max(int((b.recorded_at - a.recorded_at) * 1000), 1)
+        for a, b in zip(frames, frames[1:], strict=False)
+    ]
+    durations.append(durations[-1] if durations else 1000)
+    buf = io.BytesIO()
+    images[0].save(
+        buf,
+        format="WEBP",
+        save_all=True,
+        append_images=images[1:],
+        duration=durations,
+        loop=0,
+        quality=quality,
+    )
+    return buf.getvalue()
+
+
+class ClipStore:
+    """Alarm clips and snapshots stored under content-hash file names.
+
+    Like thumbnails, a name only ever refers to one content, so files can
+    be cached by clients forever. Files still linked from an alarm event
+    are kept; others are pruned after CLIP_RETENTION.
+    """
+
+    def __init__(
+        self, directory: str, referenced: Callable[[], Iterable[str]] | None = None
+    ):
+        """Create a store writing to directory.
+
+        Args:
+            directory: Directory for clip files, created on first use
+            referenced: Callable returning the names of the files that
+                alarm events link to, which are never pruned
+        """
+        self.directory = directory
+        self.referenced = referenced
+        self._last_prune = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(
+        cls, referenced: Callable[[], Iterable[str]] | None = None
+    ) -> "ClipStore":
+        """Use SAFEHOME_CLIP_DIR, or a directory in the temp dir."""
+        directory = os.environ.get(CLIP_DIR_ENV) or os.path.join(
+            tempfile.gettempdir(), "safehome-clips"
+        )
+        return cls(directory, referenced)
+
+    def save(self, data: bytes, extension: str = "webp") -> str:
+        """Write an encoded clip or snapshot and return its file name.
+
+        Args:
+            data: Encoded file content
+            extension: One of CLIP_MEDIA_TYPES
+        """
+        file_name = f"{hashlib.sha256(data).hexdigest()[:16]}.{extension}"
+        path = os.path.join(self.directory, file_name)
+        try:
+            # Same content saved again: keep the file and restart its age
+            os.utime(path)
+        except FileNotFoundError:
+            os.makedirs(self.directory, exist_ok=True)
+            tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp, "wb") as f:
+                f.write(data)
+            os.replace(tmp, path)
+        self._maybe_prune()
+        return file_name
+
+    def path(self, file_name: str) -> str | None:
+        """Return the path of a stored file, or None if unknown."""
+        if not _NAME_PATTERN.match(file_name):
+            return None
+        path = os.path.join(self.directory, file_name)
+        return path if os.path.isfile(path) else None
+
+    def _maybe_prune(self) -> None:
+        now = monotonic()
+        with self._lock:
+            last = self._last_prune
+            if last is not None and now - last < CLIP_PRUNE_INTERVAL:
+                return
+            self._last_prune = now
+        keep = set(self.referenced()) if self.referenced else set()
+        self.prune(CLIP_RETENTION, keep)
+
+    def prune(self, max_age: float, keep=()) -> None:
+        """Delete clip files older than max_age seconds.
+
+        Args:
+            max_age: Age in seconds, by modification time
+            keep: File names never deleted
+        """
+        cutoff = time.time() - max_age
+        try:
+            entries = os.scandir(self.directory)
+        except FileNotFoundError:
+            return
+        with entries:
+            for entry in entries:
+                if not _NAME_PATTERN.match(entry.name) or entry.name in keep:
+                    continue
+                with contextlib.suppress(FileNotFoundError):
+                    if entry.stat().st_mtime < cutoff:
+                        os.remove(entry.path)
+
+
+def linked_clip_files() -> set[str]:
+    """Return the names of the files linked from any user's alarm events."""
+    return {
+        url.rsplit("/", 1)[-1]
+        for user in UserDB.users
+        for event in list(user.alarm_events)
+        for url in (*event.clip_urls, *event.snapshot_urls)
+    }
+
+
+frame_recorder = FrameRecorder()
+clip_store = ClipStore.from_env(linked_clip_files)
@@ -0,0 +1,151 @@
+"""Camera frame rendering in worker processes."""
+
+import multiprocessing
+import os
+import queue
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing.shared_memory import SharedMemory
+from typing import NamedTuple
+
+from .frames import encode_image
+
+RENDER_PROCESSES_ENV = "SAFEHOME_RENDER_PROCESSES"
+
+# Each in-flight frame is written into a shared-memory slot of this size.
+# Encoded frames are far smaller; larger ones are returned pickled.
+RENDER_SLOT_BYTES = 4 * 1024 * 1024
+
+
+class RenderJob(NamedTuple):
+    """Everything a worker needs to render and encode one camera view."""
+
+    camera_id: int
+    pan: int
+    zoom: int
+    time: int
+    width: int
+    height: int
+    tier: str
+    image_format: str
+    quality: int
+
+
+# Worker process state: camera renderers and attached result slots
+_worker_cameras = {}
+_worker_slots: dict[str, SharedMemory] = {}
+
+
+def _render_in_worker(job: RenderJob, slot_name: str):
+    """Render a job into a shared-memory slot. Runs in a worker process.
+
+    Returns:
+        tuple: (length, None) with the frame in the slot, or (-1, bytes)
+        when the frame does not fit.
+    """
+    from device.device_camera import DeviceCamera
+
+    camera = _worker_cameras.get(job.camera_id)
+    if camera is None:
+        camera = DeviceCamera()
+        camera.set_id(job.camera_id)
+        _worker_cameras[job.camera_id] = camera
+    img = camera.render_view(
+        job.pan, job.zoom, job.time, (job.width, job.height), job.tier
+    )
+    data = encode_image(img, job.image_format, job.quality)
+
+    slot = _worker_slots.get(slot_name)
+    if slot is None:
+        # The parent owns the slot, so the worker must not track it
+        slot = SharedMemory(name=slot_name, track=False)
+        _worker_slots[slot_name] = slot
+    if len(data) > slot.size:
+        return -1, data
+    slot.buf[: len(data)] = data
+    return len(data), None
+
+
+class RenderPool:
+    """Renders and encodes camera frames in worker processes.
+
+    Cropping, resizing and encoding a frame holds the GIL for part of the
+    work, so renders on threads still slow down every request handled by
+    the process. Workers render outside of it, each with its own decoded
+    sources and view caches, and frames per second grow with the number of
+    cores.
+
+    Encoded frames come back through shared memory instead of the result
+    pipe: the pool owns one slot per in-flight render, the worker writes
+    the frame into it and only returns its length. ``render`` blocks, so it
+    is meant for the render callables of ``FrameCache``, which already run
+    on threads.
+    """
+
+    def __init__(self, processes: int, slot_bytes: int = RENDER_SLOT_BYTES):
+        """Create a pool; worker processes start on first use.
+
+        Args:
+            processes: Number of worker processes
+            slot_bytes: Size of each shared-memory result slot
+        """
+        self.processes = processes
+        self.slot_bytes = slot_bytes
+        self.renders = 0
+        self._executor: ProcessPoolExecutor | None = None
+        self._slots: list[SharedMemory] = []
+        self._free: queue.SimpleQueue[SharedMemory] = queue.SimpleQueue()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> "RenderPool | None":
+        """Use SAFEHOME_RENDER_PROCESSES, or None to render on threads.
+
+        "auto" starts one process per CPU; 0 or unset renders in-process.
+        """
+        value = os.environ.get(RENDER_PROCESSES_ENV, "").strip()
+        if value == "auto":
+            return cls(os.cpu_count() or 1)
+        if value and int(value) > 0:
+            return cls(int(value))
+        return None
+
+    def _start(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                # Twice the workers, so a worker never waits for a slot
+                for _ in range(self.processes * 2):
+                    slot = SharedMemory(create=True, size=self.slot_bytes)
+                    self._slots.append(slot)
+                    self._free.put(slot)
+                # Not forked: the server process runs threads
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.processes,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+            return self._executor
+
+    def render(self, job: RenderJob) -> bytes:
+        """Render and encode a frame in a worker and return its bytes."""
+        executor = self._start()
+        slot = self._free.get()
+        try:
+            length, data = executor.submit(_render_in_worker, job, slot.name).result()
+            if data is None:
+                data = bytes(slot.buf[:length])
+        finally:
+            self._free.put(slot)
+        self.renders += 1
+        return data
+
+    def close(self) -> None:
+        """Stop the workers and release the shared memory."""
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(cancel_futures=True)
+                self._executor = None
+            for slot in self._slots:
+                slot.close()
+                slot.unlink()
+            self._slots.clear()
+            self._free = queue.SimpleQueue()
@@ -1,18 +1,60 @@
 """Surveillance module for handling camera and sensor operations."""
 
+import asyncio
 import os
-import sys
 import threading
-from typing import List, Optional
-
-from fastapi import APIRouter, HTTPException
+from collections.abc import AsyncIterator, Awaitable, Callable
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import partial
+from time import monotonic
+from typing import TYPE_CHECKING, List, NamedTuple, Optional
+
+from fastapi import APIRouter, HTTPException, Query, Request, Response
+from fastapi.responses import FileResponse, StreamingResponse
 from pydantic import BaseModel
 
-sys.path.append(os.path.join(os.path.dirname(__file__), "../../"))
-
 from backend.common.device import AlarmType, CameraDB, SensorDB
+from backend.common.store import publish_state
 from backend.common.user import UserDB
-from device.device_camera import DeviceCamera
+
+from .alarm_pipeline import AlarmJob, AlarmPipeline
+from .delivery import (
+    DELIVERY_LEVELS,
+    AdaptiveLevel,
+    DeliveryLevel,
+    negotiate_level,
+)
+from .frames import FRAME_FORMATS, encode_image, frame_cache
+from .mosaic import TILE_QUALITY, compose_mosaic, mosaic_layout
+from .motion import (
+    MOTION_SAMPLE_INTERVAL,
+    MotionDetector,
+    MotionEvent,
+)
+from .ptz import ptz_queue
+from .recorder import (
+    CLIP_CACHE_CONTROL,
+    CLIP_MEDIA_TYPES,
+    CLIP_POST_ROLL,
+    CLIP_PRE_ROLL,
+    RECORD_INTERVAL,
+    clip_store,
+    encode_clip,
+    frame_recorder,
+)
+from .render_pool import RenderJob, RenderPool
+from .thumbnails import (
+    THUMBNAIL_CACHE_CONTROL,
+    THUMBNAIL_MAX_AGE,
+    format_captured_at,
+    thumbnail_store,
+)
+from .warmup import WarmupProgress
+
+if TYPE_CHECKING:
+    # Imported lazily at runtime so that starting the server does not pay for
+    # PIL and the camera device module.
+    from device.device_camera import DeviceCamera
 
 router = APIRouter(
     prefix="/surveillance",
@@ -32,6 +74,10 @@ class CameraViewResponse(BaseModel):
     pan_position: int = 0
     zoom_level: int = 2
     current_time: int = 0
+    # Negotiated from the client's max_width and quality
+    delivery_level: str = "high"
+    frame_url: str = ""
+    live_url: str = ""
 
 
 class PTZCommand(BaseModel):
@@ -97,17 +143,317 @@ class CameraStateResponse(BaseModel):
     is_enabled: bool
 
 
+# camera_instances, camera_last_used and saved_camera_ptz are only accessed
+# with camera_instances_lock held.
 camera_instances = {}
 camera_instances_lock = threading.Lock()
 
+# Pan/zoom of cameras that currently have no instance in this process, either
+# restored from the shared state store or kept when an idle camera is evicted.
+saved_camera_ptz: dict[int, tuple[int, int]] = {}
+
+# Cameras not used for this many seconds are dropped from camera_instances
+CAMERA_IDLE_TIMEOUT = 600.0
+CAMERA_EVICTION_INTERVAL = 30.0
+
+camera_last_used: dict[int, float] = {}
+_last_eviction = monotonic()
+
+
+# Cameras being created for async callers, so each is loaded only once
+_camera_loads: dict[int, Future] = {}
+camera_loader = ThreadPoolExecutor(max_workers=4, thread_name_prefix="camera-load")
+
+
+def get_or_create_camera(camera_id: int) -> "DeviceCamera":
+    """Get or create a camera instance.
+
+    Creating a camera reads its source image, so it is done without
+    holding camera_instances_lock. Blocks on that I/O; async code uses
+    load_camera instead.
+    """
+    from device.device_camera import DeviceCamera
+
+    now = monotonic()
+    with camera_instances_lock:
+        _evict_idle_cameras(now)
+        camera = camera_instances.get(camera_id)
+        if camera is not None:
+            camera_last_used[camera_id] = now
+            return camera
+
+    created = DeviceCamera()
+    created.set_id(camera_id)
+
+    with camera_instances_lock:
+        # Another thread may have created the camera meanwhile
+        camera = camera_instances.get(camera_id)
+        if camera is None:
+            camera = created
+            if camera_id in saved_camera_ptz:
+                camera.pan, camera.zoom = saved_camera_ptz.pop(camera_id)
+            camera_instances[camera_id] = camera
+        camera_last_used[camera_id] = now
+        return camera
+
+
+async def load_camera(camera_id: int) -> "DeviceCamera":
+    """Get or create a camera instance without blocking the event loop.
+
+    The lookup runs on camera_loader too, since a loaded camera may be
+    evicted before it is marked used and then has to be created again.
+    Requests for the same camera while it loads wait for the same creation.
+    """
+    with camera_instances_lock:
+        future = _camera_loads.get(camera_id)
+        owner = future is None
+        if owner:
+            future = camera_loader.submit(get_or_create_camera, camera_id)
+            _camera_loads[camera_id] = future
+    if owner:
+        future.add_done_callback(lambda f: _finish_camera_load(camera_id, f))
+    # A cancelled request must not cancel the load others are waiting on
+    return await asyncio.shield(asyncio.wrap_future(future))
+
+
+# Instances of enabled cameras that have none in camera_instances, used only
+# by the background monitors. Also only accessed with camera_instances_lock.
+_detached_cameras: dict[int, "DeviceCamera"] = {}
+
+
+def monitored_cameras() -> dict[int, "DeviceCamera"]:
+    """Return an instance of every enabled camera for background monitoring.
+
+    Motion detection and recording must go on for cameras nobody is
+    viewing, without keeping them from being evicted. A loaded camera is
+    returned as it is; any other camera gets a detached instance at its
+    saved pan/zoom, which is not in camera_instances and does not count as
+    using the camera. Creating one decodes the camera's source, so this is
+    called from a worker thread.
+    """
+    from device.device_camera import DeviceCamera
+
+    enabled = [c.camera_id for c in CameraDB.get_all_cameras() if c.is_enabled]
+    cameras = {}
+    with camera_instances_lock:
+        for camera_id in list(_detached_cameras):
+            if camera_id in camera_instances or camera_id not in enabled:
+                del _detached_cameras[camera_id]
+        for camera_id in enabled:
+            camera = camera_instances.get(camera_id)
+            if camera is None:
+                camera = _detached_cameras.get(camera_id)
+            if camera is not None:
+                cameras[camera_id] = camera
+
+    for camera_id in enabled:
+        if camera_id in cameras:
+            continue
+        created = DeviceCamera()
+        created.set_id(camera_id)
+        with camera_instances_lock:
+            camera = camera_instances.get(camera_id)
+            if camera is None:
+                camera = _detached_cameras.setdefault(camera_id, created)
+        cameras[camera_id] = camera
+
+    with camera_instances_lock:
+        # Detached cameras show the view their viewers left them at
+        for camera_id, camera in _detached_cameras.items():
+            if camera_id in saved_camera_ptz:
+                with camera._lock:
+                    camera.pan, camera.zoom = saved_camera_ptz[camera_id]
+    return cameras
+
 
-def get_or_create_camera(camera_id: int) -> DeviceCamera:
-    """Get or create a camera instance."""
+def _finish_camera_load(camera_id: int, future: Future) -> None:
     with camera_instances_lock:
-        if camera_id not in camera_instances:
-            camera_instances[camera_id] = DeviceCamera()
-            camera_instances[camera_id].set_id(camera_id)
-        return camera_instances[camera_id]
+        if _camera_loads.get(camera_id) is future:
+            del _camera_loads[camera_id]
+
+
+def _evict_idle_cameras(now: float) -> None:
+    """Drop cameras idle for CAMERA_IDLE_TIMEOUT, keeping their pan/zoom.
+
+    Must be called with camera_instances_lock held. Runs at most once per
+    CAMERA_EVICTION_INTERVAL so that lookups stay cheap.
+    """
+    global _last_eviction
+    if now - _last_eviction < CAMERA_EVICTION_INTERVAL:
+        return
+    _last_eviction = now
+
+    for camera_id, last_used in list(camera_last_used.items()):
+        if now - last_used < CAMERA_IDLE_TIMEOUT:
+            continue
+        del camera_last_used[camera_id]
+        camera = camera_instances.pop(camera_id, None)
+        if camera is not None:
+            saved_camera_ptz[camera_id] = camera.get_view_state()[:2]
+            camera.stop()
+
+
+# Cameras are probed in the background this often; list_cameras only reads
+# the stored results.
+CAMERA_HEALTH_INTERVAL = 10.0
+CAMERA_PROBE_TIMEOUT = 5.0
+
+
+def probe_camera(camera_id: int) -> bool:
+    """Check that a camera's source can be read and decoded.
+
+    Does not create a camera instance, so probing does not keep idle
+    cameras from being evicted.
+    """
+    from device.device_camera import preload_source
+
+    return preload_source(camera_id) is not None
+
+
+async def probe_cameras(timeout: float = CAMERA_PROBE_TIMEOUT) -> dict[int, bool]:
+    """Probe every camera concurrently and store whether it is online.
+
+    A probe that fails or does not finish within timeout seconds marks
+    its camera offline.
+    """
+    camera_ids = [c.camera_id for c in CameraDB.get_all_cameras()]
+    results = await asyncio.gather(
+        *(
+            asyncio.wait_for(asyncio.to_thread(probe_camera, cid), timeout)
+            for cid in camera_ids
+        ),
+        return_exceptions=True,
+    )
+    health = {
+        camera_id: result is True
+        for camera_id, result in zip(camera_ids, results, strict=True)
+    }
+
+    def store_health() -> None:
+        for camera_id, is_online in health.items():
+            CameraDB.update_camera(camera_id, is_online=is_online)
+
+    await publish_state(store_health)
+    return health
+
+
+async def watch_camera_health(interval: float = CAMERA_HEALTH_INTERVAL) -> None:
+    """Probe every camera until cancelled."""
+    while True:
+        try:
+            await probe_cameras()
+        except Exception as e:
+            print(f"ERROR: camera health check failed: {e}")
+        await asyncio.sleep(interval)
+
+
+def dump_camera_ptz() -> dict[int, tuple[int, int]]:
+    """Return the pan/zoom of every camera for the shared state store."""
+    with camera_instances_lock:
+        state = dict(saved_camera_ptz)
+        for camera_id, camera in camera_instances.items():
+            state[camera_id] = camera.get_view_state()[:2]
+    return state
+
+
+def load_camera_ptz(state: dict[int, tuple[int, int]]) -> None:
+    """Apply pan/zoom published by another worker."""
+    with camera_instances_lock:
+        for camera_id, (pan, zoom) in state.items():
+            camera = camera_instances.get(camera_id)
+            if camera is None:
+                saved_camera_ptz[camera_id] = (pan, zoom)
+                continue
+            with camera._lock:
+                camera.pan, camera.zoom = pan, zoom
+
+
+QUALITY_TIER_PATTERN = "^(fast|preview|full)$"
+
+
+class FrameSpec(NamedTuple):
+    """Size, rendering quality tier and encoding of a frame.
+
+    ``tier`` selects the resampling filter: "fast" (nearest neighbour) and
+    "preview" (bilinear) are meant for live previews such as PTZ moves,
+    "full" (LANCZOS) for stills.
+    """
+
+    width: int = 500
+    height: int = 500
+    quality: int = 80
+    image_format: str = "jpeg"
+    tier: str = "full"
+
+
+def level_spec(
+    level: DeliveryLevel, aspect: float = 1.0, image_format: str = "jpeg"
+) -> FrameSpec:
+    """Return the frame spec of a delivery level.
+
+    Args:
+        level: Delivery level giving the width, quality and tier
+        aspect: Height of the frames relative to their width
+        image_format: "jpeg" or "webp"
+    """
+    height = max(round(level.width * aspect), 16)
+    return FrameSpec(level.width, height, level.quality, image_format, level.tier)
+
+
+class CameraFrame(NamedTuple):
+    """An encoded camera view and the state it shows."""
+
+    key: tuple
+    content: bytes
+    pan: int
+    zoom: int
+    time: int
+
+    def headers(self) -> dict[str, str]:
+        """Return the view state as X-Camera-* response headers."""
+        return {
+            "X-Camera-Pan": str(self.pan),
+            "X-Camera-Zoom": str(self.zoom),
+            "X-Camera-Time": str(self.time),
+        }
+
+
+# Worker processes rendering frames, if SAFEHOME_RENDER_PROCESSES is set
+render_pool = RenderPool.from_env()
+
+
+async def render_camera_frame(camera_id: int, spec: FrameSpec) -> CameraFrame:
+    """Render and encode the current view of a camera through the frame cache.
+
+    The view is rendered directly at the requested size, so each frame is
+    resampled once. With a render pool, the render runs in a worker process.
+
+    Args:
+        camera_id: Camera identifier
+        spec: Size, quality tier and encoding of the frame
+    """
+    return await _render_frame(camera_id, await load_camera(camera_id), spec)
+
+
+async def _render_frame(
+    camera_id: int, device_camera: "DeviceCamera", spec: FrameSpec
+) -> CameraFrame:
+    pan, zoom, current_time = device_camera.get_view_state()
+    spec_fields = (spec.width, spec.height, spec.tier, spec.image_format, spec.quality)
+
+    def render() -> bytes:
+        if render_pool is not None:
+            return render_pool.render(
+                RenderJob(camera_id, pan, zoom, current_time, *spec_fields)
+            )
+        img = device_camera.render_view(
+            pan, zoom, current_time, (spec.width, spec.height), spec.tier
+        )
+        return encode_image(img, spec.image_format, spec.quality)
+
+    key = (camera_id, pan, zoom, current_time, *spec)
+    content = await frame_cache.get(key, render)
+    return CameraFrame(key, content, pan, zoom, current_time)
 
 
 # Default user for demo purposes - in real implementation this would come
@@ -123,6 +469,269 @@ def get_default_user():
     return user
 
 
+motion_detector = MotionDetector()
+
+
+def background_enabled(env: str) -> bool:
+    """Return whether an opt-in background loop is turned on by env."""
+    return os.environ.get(env, "").strip().lower() in {"1", "true", "yes", "on"}
+
+
+def sample_camera_motion() -> list[MotionEvent]:
+    """Sample every enabled camera once and return new motion.
+
+    Idle and evicted cameras are sampled too, through monitored_cameras,
+    without counting as used. Renders and compares the views, so it is run
+    in a worker thread.
+    """
+    cameras = monitored_cameras()
+    for camera_info in CameraDB.get_all_cameras():
+        if camera_info.camera_id not in cameras:
+            motion_detector.forget(camera_info.camera_id)
+    return motion_detector.process(cameras)
+
+
+def record_motion_events(events: list[MotionEvent]) -> None:
+    """Log camera motion as DETECT alarms, like a triggered motion sensor."""
+    if not events:
+        return
+    user = get_default_user()
+    for event in events:
+        camera_info = CameraDB.get_camera(event.camera_id)
+        alarm = user.add_alarm_event(
+            alarm_type=AlarmType.DETECT,
+            device_id=event.camera_id,
+            location=camera_info.location if camera_info else "",
+            description=(
+                f"Camera {event.camera_id} detected motion in {event.region} "
+                f"({event.changed:.0%} changed)"
+            ),
+        )
+        submit_alarm_clips(alarm)
+
+
+async def watch_camera_motion(interval: float = MOTION_SAMPLE_INTERVAL) -> None:
+    """Run motion detection on the enabled cameras until cancelled.
+
+    Only started when SAFEHOME_CAMERA_MOTION is set.
+    """
+    while True:
+        try:
+            events = await asyncio.to_thread(sample_camera_motion)
+            if events:
+                # Recorded on the event loop, like the alarms of the endpoints
+                await publish_state(partial(record_motion_events, events))
+        except Exception as e:
+            print(f"ERROR: motion detection failed: {e}")
+        await asyncio.sleep(interval)
+
+
+# Snapshots attached to sensor alarms
+SNAPSHOT_SPEC = FrameSpec(640, 480, 85, "jpeg", "full")
+snapshot_pipeline = AlarmPipeline()
+
+
+def cameras_for_sensor(sensor) -> list[int]:
+    """Return the enabled cameras that can see a sensor.
+
+    Those are the cameras listing the sensor's location in their
+    sensor_locations and the cameras in a safety zone of the default user
+    together with the sensor.
+    """
+    cameras = CameraDB.get_cameras_by_sensor_location().get(sensor.location, [])
+    camera_ids = {camera.camera_id for camera in cameras}
+    user = UserDB.find_user_by_id(DEFAULT_USER_ID)
+    for zone in user.safety_zones if user else []:
+        if any(device.sensor_info is sensor for device in zone.devices):
+            camera_ids.update(
+                device.camera_info.camera_id
+                for device in zone.devices
+                if device.camera_info is not None
+            )
+    return sorted(
+        camera_id
+        for camera_id in camera_ids
+        if (camera := CameraDB.get_camera(camera_id)) and camera.is_enabled
+    )
+
+
+async def capture_alarm_snapshots(job: AlarmJob) -> int:
+    """Render, store and attach snapshots of the cameras near a sensor.
+
+    Frames are rendered through the frame cache, on its render threads or
+    the render pool, and written to the clip store on a worker thread.
+
+    Returns:
+        int: Number of snapshots attached to the event.
+    """
+    camera_ids = cameras_for_sensor(job.sensor)
+    frames = await asyncio.gather(
+        *(render_camera_frame(camera_id, SNAPSHOT_SPEC) for camera_id in camera_ids)
+    )
+    urls = []
+    for frame in frames:
+        file_name = await asyncio.to_thread(clip_store.save, frame.content, "jpg")
+        urls.append(f"/surveillance/clips/{file_name}")
+    return await publish_state(
+        partial(attach_alarm_urls, job.event, "snapshot_urls", urls)
+    )
+
+
+def attach_alarm_urls(event, field: str, urls: list[str]) -> int:
+    """Link stored files from an alarm event of the default user.
+
+    The event is looked up again, since the shared state may have been
+    reloaded since it was raised.
+
+    Args:
+        event: AlarmEvent as it was when raised
+        field: "snapshot_urls" or "clip_urls"
+        urls: URLs of the stored files
+
+    Returns:
+        int: Number of URLs attached, 0 if the event is gone.
+    """
+    user = UserDB.find_user_by_id(DEFAULT_USER_ID)
+    return user.attach_alarm_urls(event, field, urls) if user else 0
+
+
+warmup_progress = WarmupProgress()
+
+
+async def warm_up_camera(camera_id: int) -> None:
+    """Do ahead of time what the first viewer of a camera would wait for.
+
+    Creates the camera, which decodes its source, renders the view of
+    every PTZ position, the captions of its current position and a fresh
+    thumbnail.
+    """
+    from device.device_camera import preload_captions, preload_views
+
+    camera = await load_camera(camera_id)
+    warmup_progress.step(camera_id, "camera")
+    await asyncio.to_thread(preload_views, camera_id)
+    warmup_progress.step(camera_id, "views")
+    await asyncio.to_thread(preload_captions, camera)
+    warmup_progress.step(camera_id, "captions")
+    if thumbnail_store.latest(camera_id, THUMBNAIL_MAX_AGE) is None:
+        await asyncio.to_thread(thumbnail_store.capture, camera)
+    warmup_progress.step(camera_id, "thumbnail")
+
+
+async def warm_up_cameras() -> None:
+    """Warm up every enabled camera concurrently, tracking warmup_progress."""
+    camera_ids = [c.camera_id for c in CameraDB.get_all_cameras() if c.is_enabled]
+    warmup_progress.start(camera_ids)
+
+    async def warm_up(camera_id: int) -> None:
+        try:
+            await warm_up_camera(camera_id)
+        except Exception as e:
+            warmup_progress.fail(camera_id, str(e))
+            print(f"ERROR: warming up camera {camera_id} failed: {e}")
+
+    await asyncio.gather(*(warm_up(camera_id) for camera_id in camera_ids))
+    warmup_progress.finish()
+
+
+# Recorded for alarm clips; small enough to keep 20 s of every camera
+RECORDING_SPEC = FrameSpec(320, 320, 70, "jpeg", "preview")
+
+
+async def record_camera_frames(interval: float = RECORD_INTERVAL) -> None:
+    """Keep recent frames of the enabled cameras until cancelled.
+
+    Only started when SAFEHOME_CAMERA_RECORDING is set. Idle and evicted
+    cameras are recorded too, through monitored_cameras, without counting
+    as used. Frames go
+    through the frame cache, so a recorded frame that a viewer also
+    requested is rendered once, and the recorder keeps the cached bytes
+    object itself.
+    """
+    last_keys = {}
+    while True:
+        try:
+            cameras = await asyncio.to_thread(monitored_cameras)
+        except Exception as e:
+            print(f"ERROR: recording cameras failed: {e}")
+            cameras = {}
+        camera_ids = list(cameras)
+        frames = await asyncio.gather(
+            *(_render_frame(cid, cameras[cid], RECORDING_SPEC) for cid in camera_ids),
+            return_exceptions=True,
+        )
+        for camera_id, frame in zip(camera_ids, frames, strict=True):
+            if isinstance(frame, Exception):
+                print(f"ERROR: recording camera {camera_id} failed: {frame}")
+            elif frame.key != last_keys.get(camera_id):
+                # Unchanged views are not stored again
+                last_keys[camera_id] = frame.key
+                frame_recorder.add(camera_id, frame.content)
+        await asyncio.sleep(interval)
+
+
+# Clips attached to alarms, exported once their post-roll is recorded
+clip_pipeline = AlarmPipeline()
+
+
+def cameras_for_alarm(event, sensor=None) -> list[int]:
+    """Return the recorded cameras an alarm event should get clips of.
+
+    The cameras near the sensor that fired, or for camera motion the
+    camera itself.
+    """
+    if sensor is not None:
+        camera_ids = cameras_for_sensor(sensor)
+    else:
+        camera_ids = [event.device_id]
+    recorded = frame_recorder.camera_ids()
+    return [camera_id for camera_id in camera_ids if camera_id in recorded]
+
+
+def save_alarm_clips(
+    event,
+    at: float,
+    sensor=None,
+    pre_roll: float = CLIP_PRE_ROLL,
+    post_roll: float = CLIP_POST_ROLL,
+) -> list[str]:
+    """Save clips around an alarm and return their URLs.
+
+    Args:
+        event: AlarmEvent the clips are of
+        at: Monotonic time of the alarm
+        sensor: SensorInfo that fired, None for camera motion
+        pre_roll: Seconds recorded before the alarm
+        post_roll: Seconds recorded after the alarm
+    """
+    urls = []
+    for camera_id in cameras_for_alarm(event, sensor):
+        frames = frame_recorder.frames(camera_id, at - pre_roll, at + post_roll)
+        if frames:
+            file_name = clip_store.save(encode_clip(frames))
+            urls.append(f"/surveillance/clips/{file_name}")
+    return urls
+
+
+def submit_alarm_clips(event, sensor=None) -> None:
+    """Queue clips of an alarm, if cameras are being recorded."""
+    if frame_recorder.camera_ids():
+        clip_pipeline.submit(event, sensor)
+
+
+async def export_queued_clips(job: AlarmJob) -> int:
+    """Export the clips of a queued alarm once its post-roll is recorded.
+
+    Jobs are handled in the order of their alarms, so waiting for one
+    job's post-roll never delays a later job past its own.
+    """
+    await asyncio.sleep(job.queued_at + CLIP_POST_ROLL - monotonic())
+    urls = await asyncio.to_thread(
+        save_alarm_clips, job.event, job.queued_at, job.sensor
+    )
+    return await publish_state(partial(attach_alarm_urls, job.event, "clip_urls", urls))
+
+
 def get_camera_info(camera_id: int):
     """Get camera info from CameraDB."""
     camera = CameraDB.get_camera(camera_id)
@@ -136,6 +745,24 @@ def validate_camera_exists(camera_id: int) -> None:
     get_camera_info(camera_id)
 
 
+def get_viewable_camera_info(camera_id: int, password: str | None):
+    """Get camera info, checking that the camera may be viewed."""
+    camera = get_camera_info(camera_id)
+
+    if not camera.is_enabled:
+        raise HTTPException(status_code=400, detail="Camera is disabled")
+
+    if camera.has_password:
+        if not password:
+            raise HTTPException(
+                status_code=401, detail="Password required to view this camera"
+            )
+        if camera.password != password:
+            raise HTTPException(status_code=401, detail="Incorrect password")
+
+    return camera
+
+
 class CameraListItem(BaseModel):
     """Model for camera list item."""
 
@@ -186,27 +813,21 @@ class CameraListResponse(BaseModel):
     },
 )
 async def list_cameras():
-    """List all available cameras."""
-    cameras = []
+    """List all available cameras.
 
-    for camera_info in CameraDB.get_all_cameras():
-        try:
-            get_or_create_camera(camera_info.camera_id)
-            is_online = True
-        except Exception:
-            is_online = False
-
-        cameras.append(
-            CameraListItem(
-                camera_id=camera_info.camera_id,
-                name=camera_info.name,
-                location=camera_info.location,
-                is_enabled=camera_info.is_enabled,
-                is_online=is_online,
-                has_password=camera_info.has_password,
-            )
+    ``is_online`` is the result of the latest background health probe.
+    """
+    cameras = [
+        CameraListItem(
+            camera_id=camera_info.camera_id,
+            name=camera_info.name,
+            location=camera_info.location,
+            is_enabled=camera_info.is_enabled,
+            is_online=camera_info.is_online,
+            has_password=camera_info.has_password,
         )
-
+        for camera_info in CameraDB.get_all_cameras()
+    ]
     return CameraListResponse(cameras=cameras)
 
 
@@ -229,6 +850,11 @@ async def list_cameras():
                         "pan_position": 0,
                         "zoom_level": 2,
                         "current_time": 0,
+                        "delivery_level": "high",
+                        "frame_url": "/surveillance/cameras/1/frame"
+                        "?size=720&quality=80&tier=full",
+                        "live_url": "/surveillance/cameras/1/stream"
+                        "?max_width=720&quality=80&fps=15&adaptive=true",
                     }
                 }
             },
@@ -261,28 +887,35 @@ async def list_cameras():
         },
     },
 )
-async def display_camera_view(camera_id: int, password: str | None = None):
+async def display_camera_view(
+    camera_id: int,
+    password: str | None = None,
+    max_width: int | None = Query(None, ge=16, le=2000),
+    quality: int | None = Query(None, ge=1, le=100),
+    fps: float | None = Query(None, gt=0, le=30),
+):
     """Display camera view with current settings.
 
+    The client's limits select a delivery level, "high" when max_width is
+    not given, and the returned frame and live URLs request exactly that
+    level's frames, so every client at the same level shares their encodes.
+
     Args:
         camera_id: Camera identifier
         password: Optional password if camera is password protected
+        max_width: Widest frame the client wants to receive
+        quality: Highest encoder quality the client wants
+        fps: Highest frame rate the client wants for the live view
     """
-    camera = get_camera_info(camera_id)
-
-    if not camera.is_enabled:
-        raise HTTPException(status_code=400, detail="Camera is disabled")
-
-    if camera.has_password:
-        if not password:
-            raise HTTPException(
-                status_code=401, detail="Password required to view this camera"
-            )
-        if camera.password != password:
-            raise HTTPException(status_code=401, detail="Incorrect password")
+    camera = get_viewable_camera_info(camera_id, password)
+    level = DELIVERY_LEVELS[negotiate_level(max_width, quality)].within(
+        max_width, quality
+    )
+    live_fps = min(fps or level.fps, level.fps)
 
     try:
-        device_camera = get_or_create_camera(camera_id)
+        device_camera = await load_camera(camera_id)
+        pan, zoom, current_time = device_camera.get_view_state()
         return CameraViewResponse(
             camera_id=camera_id,
             name=camera.name,
@@ -290,9 +923,19 @@ async def display_camera_view(camera_id: int, password: str | None = None):
             is_online=camera.is_online,
             stream_url=f"https://example.com/stream/cam{camera_id}.m3u8",
             image_url=camera.url,
-            pan_position=device_camera.pan,
-            zoom_level=device_camera.zoom,
-            current_time=device_camera.time,
+            pan_position=pan,
+            zoom_level=zoom,
+            current_time=current_time,
+            delivery_level=level.name,
+            frame_url=(
+                f"/surveillance/cameras/{camera_id}/frame"
+                f"?size={level.width}&quality={level.quality}&tier={level.tier}"
+            ),
+            live_url=(
+                f"/surveillance/cameras/{camera_id}/stream"
+                f"?max_width={level.width}&quality={level.quality}"
+                f"&fps={live_fps:g}&adaptive=true"
+            ),
         )
     except Exception as e:
         raise HTTPException(
@@ -300,6 +943,336 @@ async def display_camera_view(camera_id: int, password: str | None = None):
         ) from e
 
 
+@router.get(
+    "/cameras/{camera_id}/frame",
+    summary="UC1.b. Get the rendered camera frame",
+    response_class=Response,
+    responses={
+        200: {
+            "description": "Encoded camera view",
+            "content": {"image/jpeg": {}, "image/webp": {}},
+        },
+        400: {
+            "description": "Camera is disabled",
+            "content": {
+                "application/json": {"example": {"detail": "Camera is disabled"}}
+            },
+        },
+        401: {
+            "description": "Password required or incorrect",
+            "content": {
+                "application/json": {"example": {"detail": "Password required"}}
+            },
+        },
+        404: {
+            "description": "Camera not found",
+            "content": {
+                "application/json": {"example": {"detail": "Camera not found"}}
+            },
+        },
+        500: {
+            "description": "Failed to render camera frame",
+            "content": {
+                "application/json": {
+                    "example": {"detail": "Failed to render camera frame: error"}
+                }
+            },
+        },
+    },
+)
+async def get_camera_frame(
+    camera_id: int,
+    password: str | None = None,
+    size: int = Query(500, ge=16, le=2000),
+    height: int | None = Query(None, ge=16, le=2000),
+    quality: int = Query(80, ge=1, le=100),
+    image_format: str = Query("jpeg", alias="format", pattern="^(jpeg|webp)$"),
+    tier: str = Query("full", pattern=QUALITY_TIER_PATTERN),
+    max_width: int | None = Query(None, ge=16, le=2000),
+):
+    """Return the current camera view rendered and encoded by the server.
+
+    Frames are cached per camera, view state, size, tier and encoding, and
+    concurrent viewers of the same frame share one render and encode. The
+    view state is returned in X-Camera-* headers.
+
+    With max_width, the frame is instead delivered at the best delivery
+    level within max_width and quality, named in X-Delivery-Level; height
+    keeps the ratio of height to size.
+
+    Args:
+        camera_id: Camera identifier
+        password: Optional password if camera is password protected
+        size: Width of the returned frame in pixels
+        height: Height of the returned frame, defaults to size
+        quality: Encoder quality
+        image_format: "jpeg" or "webp"
+        tier: Rendering quality, "fast", "preview" or "full"
+        max_width: Widest frame the client wants, to negotiate a level
+    """
+    get_viewable_camera_info(camera_id, password)
+    headers = {"Cache-Control": "no-store"}
+    if max_width is None:
+        spec = FrameSpec(size, height or size, quality, image_format, tier)
+    else:
+        level = DELIVERY_LEVELS[negotiate_level(max_width, quality)].within(
+            max_width, quality
+        )
+        spec = level_spec(level, (height or size) / size, image_format)
+        headers["X-Delivery-Level"] = level.name
+
+    try:
+        frame = await render_camera_frame(camera_id, spec)
+    except Exception as e:
+        raise HTTPException(
+            status_code=500, detail=f"Failed to render camera frame: {str(e)}"
+        ) from e
+
+    return Response(
+        content=frame.content,
+        media_type=FRAME_FORMATS[image_format],
+        headers={**headers, **frame.headers()},
+    )
+
+
+@router.get(
+    "/mosaic",
+    summary="Get every viewable camera composed into one image",
+    response_class=Response,
+    responses={
+        200: {
+            "description": "Encoded grid of camera views",
+            "content": {"image/jpeg": {}, "image/webp": {}},
+        },
+        404: {
+            "description": "No camera can be shown",
+            "content": {
+                "application/json": {"example": {"detail": "No cameras to show"}}
+            },
+        },
+        500: {
+            "description": "Failed to render the mosaic",
+            "content": {
+                "application/json": {
+                    "example": {"detail": "Failed to render camera mosaic: error"}
+                }
+            },
+        },
+    },
+)
+async def get_camera_mosaic(
+    width: int = Query(1280, ge=16, le=3840),
+    height: int = Query(960, ge=16, le=2160),
+    quality: int = Query(80, ge=1, le=100),
+    image_format: str = Query("jpeg", alias="format", pattern="^(jpeg|webp)$"),
+    tier: str = Query("preview", pattern=QUALITY_TIER_PATTERN),
+):
+    """Return the enabled cameras without a password in one grid image.
+
+    Each tile is a camera frame rendered straight to its cell size. Tiles
+    come from the frame cache and are rendered in parallel on its threads,
+    so they are shared with other mosaics and with viewers of the same
+    frame. The composed image is cached too, keyed by its tiles. The camera
+    IDs in grid order are returned in the X-Mosaic-Cameras header.
+
+    Args:
+        width: Mosaic width in pixels
+        height: Mosaic height in pixels
+        quality: Encoder quality
+        image_format: "jpeg" or "webp"
+        tier: Rendering quality of the tiles, "fast", "preview" or "full"
+    """
+    camera_ids = [
+        camera.camera_id
+        for camera in CameraDB.get_all_cameras()
+        if camera.is_enabled and not camera.has_password
+    ]
+    if not camera_ids:
+        raise HTTPException(status_code=404, detail="No cameras to show")
+    tile_size, positions = mosaic_layout(len(camera_ids), width, height)
+
+    try:
+        tile_spec = FrameSpec(*tile_size, TILE_QUALITY, "jpeg", tier)
+        tiles = await asyncio.gather(
+            *(render_camera_frame(camera_id, tile_spec) for camera_id in camera_ids)
+        )
+
+        def render() -> bytes:
+            img = compose_mosaic(
+                (width, height), [tile.content for tile in tiles], positions
+            )
+            return encode_image(img, image_format, quality)
+
+        key = ("mosaic", width, height, quality, image_format)
+        key += tuple(tile.key for tile in tiles)
+        content = await frame_cache.get(key, render)
+    except Exception as e:
+        raise HTTPException(
+            status_code=500, detail=f"Failed to render camera mosaic: {str(e)}"
+        ) from e
+
+    return Response(
+        content=content,
+        media_type=FRAME_FORMATS[image_format],
+        headers={
+            "Cache-Control": "no-store",
+            "X-Mosaic-Cameras": ",".join(str(camera_id) for camera_id in camera_ids),
+        },
+    )
+
+
+MJPEG_BOUNDARY = "frame"
+
+
+@router.get(
+    "/cameras/{camera_id}/stream",
+    summary="UC1.b. Stream the camera view as MJPEG",
+    response_class=StreamingResponse,
+    responses={
+        200: {
+            "description": "multipart/x-mixed-replace stream of JPEG frames",
+            "content": {f"multipart/x-mixed-replace; boundary={MJPEG_BOUNDARY}": {}},
+        },
+        400: {
+            "description": "Camera is disabled",
+            "content": {
+                "application/json": {"example": {"detail": "Camera is disabled"}}
+            },
+        },
+        401: {
+            "description": "Password required or incorrect",
+            "content": {
+                "application/json": {"example": {"detail": "Password required"}}
+            },
+        },
+        404: {
+            "description": "Camera not found",
+            "content": {
+                "application/json": {"example": {"detail": "Camera not found"}}
+            },
+        },
+    },
+)
+async def stream_camera(
+    request: Request,
+    camera_id: int,
+    password: str | None = None,
+    fps: float = Query(5.0, gt=0, le=30),
+    size: int = Query(500, ge=16, le=2000),
+    height: int | None = Query(None, ge=16, le=2000),
+    quality: int = Query(80, ge=1, le=100),
+    tier: str = Query("full", pattern=QUALITY_TIER_PATTERN),
+    max_width: int | None = Query(None, ge=16, le=2000),
+    adaptive: bool = False,
+):
+    """Push the live camera view as a multipart/x-mixed-replace MJPEG stream.
+
+    The stream ends when the client disconnects or the camera stops being
+    viewable (disabled or password changed).
+
+    With max_width or adaptive, frames are delivered at the best delivery
+    level within max_width and quality, and fps is capped by the level.
+    An adaptive stream moves to lower levels while the client falls
+    behind and back up once it keeps up, and names the level of each part
+    in X-Delivery-Level.
+
+    Args:
+        request: Incoming request, polled for client disconnects
+        camera_id: Camera identifier
+        password: Optional password if camera is password protected
+        fps: Maximum frames per second
+        size: Width of the frames in pixels
+        height: Height of the frames, defaults to size
+        quality: JPEG quality
+        tier: Rendering quality, "fast", "preview" or "full"
+        max_width: Widest frame the client wants, to negotiate a level
+        adaptive: Adapt the level to how well the client keeps up
+    """
+    get_viewable_camera_info(camera_id, password)
+    spec = FrameSpec(size, height or size, quality, "jpeg", tier)
+    levels = None
+    if max_width is not None or adaptive:
+        ceiling = negotiate_level(max_width, quality)
+        level = DELIVERY_LEVELS[ceiling].within(max_width, quality)
+        spec = level_spec(level, (height or size) / size)
+        fps = min(fps, level.fps)
+        if adaptive:
+            levels = AdaptiveLevel(ceiling, max_width, quality)
+
+    return StreamingResponse(
+        mjpeg_stream(camera_id, password, fps, spec, request.is_disconnected, levels),
+        media_type=f"multipart/x-mixed-replace; boundary={MJPEG_BOUNDARY}",
+        headers={"Cache-Control": "no-store"},
+    )
+
+
+async def mjpeg_stream(
+    camera_id: int,
+    password: str | None,
+    fps: float,
+    spec: FrameSpec,
+    is_disconnected: Callable[[], Awaitable[bool]],
+    levels: AdaptiveLevel | None = None,
+) -> AsyncIterator[bytes]:
+    """Yield MJPEG parts for a camera at up to fps frames per second.
+
+    The next part is only produced once the previous one has been sent, so
+    a slow consumer never builds up a queue. When a tick is missed, either
+    because the client is slow or rendering took too long, the missed
+    frames are dropped and the stream continues with the current view.
+    Parts whose frame did not change since the previous part are skipped.
+    A PTZ move wakes the stream early, so the moved view is sent once, as
+    soon as it is applied.
+
+    With levels, every tick is recorded as late or on time, and the
+    frames follow the level it chooses: spec keeps only its height to
+    width ratio and format, and fps is capped by the level.
+    """
+    aspect = spec.height / spec.width
+    level = levels and levels.level
+    if level is not None:
+        spec = level_spec(level, aspect, spec.image_format)
+    interval = 1.0 / min(fps, level.fps) if level else 1.0 / fps
+    last_key = None
+    next_tick = monotonic()
+
+    while not await is_disconnected():
+        try:
+            get_viewable_camera_info(camera_id, password)
+        except HTTPException:
+            return
+
+        frame = await render_camera_frame(camera_id, spec)
+        if frame.key != last_key:
+            last_key = frame.key
+            yield _mjpeg_part(frame, level)
+
+        now = monotonic()
+        next_tick += interval
+        late = next_tick < now
+        if late:
+            next_tick = now  # Drop missed frames instead of catching up
+        if levels is not None and levels.record(late) != level:
+            level = levels.level
+            spec = level_spec(level, aspect, spec.image_format)
+            interval = 1.0 / min(fps, level.fps)
+        # A PTZ move pushes its frame right away instead of at the next tick
+        if await ptz_queue.wait_moved(camera_id, next_tick - now):
+            next_tick = monotonic()
+
+
+def _mjpeg_part(frame: "CameraFrame", level: DeliveryLevel | None = None) -> bytes:
+    headers = {
+        "Content-Type": "image/jpeg",
+        "Content-Length": str(len(frame.content)),
+        **frame.headers(),
+    }
+    if level is not None:
+        headers["X-Delivery-Level"] = level.name
+    head = "".join(f"{name}: {value}\r\n" for name, value in headers.items())
+    return f"--{MJPEG_BOUNDARY}\r\n{head}\r\n".encode("ascii") + frame.content + b"\r\n"
+
+
 @router.post(
     "/cameras/{camera_id}/ptz",
     response_model=PTZResponse,
@@ -351,39 +1324,17 @@ async def control_camera_ptz(camera_id: int, cmd: PTZCommand):
         raise HTTPException(status_code=400, detail="Camera is disabled")
 
     try:
-        device_camera = get_or_create_camera(camera_id)
-        success = True
-        messages = []
-
-        if cmd.pan is not None:
-            current_pan = device_camera.pan
-            target_pan = cmd.pan
-
-            while current_pan != target_pan and success:
-                if current_pan < target_pan:
-                    success = device_camera.pan_right()
-                    current_pan = device_camera.pan
-                elif current_pan > target_pan:
-                    success = device_camera.pan_left()
-                    current_pan = device_camera.pan
-
-            if not success:
-                messages.append(f"Pan limit reached at {current_pan}")
-
-        if cmd.zoom is not None:
-            current_zoom = device_camera.zoom
-            target_zoom = cmd.zoom
+        device_camera = await load_camera(camera_id)
+        # Commands arriving in a burst are merged into one move
+        result = await ptz_queue.move(camera_id, device_camera, cmd.pan, cmd.zoom)
+        pan, zoom = result.pan, result.zoom
 
-            while current_zoom != target_zoom and success:
-                if current_zoom < target_zoom:
-                    success = device_camera.zoom_in()
-                    current_zoom = device_camera.zoom
-                elif current_zoom > target_zoom:
-                    success = device_camera.zoom_out()
-                    current_zoom = device_camera.zoom
-
-            if not success:
-                messages.append(f"Zoom limit reached at {current_zoom}")
+        messages = []
+        if result.target_pan is not None and pan != result.target_pan:
+            messages.append(f"Pan limit reached at {pan}")
+        if result.target_zoom is not None and zoom != result.target_zoom:
+            messages.append(f"Zoom limit reached at {zoom}")
+        success = not messages
 
         message = (
             "; ".join(messages) if messages else "PTZ command completed successfully"
@@ -391,8 +1342,8 @@ async def control_camera_ptz(camera_id: int, cmd: PTZCommand):
 
         return PTZResponse(
             camera_id=camera_id,
-            pan_position=device_camera.pan,
-            zoom_level=device_camera.zoom,
+            pan_position=pan,
+            zoom_level=zoom,
             success=success,
             message=message,
         )
@@ -510,10 +1461,10 @@ async def delete_camera_password(camera_id: int, password: str | None = None):
             "content": {
                 "application/json": {
                     "example": {
-                        "id": 101,
+                        "id": 1,
                         "camera_id": 1,
                         "captured_at": "2025-11-19T10:00:00Z",
-                        "image_url": "/camera1.jpg",
+                        "image_url": "/surveillance/thumbnails/3f2a9c0d1b7e4a56.jpg",
                     }
                 }
             },
@@ -527,18 +1478,83 @@ async def delete_camera_password(camera_id: int, password: str | None = None):
     },
 )
 async def list_thumbnails(camera_id: int):
-    """Get camera thumbnail (only one per camera)."""
+    """Get camera thumbnail (only one per camera).
+
+    Returns the last captured thumbnail, capturing a new one first if it is
+    older than THUMBNAIL_MAX_AGE.
+    """
     validate_camera_exists(camera_id)
 
-    url = CameraDB.get_url(camera_id)
-    thumbnail = ThumbnailShot(
-        id=100 + camera_id,
+    thumbnail = thumbnail_store.latest(camera_id, THUMBNAIL_MAX_AGE)
+    if thumbnail is None:
+        device_camera = await load_camera(camera_id)
+        thumbnail = await asyncio.to_thread(thumbnail_store.capture, device_camera)
+
+    return ThumbnailShot(
+        id=thumbnail.id,
         camera_id=camera_id,
-        captured_at="2025-11-19T10:00:00Z",
-        image_url=url,
+        captured_at=format_captured_at(thumbnail.captured_at),
+        image_url=f"/surveillance/thumbnails/{thumbnail.file_name}",
     )
 
-    return thumbnail
+
+@router.get(
+    "/thumbnails/{file_name}",
+    summary="UC1.f. Get a thumbnail image",
+    response_class=FileResponse,
+    responses={
+        200: {"description": "Thumbnail JPEG", "content": {"image/jpeg": {}}},
+        404: {
+            "description": "Thumbnail not found",
+            "content": {
+                "application/json": {"example": {"detail": "Thumbnail not found"}}
+            },
+        },
+    },
+)
+async def get_thumbnail_image(file_name: str):
+    """Serve a stored thumbnail.
+
+    Thumbnail names are content hashes, so responses are cacheable forever.
+    """
+    path = thumbnail_store.path(file_name)
+    if path is None:
+        raise HTTPException(status_code=404, detail="Thumbnail not found")
+    return FileResponse(
+        path,
+        media_type="image/jpeg",
+        headers={"Cache-Control": THUMBNAIL_CACHE_CONTROL},
+    )
+
+
+@router.get(
+    "/clips/{file_name}",
+    summary="Get a recorded alarm clip or snapshot",
+    response_class=FileResponse,
+    responses={
+        200: {
+            "description": "Animated WebP clip or JPEG snapshot",
+            "content": {"image/webp": {}, "image/jpeg": {}},
+        },
+        404: {
+            "description": "Clip not found",
+            "content": {"application/json": {"example": {"detail": "Clip not found"}}},
+        },
+    },
+)
+async def get_alarm_clip(file_name: str):
+    """Serve a recorded alarm clip or snapshot.
+
+    File names are content hashes, so responses are cacheable forever.
+    """
+    path = clip_store.path(file_name)
+    if path is None:
+        raise HTTPException(status_code=404, detail="Clip not found")
+    return FileResponse(
+        path,
+        media_type=CLIP_MEDIA_TYPES[file_name.rsplit(".", 1)[1]],
+        headers={"Cache-Control": CLIP_CACHE_CONTROL},
+    )
 
 
 @router.post(
@@ -629,7 +1645,7 @@ async def list_all_sensors():
     sensors = []
 
     # Add motion sensors - use dictionary key as unique sensor_id
-    for sensor_key, sensor_info in SensorDB.motion_sensors.items():
+    for sensor_key, sensor_info in SensorDB.get_motion_sensors_by_id().items():
         sensors.append(
             SensorStatus(
                 sensor_id=sensor_key,  # Use dictionary key for unique ID
@@ -641,7 +1657,7 @@ async def list_all_sensors():
         )
 
     # Add windoor sensors - use dictionary key as unique sensor_id
-    for sensor_key, sensor_info in SensorDB.windoor_sensors.items():
+    for sensor_key, sensor_info in SensorDB.get_windoor_sensors_by_id().items():
         sensors.append(
             SensorStatus(
                 sensor_id=sensor_key,  # Use dictionary key for unique ID
@@ -780,12 +1796,15 @@ async def trigger_motion_detector(sensor_id: int):
 
     # Log the sensor trigger event
     user = get_default_user()
-    user.add_alarm_event(
+    event = user.add_alarm_event(
         alarm_type=AlarmType.DETECT,
         device_id=sensor_id,
         location=sensor_info.location,
         description=f"Motion sensor {sensor_id} triggered",
     )
+    # Snapshots and clips are captured in the background and attached later
+    snapshot_pipeline.submit(event, sensor_info)
+    submit_alarm_clips(event, sensor_info)
 
     return {"sensor_id": sensor_id, "sensor_type": "motion", "is_triggered": True}
 
@@ -978,12 +1997,15 @@ async def open_windoor_sensor(sensor_id: int):
 
     # Log the sensor open event
     user = get_default_user()
-    user.add_alarm_event(
+    event = user.add_alarm_event(
         alarm_type=AlarmType.DOOR_WINDOW_OPEN,
         device_id=sensor_id,
         location=sensor_info.location,
         description=f"Windoor sensor {sensor_id} opened",
     )
+    # Snapshots and clips are captured in the background and attached later
+    snapshot_pipeline.submit(event, sensor_info)
+    submit_alarm_clips(event, sensor_info)
 
     return {"sensor_id": sensor_id, "sensor_type": "windoor", "is_opened": True}
 
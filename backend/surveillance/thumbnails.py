@@ -0,0 +1,169 @@
+"""On-disk store of camera thumbnails."""
+
+import contextlib
+import hashlib
+import os
+import re
+import tempfile
+import threading
+import time
+from datetime import datetime, timezone
+from time import monotonic
+from typing import NamedTuple
+
+from .frames import encode_image
+
+THUMBNAIL_DIR_ENV = "SAFEHOME_THUMBNAIL_DIR"
+
+THUMBNAIL_SIZE = (150, 150)
+THUMBNAIL_QUALITY = 80
+
+# A thumbnail older than this is replaced by a new capture when requested
+THUMBNAIL_MAX_AGE = 60.0
+# Files older than this are deleted, checked at most every PRUNE_INTERVAL
+THUMBNAIL_RETENTION = 24 * 3600.0
+PRUNE_INTERVAL = 3600.0
+
+# Served as immutable: a name only ever refers to one content
+THUMBNAIL_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+_NAME_PATTERN = re.compile(r"^[0-9a-f]{16}\.jpg$")
+
+
+class Thumbnail(NamedTuple):
+    """A captured thumbnail."""
+
+    id: int
+    camera_id: int
+    captured_at: datetime
+    file_name: str
+
+
+class ThumbnailStore:
+    """Fixed-size camera thumbnails stored under content-hash file names.
+
+    A capture renders the camera's current view straight to
+    THUMBNAIL_SIZE and writes it as ``<sha256 prefix>.jpg``. Because the
+    name is derived from the content, the file behind a name never changes
+    and clients may cache it forever. Several workers can share the
+    directory: identical captures map to the same file and writes are
+    atomic renames.
+    """
+
+    def __init__(self, directory: str):
+        """Create a store writing to directory.
+
+        Args:
+            directory: Directory for thumbnail files, created on first use
+        """
+        self.directory = directory
+        self._latest: dict[int, tuple[Thumbnail, float]] = {}
+        self._next_id = 1
+        self._last_prune = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> "ThumbnailStore":
+        """Use SAFEHOME_THUMBNAIL_DIR, or a directory in the temp dir."""
+        directory = os.environ.get(THUMBNAIL_DIR_ENV) or os.path.join(
+            tempfile.gettempdir(), "safehome-thumbnails"
+        )
+        return cls(directory)
+
+    def capture(self, camera) -> Thumbnail:
+        """Render, store and remember a thumbnail of a camera's view.
+
+        Args:
+            camera: DeviceCamera to capture
+        """
+        captured_at = datetime.now(timezone.utc)
+        pan, zoom, current_time = camera.get_view_state()
+        img = camera.render_view(pan, zoom, current_time, THUMBNAIL_SIZE)
+        data = encode_image(img, "jpeg", THUMBNAIL_QUALITY)
+
+        file_name = hashlib.sha256(data).hexdigest()[:16] + ".jpg"
+        self._write(file_name, data)
+
+        with self._lock:
+            thumbnail = Thumbnail(
+                self._next_id, camera.get_id(), captured_at, file_name
+            )
+            self._next_id += 1
+            self._latest[thumbnail.camera_id] = (thumbnail, monotonic())
+        self._maybe_prune()
+        return thumbnail
+
+    def latest(self, camera_id: int, max_age: float | None = None):
+        """Return the last thumbnail of a camera, if it is recent enough.
+
+        Args:
+            camera_id: Camera identifier
+            max_age: Maximum age in seconds, or None for any age
+        """
+        with self._lock:
+            entry = self._latest.get(camera_id)
+        if entry is None:
+            return None
+        thumbnail, captured = entry
+        if max_age is not None and monotonic() - captured > max_age:
+            return None
+        return thumbnail
+
+    def path(self, file_name: str) -> str | None:
+        """Return the path of a stored thumbnail, or None if unknown."""
+        if not _NAME_PATTERN.match(file_name):
+            return None
+        path = os.path.join(self.directory, file_name)
+        return path if os.path.isfile(path) else None
+
+    def _write(self, file_name: str, data: bytes) -> None:
+        path = os.path.join(self.directory, file_name)
+        try:
+            # Same content captured again: keep the file and restart its age
+            os.utime(path)
+            return
+        except FileNotFoundError:
+            pass
+        os.makedirs(self.directory, exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+
+    def _maybe_prune(self) -> None:
+        now = monotonic()
+        with self._lock:
+            last = self._last_prune
+            if last is not None and now - last < PRUNE_INTERVAL:
+                return
+            self._last_prune = now
+            keep = {thumbnail.file_name for thumbnail, _ in self._latest.values()}
+        self.prune(THUMBNAIL_RETENTION, keep)
+
+    def prune(self, max_age: float, keep=()) -> None:
+        """Delete thumbnail files older than max_age seconds.
+
+        Args:
+            max_age: Age in seconds, by modification time
+            keep: File names never deleted
+        """
+        cutoff = time.time() - max_age
+        try:
+            entries = os.scandir(self.directory)
+        except FileNotFoundError:
+            return
+        with entries:
+            for entry in entries:
+                if not _NAME_PATTERN.match(entry.name) or entry.name in keep:
+                    continue
+                with contextlib.suppress(FileNotFoundError):
+                    if entry.stat().st_mtime < cutoff:
+                        os.remove(entry.path)
+
+
+def format_captured_at(captured_at: datetime) -> str:
+    """Format a capture time like 2025-11-19T10:00:00Z."""
+    return captured_at.strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+thumbnail_store = ThumbnailStore.from_env()
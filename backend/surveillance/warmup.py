@@ -0,0 +1,77 @@
+"""Progress of the camera warm-up at server start."""
+
+import threading
+from time import monotonic
+
+# Steps of warming up one camera, in order
+WARMUP_STEPS = ("camera", "views", "captions", "thumbnail")
+
+
+class WarmupProgress:
+    """Tracks which warm-up steps each camera has completed.
+
+    The warm-up runs in the background after the server is ready, so
+    requests may arrive before it is done; ``snapshot`` reports how far it
+    got, e.g. for a health endpoint.
+    """
+
+    def __init__(self):
+        """Create progress for a warm-up that has not started."""
+        self.state = "pending"
+        self._started_at: float | None = None
+        self._finished_at: float | None = None
+        self._steps: dict[int, list[str]] = {}
+        self._errors: dict[int, str] = {}
+        self._lock = threading.Lock()
+
+    def start(self, camera_ids) -> None:
+        """Begin warming up the given cameras."""
+        with self._lock:
+            self.state = "running"
+            self._started_at = monotonic()
+            self._finished_at = None
+            self._steps = {camera_id: [] for camera_id in camera_ids}
+            self._errors = {}
+
+    def step(self, camera_id: int, step: str) -> None:
+        """Record that a camera completed a step of WARMUP_STEPS."""
+        with self._lock:
+            self._steps.setdefault(camera_id, []).append(step)
+
+    def fail(self, camera_id: int, error: str) -> None:
+        """Record that warming up a camera failed; its other steps are skipped."""
+        with self._lock:
+            self._errors[camera_id] = error
+
+    def finish(self) -> None:
+        """Mark the warm-up as done."""
+        with self._lock:
+            self.state = "done"
+            self._finished_at = monotonic()
+
+    def snapshot(self) -> dict:
+        """Return the progress as a JSON-serializable dict."""
+        with self._lock:
+            total = len(self._steps) * len(WARMUP_STEPS)
+            done = sum(len(steps) for steps in self._steps.values())
+            if self._started_at is None:
+                elapsed = 0.0
+            else:
+                elapsed = (self._finished_at or monotonic()) - self._started_at
+            if total:
+                progress = done / total
+            else:
+                # Nothing to warm up is only complete once the run finished
+                progress = 1.0 if self.state == "done" else 0.0
+            return {
+                "state": self.state,
+                "progress": progress,
+                "elapsed": round(elapsed, 3),
+                "cameras": {
+                    camera_id: {
+                        "completed": list(steps),
+                        "error": self._errors.get(camera_id),
+                    }
+                    for camera_id, steps in self._steps.items()
+                },
+            }
@@ -1,9 +1,13 @@
 """Tests for the common use cases."""
 
+import asyncio
+import os
+
 import pytest
 from fastapi.testclient import TestClient
 
 from backend.app import app
+from backend.common.assets import ASSET_DIR
 from backend.common.device import CameraDB, SensorDB
 from backend.common.user import Device, DeviceType, User, UserDB
 
@@ -305,7 +309,7 @@ def test_get_config_success():
 
     # Test the function directly to cover the missing lines
     request = GetConfigRequest(user_id="homeowner1")
-    result = get_config(request)
+    result = asyncio.run(get_config(request))
     assert "password1" in result
     assert "password2" in result
     assert "master_password" in result
@@ -324,6 +328,524 @@ def test_get_config_invalid_user():
     # Test the function directly to cover the missing lines
     request = GetConfigRequest(user_id="unknown")
     with pytest.raises(HTTPException) as exc_info:
-        get_config(request)
+        asyncio.run(get_config(request))
     assert exc_info.value.status_code == 401
     assert exc_info.value.detail == "Invalid user ID"
+
+
+def test_app_import_defers_imaging():
+    """Test that importing the app does not load PIL or NumPy."""
+    import subprocess
+    import sys
+
+    code = (
+        "import sys\n"
+        "import backend.app\n"
+        "assert 'PIL' not in sys.modules, 'PIL imported at startup'\n"
+        "assert 'numpy' not in sys.modules, 'numpy imported at startup'\n"
+    )
+    subprocess.run([sys.executable, "-c", code], check=True)
+
+
+@pytest.fixture
+def shared_state(tmp_path):
+    """Two stores on one file, standing in for two worker processes."""
+    import copy
+
+    from backend.common.store import SharedStateStore
+
+    # Stores load sensors and cameras in place
+    saved = [
+        (objects, dict(objects), {key: copy.copy(obj) for key, obj in objects.items()})
+        for objects in (
+            SensorDB.motion_sensors,
+            SensorDB.windoor_sensors,
+            CameraDB.cameras,
+        )
+    ]
+    path = str(tmp_path / "state.db")
+    worker_a, worker_b = SharedStateStore(path), SharedStateStore(path)
+    yield worker_a, worker_b
+    worker_a.close()
+    worker_b.close()
+    for objects, members, values in saved:
+        objects.clear()
+        objects.update(members)
+        for key, obj in members.items():
+            vars(obj).update(vars(values[key]))
+
+
+def stored_rows(store, version):
+    """Return the (section, key) of the rows written at version."""
+    import sqlite3
+
+    with sqlite3.connect(store.path) as conn:
+        rows = conn.execute(
+            "SELECT section, key FROM rows WHERE version = ?", (version,)
+        )
+        return set(rows.fetchall())
+
+
+def test_shared_state_store_propagates_writes(shared_state):
+    """Test that a write published by one worker is loaded by another."""
+    worker_a, worker_b = shared_state
+    worker_a.apply(worker_a.fetch())
+    worker_b.apply(worker_b.fetch())
+
+    def set_delay():
+        UserDB.find_user_by_id("homeowner1").delay_time = 42
+
+    asyncio.run(worker_a.publish(set_delay))
+    assert stored_rows(worker_a, worker_a.version) == {("users", "'homeowner1'")}
+
+    # Worker B still holds its own (stale) copy until it notices the change
+    UserDB.find_user_by_id("homeowner1").delay_time = 7
+    fetched = worker_b.fetch()
+    assert fetched is not None
+    assert [row[:2] for row in fetched[1]] == [("users", "'homeowner1'")]
+    worker_b.apply(fetched)
+    assert UserDB.find_user_by_id("homeowner1").delay_time == 42
+    assert worker_b.version == worker_a.version
+    assert worker_b.fetch() is None
+
+
+def test_shared_state_store_rejects_conflicting_writes(shared_state):
+    """Test that a write to a row another worker changed first is dropped."""
+    worker_a, worker_b = shared_state
+    worker_a.apply(worker_a.fetch())
+    worker_b.apply(worker_b.fetch())
+
+    def set_delay():
+        UserDB.find_user_by_id("homeowner1").delay_time = 42
+
+    asyncio.run(worker_a.publish(set_delay))
+
+    # Worker B changes the same user before it has seen worker A's write
+    UserDB.find_user_by_id("homeowner1").delay_time = 7
+    assert asyncio.run(worker_b._commit()) is False
+    assert UserDB.find_user_by_id("homeowner1").delay_time == 42
+
+    # A change to another row goes through
+    CameraDB.update_camera(2, is_online=False)
+    assert asyncio.run(worker_b._commit()) is True
+    assert worker_b.version == worker_a.version + 1
+
+
+def test_shared_state_store_keeps_shared_references(shared_state):
+    """Test that users keep pointing at SensorDB entries after a reload."""
+    worker_a, worker_b = shared_state
+    worker_a.apply(worker_a.fetch())
+    user = UserDB.find_user_by_id("homeowner1")
+    worker_b.apply(worker_b.fetch())
+
+    reloaded = UserDB.find_user_by_id("homeowner1")
+    assert reloaded is not user
+    assert reloaded.devices[0].sensor_info is SensorDB.get_motion_sensor(1)
+    assert reloaded.devices[10].camera_info is CameraDB.get_camera(1)
+
+
+def test_shared_state_store_shares_alarm_events(shared_state):
+    """Test that alarm events get unique ids and are stored one by one."""
+    worker_a, worker_b = shared_state
+    worker_a.apply(worker_a.fetch())
+    worker_b.apply(worker_b.fetch())
+    user = UserDB.find_user_by_id("homeowner1")
+
+    def raise_alarm():
+        return UserDB.find_user_by_id("homeowner1").add_alarm_event(
+            "intrusion", 1, "Living Room", "Motion detected"
+        )
+
+    first = asyncio.run(worker_a.publish(raise_alarm))
+    assert stored_rows(worker_a, worker_a.version) == {
+        ("alarm_events", repr(("homeowner1", first.id)))
+    }
+
+    # Worker B has not seen the first event when it raises its own
+    user.alarm_events.remove(first)
+    second = asyncio.run(worker_b.publish(raise_alarm))
+    assert second.id == first.id + 1
+    assert [event.id for event in user.alarm_events] == [first.id, second.id]
+
+    attached = asyncio.run(
+        worker_b.publish(lambda: user.attach_alarm_urls(first, "clip_urls", ["c"]))
+    )
+    assert attached == 1
+    assert stored_rows(worker_b, worker_b.version) == {
+        ("alarm_events", repr(("homeowner1", first.id)))
+    }
+
+
+def test_shared_state_store_middleware(shared_state):
+    """Test that only requests that change the state publish a new version."""
+    from fastapi import FastAPI
+
+    from backend.common import router
+
+    worker_a, _ = shared_state
+    test_app = FastAPI()
+    test_app.include_router(router)
+    test_app.middleware("http")(worker_a.middleware)
+    worker_client = TestClient(test_app)
+
+    response = worker_client.post("/power-off/", json={"user_id": "homeowner1"})
+    assert response.status_code == 200
+    version = worker_a.version
+
+    response = worker_client.request("GET", "/config/", json={"user_id": "homeowner1"})
+    assert response.status_code == 200
+    assert worker_a.version == version
+
+    # Failed and no-op writes publish nothing
+    response = worker_client.post("/power-off/", json={"user_id": "unknown"})
+    assert response.status_code == 401
+    response = worker_client.post("/power-off/", json={"user_id": "homeowner1"})
+    assert response.status_code == 200
+    assert worker_a.version == version
+
+    worker_a.version = 0
+    worker_a.apply(worker_a.fetch())
+    assert UserDB.find_user_by_id("homeowner1").is_powered_on is False
+
+
+def test_shared_state_store_publishes_background_changes(shared_state, monkeypatch):
+    """Test that changes made outside requests reach the other workers."""
+    from backend.common import store
+
+    worker_a, worker_b = shared_state
+    monkeypatch.setattr(store, "_installed", worker_a)
+
+    def go_offline():
+        CameraDB.update_camera(1, is_online=False)
+
+    asyncio.run(store.publish_state(go_offline))
+    version = worker_a.version
+    assert stored_rows(worker_a, version) == {("cameras", "1")}
+    asyncio.run(store.publish_state(go_offline))
+    assert worker_a.version == version
+
+    camera = CameraDB.get_camera(1)
+    camera.is_online = True
+    worker_b.apply(worker_b.fetch())
+    assert worker_b.version == version
+    assert CameraDB.get_camera(1) is camera
+    assert camera.is_online is False
+
+
+@pytest.fixture
+def sensor_table():
+    """Fresh shared-memory sensor table attached to SensorDB."""
+    import uuid
+
+    from backend.common.sensor_state import SensorStateTable
+
+    table = SensorStateTable(f"safehome-test-{uuid.uuid4().hex[:8]}")
+    SensorDB.use_state_table(table)
+    yield table
+    SensorDB.use_state_table(None)
+    for sensor in SensorDB.get_all_motion_sensors():
+        sensor.is_armed = sensor.is_triggered = False
+    table.close()
+    table.unlink()
+
+
+def test_sensor_state_table_seeds_and_publishes(sensor_table):
+    """Test that SensorDB seeds the table and writes updates through."""
+    from backend.common.sensor_state import SensorFlags
+
+    assert sensor_table.read("windoor", 3) == SensorFlags(False, False, False)
+    assert sensor_table.read("windoor", 99) is None
+
+    SensorDB.update_motion_sensor(2, is_armed=True)
+    assert sensor_table.read("motion", 2) == SensorFlags(True, False, False)
+
+
+def test_sensor_state_table_shared_across_processes(sensor_table):
+    """Test that a write from another process is seen by SensorDB."""
+    import subprocess
+    import sys
+
+    code = (
+        "from backend.common.sensor_state import SensorFlags, SensorStateTable\n"
+        f"table = SensorStateTable({sensor_table.name!r})\n"
+        "table.write('motion', 1, SensorFlags(True, True, False))\n"
+        "table.close()\n"
+    )
+    subprocess.run([sys.executable, "-c", code], check=True)
+
+    sensor = SensorDB.get_motion_sensor(1)
+    assert sensor.is_armed is True
+    assert sensor.is_triggered is True
+
+    response = client.get("/surveillance/sensors/motion/1/status")
+    assert response.json()["is_triggered"] is True
+
+
+def test_sensor_state_table_update_keeps_other_flags(sensor_table):
+    """Test that concurrent updates of different flags are not lost."""
+    import subprocess
+    import sys
+
+    from backend.common.sensor_state import SensorFlags
+
+    assert sensor_table.update("motion", 99, is_armed=True) is None
+    assert sensor_table.update("motion", 2, is_triggered=True) == SensorFlags(
+        False, True, False
+    )
+
+    # The other process toggles is_armed and counts how often its own
+    # write was overwritten while SensorDB keeps updating is_triggered.
+    code = (
+        "from backend.common.sensor_state import SensorStateTable\n"
+        f"table = SensorStateTable({sensor_table.name!r})\n"
+        "print('ready', flush=True)\n"
+        "lost = 0\n"
+        "for i in range(3000):\n"
+        "    table.update('motion', 1, is_armed=i % 2 == 1)\n"
+        "    lost += table.read('motion', 1).is_armed != (i % 2 == 1)\n"
+        "print(lost)\n"
+        "table.close()\n"
+    )
+    other = subprocess.Popen(
+        [sys.executable, "-c", code], stdout=subprocess.PIPE, text=True
+    )
+    other.stdout.readline()
+    while other.poll() is None:
+        SensorDB.update_motion_sensor(1, is_triggered=True)
+    assert other.returncode == 0
+    assert other.stdout.read().strip() == "0"
+    assert sensor_table.read("motion", 1) == SensorFlags(True, True, False)
+
+
+def test_sensor_state_table_reader_waits_for_writer(sensor_table):
+    """Test that a reader never returns a row while its writer is active."""
+    import threading
+
+    from backend.common.sensor_state import _SEQ, SensorFlags
+
+    sensor_table.write("motion", 1, SensorFlags(False, False, False))
+    # Simulate a writer that has started but not finished updating the row
+    (seq,) = _SEQ.unpack_from(sensor_table._shm.buf, 0)
+    _SEQ.pack_into(sensor_table._shm.buf, 0, seq + 1)
+
+    result = []
+    reader = threading.Thread(
+        target=lambda: result.append(sensor_table.read("motion", 1))
+    )
+    reader.start()
+    reader.join(timeout=0.2)
+    assert reader.is_alive()
+
+    _SEQ.pack_into(sensor_table._shm.buf, 0, seq + 2)
+    reader.join(timeout=5)
+    assert result == [SensorFlags(False, False, False)]
+
+
+def test_sensor_updates_from_many_threads(sensor_table):
+    """Test that concurrent updates of different flags are not lost."""
+    from concurrent.futures import ThreadPoolExecutor
+
+    from backend.common.sensor_state import SensorFlags
+
+    def update(flag):
+        for _ in range(200):
+            SensorDB.update_motion_sensor(1, **{flag: False})
+            SensorDB.update_motion_sensor(1, **{flag: True})
+
+    with ThreadPoolExecutor(2) as executor:
+        list(executor.map(update, ["is_armed", "is_triggered"]))
+    assert sensor_table.read("motion", 1) == SensorFlags(True, True, False)
+
+
+def test_alarm_events_from_many_threads():
+    """Test that alarm events added concurrently get unique IDs."""
+    from concurrent.futures import ThreadPoolExecutor
+
+    from backend.common.device import AlarmType
+
+    user = UserDB.find_user_by_id("homeowner1")
+    saved_events = list(user.alarm_events)
+    start = len(saved_events)
+
+    def add(_):
+        return [
+            user.add_alarm_event(AlarmType.PANIC, None, "Home", "test").id
+            for _ in range(200)
+        ]
+
+    try:
+        with ThreadPoolExecutor(8) as executor:
+            ids = [i for batch in executor.map(add, range(8)) for i in batch]
+        expected = list(range(start + 1, start + 1601))
+        assert sorted(ids) == expected
+        assert [e.id for e in user.alarm_events[start:]] == expected
+    finally:
+        user.alarm_events[:] = saved_events
+
+
+def test_static_asset_cache_headers():
+    """Test that assets are served with an ETag and caching headers."""
+    with open(os.path.join(ASSET_DIR, "camera1.jpg"), "rb") as f:
+        data = f.read()
+
+    response = client.get("/static/camera1.jpg")
+    assert response.status_code == 200
+    assert response.content == data
+    assert response.headers["content-type"] == "image/jpeg"
+    assert response.headers["cache-control"] == "public, max-age=3600"
+    assert response.headers["accept-ranges"] == "bytes"
+    assert response.headers["etag"].startswith('"')
+    assert "last-modified" in response.headers
+
+    head = client.head("/static/camera1.jpg")
+    assert head.status_code == 200
+    assert head.content == b""
+    assert head.headers["content-length"] == str(len(data))
+    assert head.headers["etag"] == response.headers["etag"]
+
+
+def test_static_asset_not_modified():
+    """Test that a matching If-None-Match is answered with 304."""
+    etag = client.get("/static/floorplan.png").headers["etag"]
+
+    response = client.get("/static/floorplan.png", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.content == b""
+    assert response.headers["etag"] == etag
+
+    response = client.get("/static/floorplan.png", headers={"If-None-Match": '"stale"'})
+    assert response.status_code == 200
+
+
+def test_static_asset_ranges():
+    """Test single byte ranges, suffix ranges and If-Range."""
+    with open(os.path.join(ASSET_DIR, "camera2.jpg"), "rb") as f:
+        data = f.read()
+    size = len(data)
+
+    response = client.get("/static/camera2.jpg", headers={"Range": "bytes=0-99"})
+    assert response.status_code == 206
+    assert response.content == data[:100]
+    assert response.headers["content-range"] == f"bytes 0-99/{size}"
+
+    response = client.get("/static/camera2.jpg", headers={"Range": "bytes=-10"})
+    assert response.status_code == 206
+    assert response.content == data[-10:]
+
+    response = client.get(
+        "/static/camera2.jpg", headers={"Range": f"bytes={size - 5}-{size + 100}"}
+    )
+    assert response.content == data[-5:]
+
+    response = client.get("/static/camera2.jpg", headers={"Range": f"bytes={size}-"})
+    assert response.status_code == 416
+    assert response.headers["content-range"] == f"bytes */{size}"
+
+    # Stale If-Range and unsupported range specs fall back to the whole file
+    response = client.get(
+        "/static/camera2.jpg",
+        headers={"Range": "bytes=0-99", "If-Range": '"stale"'},
+    )
+    assert response.status_code == 200
+    assert response.content == data
+    response = client.get("/static/camera2.jpg", headers={"Range": "bytes=0-1,5-9"})
+    assert response.status_code == 200
+
+
+def test_static_asset_unknown_name():
+    """Test that only the listed assets are served."""
+    assert client.get("/static/README.md").status_code == 404
+    assert client.get("/static/backend%2Fapp.py").status_code == 404
+    assert client.get("/static/camera9.jpg").status_code == 404
+
+
+def test_static_asset_gzip_variant(tmp_path, monkeypatch):
+    """Test that a compressible asset is sent gzipped when accepted."""
+    from backend.common import assets
+
+    (tmp_path / "plan.svg").write_text("<svg>" + " " * 10000 + "</svg>")
+    (tmp_path / "photo.jpg").write_bytes(os.urandom(4096))
+    monkeypatch.setattr(
+        assets, "asset_store", assets.AssetStore(tmp_path, ["plan.svg", "photo.jpg"])
+    )
+
+    response = client.get("/static/plan.svg", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.headers["vary"] == "Accept-Encoding"
+    assert int(response.headers["content-length"]) < 1000
+    gzip_etag = response.headers["etag"]
+
+    response = client.get("/static/plan.svg", headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in response.headers
+    assert response.headers["etag"] != gzip_etag
+    assert len(response.content) == 10011
+
+    # A 304 carries the ETag of the variant being revalidated
+    identity_etag = response.headers["etag"]
+    for etag, encoding in ((gzip_etag, "gzip"), (identity_etag, "identity")):
+        response = client.get(
+            "/static/plan.svg",
+            headers={"If-None-Match": etag, "Accept-Encoding": encoding},
+        )
+        assert response.status_code == 304
+        assert response.headers["etag"] == etag
+    response = client.get(
+        "/static/plan.svg",
+        headers={
+            "If-None-Match": f"{identity_etag}, {gzip_etag}",
+            "Accept-Encoding": "gzip",
+        },
+    )
+    assert response.headers["etag"] == gzip_etag
+
+    # Incompressible content is never sent gzipped
+    response = client.get("/static/photo.jpg", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in response.headers
+    assert "vary" not in response.headers
+    assert assets.asset_store.get("photo.jpg").gzip_data is None
+
+
+def test_static_asset_gzip_q_values(tmp_path, monkeypatch):
+    """Test that Accept-Encoding q-values can refuse gzip."""
+    from backend.common import assets
+
+    assert assets._accepts_gzip("gzip, deflate, br")
+    assert assets._accepts_gzip("deflate;q=1.0, GZIP;q=0.5")
+    assert assets._accepts_gzip("*")
+    assert not assets._accepts_gzip("gzip;q=0")
+    assert not assets._accepts_gzip("gzip;q=0.000, *")
+    assert not assets._accepts_gzip("*;q=0")
+    assert not assets._accepts_gzip("identity, br")
+    assert not assets._accepts_gzip("")
+
+    (tmp_path / "plan.svg").write_text("<svg>" + " " * 10000 + "</svg>")
+    monkeypatch.setattr(
+        assets, "asset_store", assets.AssetStore(tmp_path, ["plan.svg"])
+    )
+    response = client.get("/static/plan.svg", headers={"Accept-Encoding": "gzip;q=0"})
+    assert "content-encoding" not in response.headers
+    assert len(response.content) == 10011
+
+
+def test_static_asset_reloaded_when_changed(tmp_path, monkeypatch):
+    """Test that a replaced file gets a new ETag."""
+    from backend.common import assets
+
+    path = tmp_path / "camera1.jpg"
+    path.write_bytes(b"first")
+    monkeypatch.setattr(assets, "asset_store", assets.AssetStore(tmp_path))
+
+    first = client.get("/static/camera1.jpg")
+    path.write_bytes(b"second!")
+    second = client.get("/static/camera1.jpg")
+    assert second.content == b"second!"
+    assert second.headers["etag"] != first.headers["etag"]
+
+
+def test_static_asset_preload():
+    """Test that preloading reads every asset once."""
+    from backend.common import assets
+
+    store = assets.AssetStore(ASSET_DIR)
+    store.preload()
+    assert set(store._assets) == set(assets.ASSET_NAMES)
@@ -1,5 +1,7 @@
 """Tests for the security use cases."""
 
+import asyncio
+
 import pytest
 from fastapi import HTTPException
 from fastapi.testclient import TestClient
@@ -708,7 +710,7 @@ def test_alarm_condition_encountered(test_user):
         location="거실",
         description="Test alarm",
     )
-    result = alarm_condition_encountered(req)
+    result = asyncio.run(alarm_condition_encountered(req))
     assert "event_id" in result
     assert "message" in result
     assert "actions_taken" in result
@@ -727,7 +729,7 @@ def test_alarm_condition_encountered_invalid_user(test_user):
         description="Test alarm",
     )
     with pytest.raises(HTTPException) as exc_info:
-        alarm_condition_encountered(req)
+        asyncio.run(alarm_condition_encountered(req))
     assert exc_info.value.status_code == 401
     assert exc_info.value.detail == "Invalid user ID"
 
@@ -745,7 +747,7 @@ def test_alarm_condition_encountered_invalid_device(test_user):
         description="Test alarm",
     )
     with pytest.raises(HTTPException) as exc_info:
-        alarm_condition_encountered(req)
+        asyncio.run(alarm_condition_encountered(req))
     assert exc_info.value.status_code == 400
     assert exc_info.value.detail == "Device not found"
 
@@ -758,7 +760,7 @@ def test_view_intrusion_log(test_user):
     req = ViewLogRequest(
         user_id=test_user.user_id, start_date=None, end_date=None, alarm_type=None
     )
-    result = view_intrusion_log(req)
+    result = asyncio.run(view_intrusion_log(req))
     assert "total_events" in result
     assert "events" in result
 
@@ -773,7 +775,7 @@ def test_view_intrusion_log_empty(test_user):
     )
     # test_user의 alarm_events를 비웁니다
     test_user.alarm_events.clear()
-    result = view_intrusion_log(req)
+    result = asyncio.run(view_intrusion_log(req))
     assert result["total_events"] == 0
     assert result["events"] == []
 
@@ -784,7 +786,7 @@ def test_panic_call_monitoring_service(test_user):
     from backend.security.security import panic_call_monitoring_service
 
     req = PanicRequest(user_id=test_user.user_id, location="거실")
-    result = panic_call_monitoring_service(req)
+    result = asyncio.run(panic_call_monitoring_service(req))
     assert "event_id" in result
     assert "message" in result
     assert "actions_taken" in result
@@ -795,7 +797,7 @@ def test_configure_safety_zone_interface(test_user):
     """Test configure_safety_zone_interface 정상 동작."""
     from backend.security.security import configure_safety_zone_interface
 
-    result = configure_safety_zone_interface(test_user.user_id)
+    result = asyncio.run(configure_safety_zone_interface(test_user.user_id))
     assert "message" in result
     assert "available_functions" in result
     assert "existing_safety_zones" in result
@@ -817,7 +819,7 @@ def test_configure_safehome_modes(test_user):
         mode_type=SafeHomeModeType.AWAY,
         enabled_device_ids=[1, 2],
     )
-    response = configure_safehome_modes(req)
+    response = asyncio.run(configure_safehome_modes(req))
     assert response["message"] == "SafeHome mode away configured successfully"
 
 
@@ -835,7 +837,7 @@ def test_configure_safehome_modes_invalid_device(test_user):
         enabled_device_ids=[999],  # 없는 device
     )
     with pytest.raises(HTTPException) as exc_info:
-        configure_safehome_modes(req)
+        asyncio.run(configure_safehome_modes(req))
     assert exc_info.value.status_code == 400
     assert "Device with id" in exc_info.value.detail
 
@@ -852,7 +854,7 @@ def test_configure_safehome_modes_invalid_user():
         user_id="invalid_user", mode_type=SafeHomeModeType.AWAY, enabled_device_ids=[]
     )
     with pytest.raises(HTTPException) as exc_info:
-        configure_safehome_modes(req)
+        asyncio.run(configure_safehome_modes(req))
     assert exc_info.value.status_code == 401
     assert exc_info.value.detail == "Invalid user ID"
 
@@ -867,7 +869,7 @@ def test_set_safehome_mode_not_configured(test_user):
 
     req = SetModeRequest(user_id=test_user.user_id, mode_type=SafeHomeModeType.AWAY)
     with pytest.raises(HTTPException) as exc_info:
-        set_safehome_mode(req)
+        asyncio.run(set_safehome_mode(req))
     assert exc_info.value.status_code == 400
     assert exc_info.value.detail == "Mode not configured"
 
@@ -887,7 +889,7 @@ def test_set_safehome_mode_doors_windows_open(test_user):
     test_user.doors_windows_closed = False
     req = SetModeRequest(user_id=test_user.user_id, mode_type=SafeHomeModeType.AWAY)
     with pytest.raises(HTTPException) as exc_info:
-        set_safehome_mode(req)
+        asyncio.run(set_safehome_mode(req))
     assert exc_info.value.status_code == 400
     assert exc_info.value.detail == "doors and windows not closed"
 
@@ -919,7 +921,7 @@ def test_view_intrusion_log_filter_by_date_and_type(test_user):
         end_date=datetime.datetime(2025, 11, 28, 11, 0, 0),
         alarm_type=AlarmType.INTRUSION,
     )
-    result = view_intrusion_log(req)
+    result = asyncio.run(view_intrusion_log(req))
     assert result["total_events"] == 1
     assert result["events"][0]["alarm_type"] == "intrusion"
 
@@ -933,7 +935,7 @@ def test_panic_call_monitoring_service_invalid_user():
 
     req = PanicRequest(user_id="invalid_user", location="거실")
     with pytest.raises(HTTPException) as exc_info:
-        panic_call_monitoring_service(req)
+        asyncio.run(panic_call_monitoring_service(req))
     assert exc_info.value.status_code == 401
     assert exc_info.value.detail == "Invalid user ID"
 
@@ -945,7 +947,7 @@ def test_get_safehome_modes_invalid_user():
     from backend.security.security import get_safehome_modes
 
     with pytest.raises(HTTPException) as exc_info:
-        get_safehome_modes("invalid_user")
+        asyncio.run(get_safehome_modes("invalid_user"))
     assert exc_info.value.status_code == 401
     assert exc_info.value.detail == "Invalid user ID"
 
@@ -960,7 +962,7 @@ def test_set_safehome_mode_invalid_user():
 
     req = SetModeRequest(user_id="invalid_user", mode_type=SafeHomeModeType.AWAY)
     with pytest.raises(HTTPException) as exc_info:
-        set_safehome_mode(req)
+        asyncio.run(set_safehome_mode(req))
     assert exc_info.value.status_code == 401
     assert exc_info.value.detail == "Invalid user ID"
 
@@ -976,7 +978,7 @@ def test_view_intrusion_log_invalid_user():
         user_id="invalid_user", start_date=None, end_date=None, alarm_type=None
     )
     with pytest.raises(HTTPException) as exc_info:
-        view_intrusion_log(req)
+        asyncio.run(view_intrusion_log(req))
     assert exc_info.value.status_code == 401
     assert exc_info.value.detail == "Invalid user ID"
 
@@ -988,7 +990,7 @@ def test_configure_safety_zone_interface_invalid_user():
     from backend.security.security import configure_safety_zone_interface
 
     with pytest.raises(HTTPException) as exc_info:
-        configure_safety_zone_interface("invalid_user")
+        asyncio.run(configure_safety_zone_interface("invalid_user"))
     assert exc_info.value.status_code == 401
     assert exc_info.value.detail == "Invalid user ID"
 
@@ -1005,7 +1007,7 @@ def test_get_safehome_modes_multiple_modes(test_user):
     test_user.safehome_modes[SafeHomeModeType.HOME] = SafeHomeMode(
         mode_type=SafeHomeModeType.HOME, enabled_device_ids=[2, 3]
     )
-    result = get_safehome_modes(test_user.user_id)
+    result = asyncio.run(get_safehome_modes(test_user.user_id))
     assert "modes_configuration" in result
     assert set(result["modes_configuration"].keys()) == {"away", "home"}
     assert result["modes_configuration"]["away"]["enabled_device_ids"] == [1]
@@ -1024,7 +1026,7 @@ def test_set_safehome_mode_multiple_devices(test_user):
     )
     test_user.doors_windows_closed = True
     req = SetModeRequest(user_id=test_user.user_id, mode_type=SafeHomeModeType.AWAY)
-    result = set_safehome_mode(req)
+    result = asyncio.run(set_safehome_mode(req))
     assert result["current_mode"] == "away"
     assert set(result["armed_devices"]) == {1, 2, 3}
     # Only check that the devices with IDs [1, 2, 3] are armed
@@ -1047,7 +1049,7 @@ def test_configure_safety_zone_interface_multiple_zones_devices(test_user):
         is_armed=False,
     )
     test_user.safety_zones = [zone1, zone2]
-    result = configure_safety_zone_interface(test_user.user_id)
+    result = asyncio.run(configure_safety_zone_interface(test_user.user_id))
     assert "existing_safety_zones" in result
     assert len(result["existing_safety_zones"]) == 2
     assert set([z["name"] for z in result["existing_safety_zones"]]) == {"거실", "침실"}
@@ -3,10 +3,12 @@
 import sys
 from pathlib import Path
 
+import pytest
 from fastapi.testclient import TestClient
 
 from backend.app import app
 from backend.common.device import CameraDB, SensorDB
+from backend.surveillance.warmup import WarmupProgress
 
 # Add project root to Python path
 project_root = Path(__file__).parent.parent.parent.parent
@@ -40,6 +42,53 @@ class TestCameraList:
         for field in required_fields:
             assert field in camera
 
+    def test_list_cameras_reads_probed_health(self):
+        """Test that listing shows probe results without touching cameras."""
+        import asyncio
+        import unittest.mock as mock
+
+        from backend.surveillance import surveillance
+
+        def source(camera_id):
+            return None if camera_id == 2 else object()
+
+        try:
+            with mock.patch("device.device_camera.preload_source", source):
+                health = asyncio.run(surveillance.probe_cameras())
+            assert health == {1: True, 2: False, 3: True}
+
+            with mock.patch.object(surveillance, "get_or_create_camera") as create:
+                data = client.get("/surveillance/cameras").json()
+            create.assert_not_called()
+            online = {c["camera_id"]: c["is_online"] for c in data["cameras"]}
+            assert online == health
+        finally:
+            for camera_id in (1, 2, 3):
+                CameraDB.update_camera(camera_id, is_online=True)
+
+    def test_slow_probe_marks_camera_offline(self):
+        """Test that probes run concurrently and time out."""
+        import asyncio
+        import time
+        import unittest.mock as mock
+
+        from backend.surveillance import surveillance
+
+        def probe(camera_id):
+            time.sleep(0.5 if camera_id == 3 else 0.2)
+            return True
+
+        try:
+            with mock.patch.object(surveillance, "probe_camera", probe):
+                start = time.perf_counter()
+                health = asyncio.run(surveillance.probe_cameras(timeout=0.4))
+                elapsed = time.perf_counter() - start
+            assert health == {1: True, 2: True, 3: False}
+            assert elapsed < 0.6  # Not 0.2 + 0.2 + 0.4
+            assert CameraDB.get_camera(3).is_online is False
+        finally:
+            CameraDB.update_camera(3, is_online=True)
+
 
 class TestCameraView:
     """Test camera view endpoints."""
@@ -117,6 +166,487 @@ class TestCameraView:
             assert "Failed to get camera view" in response.json()["detail"]
 
 
+class TestCameraFrame:
+    """Test the rendered camera frame endpoint."""
+
+    def test_get_camera_frame(self):
+        """Test that the frame is an encoded image with the view state."""
+        from io import BytesIO
+
+        from PIL import Image
+
+        response = client.get("/surveillance/cameras/1/frame", params={"size": 200})
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "image/jpeg"
+        assert response.headers["cache-control"] == "no-store"
+        assert "x-camera-pan" in response.headers
+        assert "x-camera-zoom" in response.headers
+
+        img = Image.open(BytesIO(response.content))
+        assert img.format == "JPEG"
+        assert img.size == (200, 200)
+
+    def test_get_camera_frame_webp(self):
+        """Test requesting a WebP frame."""
+        response = client.get(
+            "/surveillance/cameras/1/frame", params={"format": "webp"}
+        )
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "image/webp"
+
+    def test_get_camera_frame_checks_access(self):
+        """Test that frames obey the same checks as the view."""
+        assert client.get("/surveillance/cameras/3/frame").status_code == 400
+        assert client.get("/surveillance/cameras/999/frame").status_code == 404
+
+        CameraDB.update_camera(1, has_password=True, password="correctpass")
+        try:
+            response = client.get("/surveillance/cameras/1/frame")
+            assert response.status_code == 401
+            response = client.get(
+                "/surveillance/cameras/1/frame", params={"password": "correctpass"}
+            )
+            assert response.status_code == 200
+        finally:
+            CameraDB.update_camera(1, has_password=False, password=None)
+
+    def test_get_camera_frame_invalid_params(self):
+        """Test that out-of-range parameters are rejected."""
+        url = "/surveillance/cameras/1/frame"
+        assert client.get(url, params={"format": "png"}).status_code == 422
+        assert client.get(url, params={"quality": 0}).status_code == 422
+        assert client.get(url, params={"tier": "best"}).status_code == 422
+
+    def test_get_camera_frame_quality_tier(self):
+        """Test rendering a preview frame straight to a non-square size."""
+        from io import BytesIO
+
+        from PIL import Image
+
+        for tier in ("fast", "preview", "full"):
+            response = client.get(
+                "/surveillance/cameras/1/frame",
+                params={"size": 320, "height": 240, "tier": tier},
+            )
+            assert response.status_code == 200
+            assert Image.open(BytesIO(response.content)).size == (320, 240)
+
+    def test_repeated_frame_is_cached(self):
+        """Test that the same frame is only rendered once."""
+        from backend.surveillance.frames import frame_cache
+
+        frame_cache.clear()
+        params = {"size": 120}
+        first = client.get("/surveillance/cameras/1/frame", params=params)
+        second = client.get("/surveillance/cameras/1/frame", params=params)
+        assert first.status_code == second.status_code == 200
+        if first.headers["x-camera-time"] == second.headers["x-camera-time"]:
+            assert second.content == first.content
+            assert frame_cache.hits == 1
+        assert frame_cache.misses >= 1
+
+    def test_concurrent_misses_share_one_render(self):
+        """Test single-flight: concurrent misses wait for one render."""
+        import asyncio
+        import threading
+
+        from backend.surveillance.frames import FrameCache
+
+        cache = FrameCache(max_entries=2, workers=2)
+        release = threading.Event()
+        calls = []
+
+        def render():
+            calls.append(1)
+            release.wait(5)
+            return b"frame"
+
+        async def view_many():
+            waiters = [asyncio.create_task(cache.get("k", render)) for _ in range(5)]
+            await asyncio.sleep(0.05)
+            release.set()
+            return await asyncio.gather(*waiters)
+
+        assert asyncio.run(view_many()) == [b"frame"] * 5
+        assert len(calls) == 1
+        assert (cache.hits, cache.misses) == (0, 1)
+
+    def test_cache_evicts_least_recently_used(self):
+        """Test that the cache keeps at most max_entries frames."""
+        import asyncio
+
+        from backend.surveillance.frames import FrameCache
+
+        cache = FrameCache(max_entries=2, workers=1)
+
+        async def fill():
+            for key in ("a", "b", "a", "c"):
+                await cache.get(key, lambda k=key: k.encode())
+
+        asyncio.run(fill())
+        assert list(cache._entries) == ["a", "c"]
+
+
+class TestCameraMosaic:
+    """Test the multi-camera mosaic endpoint."""
+
+    def test_layout(self):
+        """Test that tiles fill a near-square grid."""
+        from backend.surveillance.mosaic import mosaic_layout
+
+        assert mosaic_layout(1, 640, 480) == ((640, 480), [(0, 0)])
+        tile_size, positions = mosaic_layout(3, 640, 480)
+        assert tile_size == (320, 240)
+        assert positions == [(0, 0), (320, 0), (0, 240)]
+        tile_size, positions = mosaic_layout(5, 900, 600)
+        assert tile_size == (300, 300)
+        assert positions[-1] == (300, 300)
+
+    def test_mosaic_shows_viewable_cameras(self):
+        """Test that only enabled cameras without a password are shown."""
+        import unittest.mock as mock
+        from io import BytesIO
+
+        from PIL import Image
+
+        from device.device_camera import DeviceCamera
+
+        client.post("/surveillance/cameras/1/enable")
+        response = client.get(
+            "/surveillance/mosaic", params={"width": 320, "height": 120}
+        )
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "image/jpeg"
+        # Camera 2 has a password and camera 3 is disabled
+        assert response.headers["x-mosaic-cameras"] == "1"
+        assert Image.open(BytesIO(response.content)).size == (320, 120)
+
+        CameraDB.update_camera(3, is_enabled=True)
+        try:
+            with mock.patch.object(
+                DeviceCamera, "get_view_state", return_value=(0, 2, 7)
+            ):
+                response = client.get(
+                    "/surveillance/mosaic",
+                    params={"width": 320, "height": 120, "format": "webp"},
+                )
+        finally:
+            CameraDB.update_camera(3, is_enabled=False)
+        assert response.headers["x-mosaic-cameras"] == "1,3"
+        img = Image.open(BytesIO(response.content))
+        assert img.format == "WEBP"
+        assert img.size == (320, 120)
+
+    def test_tiles_are_shared(self):
+        """Test that tiles are camera frames shared through the frame cache."""
+        import unittest.mock as mock
+
+        from backend.surveillance.mosaic import TILE_QUALITY
+        from backend.surveillance.surveillance import frame_cache
+        from device.device_camera import DeviceCamera
+
+        client.post("/surveillance/cameras/1/enable")
+        frame_cache.clear()
+        params = {"width": 200, "height": 100, "tier": "fast"}
+        with mock.patch.object(DeviceCamera, "get_view_state", return_value=(1, 3, 5)):
+            first = client.get("/surveillance/mosaic", params=params)
+            second = client.get(
+                "/surveillance/mosaic", params={**params, "quality": 50}
+            )
+            # The only tile is camera 1's 200x100 frame
+            frame = client.get(
+                "/surveillance/cameras/1/frame",
+                params={
+                    "size": 200,
+                    "height": 100,
+                    "quality": TILE_QUALITY,
+                    "tier": "fast",
+                },
+            )
+        assert first.status_code == second.status_code == frame.status_code == 200
+        # One tile and two mosaics rendered; the tile reused twice
+        assert (frame_cache.misses, frame_cache.hits) == (3, 2)
+
+    def test_no_viewable_cameras(self):
+        """Test the mosaic without any camera to show."""
+        client.post("/surveillance/cameras/1/disable")
+        try:
+            response = client.get("/surveillance/mosaic")
+        finally:
+            client.post("/surveillance/cameras/1/enable")
+        assert response.status_code == 404
+        assert response.json()["detail"] == "No cameras to show"
+
+    def test_mosaic_render_failure(self):
+        """Test that a failing tile is reported as a server error."""
+        import unittest.mock as mock
+
+        with mock.patch(
+            "backend.surveillance.surveillance.get_or_create_camera",
+            side_effect=Exception("Camera offline"),
+        ):
+            response = client.get("/surveillance/mosaic")
+        assert response.status_code == 500
+        assert "Failed to render camera mosaic" in response.json()["detail"]
+
+
+class _FakeCamera:
+    """Camera whose view is a settable grayscale frame."""
+
+    def __init__(self, size=(64, 48)):
+        import numpy as np
+
+        self.pan, self.zoom = 0, 2
+        self.frame = np.full(size[::-1], 100, dtype=np.uint8)
+
+    def get_view_state(self):
+        return self.pan, self.zoom, 0
+
+    def render_view(self, pan, zoom, current_time, size, quality, caption=True):
+        from PIL import Image
+
+        assert not caption
+        return Image.fromarray(self.frame).convert("RGB").resize(size)
+
+
+class TestMotionDetection:
+    """Test frame-difference motion detection."""
+
+    def test_motion_in_region(self):
+        """Test that only the region with enough changed pixels reports."""
+        from backend.surveillance.motion import MotionDetector, Region
+
+        detector = MotionDetector(cooldown=10)
+        camera = _FakeCamera()
+        detector.set_regions(
+            1,
+            [
+                Region("left", (0.0, 0.0, 0.5, 1.0), 0.1),
+                Region("right", (0.5, 0.0, 1.0, 1.0), 0.1),
+            ],
+        )
+        assert detector.process({1: camera}) == []  # First sample
+
+        camera.frame[:, 40:] = 200  # Right three quarters of the right half
+        events = detector.detect({1: detector.sample(camera)}, now=100.0)
+        assert [(e.camera_id, e.region) for e in events] == [(1, "right")]
+        assert events[0].changed == pytest.approx(0.75)
+
+        # Still changing, but within the cooldown
+        camera.frame[:, 40:] = 100
+        assert detector.detect({1: detector.sample(camera)}, now=105.0) == []
+        camera.frame[:, 40:] = 200
+        events = detector.detect({1: detector.sample(camera)}, now=111.0)
+        assert [e.region for e in events] == ["right"]
+
+    def test_small_changes_are_ignored(self):
+        """Test the pixel and region thresholds."""
+        from backend.surveillance.motion import MotionDetector
+
+        detector = MotionDetector(pixel_threshold=25, cooldown=0)
+        camera = _FakeCamera()
+        detector.process({1: camera})
+        camera.frame[:] = 120  # Every pixel, but below the pixel threshold
+        assert detector.process({1: camera}) == []
+        camera.frame[:2, :2] = 255  # Above it, but too few pixels
+        assert detector.process({1: camera}) == []
+
+    def test_ptz_move_resets_reference(self):
+        """Test that a moved view is not reported as motion."""
+        from backend.surveillance.motion import MotionDetector
+
+        detector = MotionDetector(cooldown=0)
+        camera = _FakeCamera()
+        detector.process({1: camera})
+        camera.pan = 3
+        camera.frame[:] = 255
+        assert detector.process({1: camera}) == []
+        camera.frame[:] = 0
+        assert len(detector.process({1: camera})) == 1
+
+    def test_cameras_are_batched(self):
+        """Test many cameras with their own regions in one detection."""
+        from backend.surveillance.motion import MotionDetector, Region
+
+        detector = MotionDetector(cooldown=0)
+        cameras = {camera_id: _FakeCamera() for camera_id in range(1, 25)}
+        for camera_id in range(1, 25, 2):
+            detector.set_regions(camera_id, [Region("top", (0, 0, 1, 0.5))])
+        detector.set_regions(24, [])
+        detector.process(cameras)
+
+        for camera in cameras.values():
+            camera.frame[30:, :] = 0  # Bottom part of every view
+        events = detector.process(cameras)
+        # Cameras with the default whole-view region, except the disabled one
+        assert sorted(e.camera_id for e in events) == list(range(2, 24, 2))
+        assert {e.region for e in events} == {"view"}
+
+    def test_invalid_region(self):
+        """Test that a region must lie inside the view."""
+        from backend.surveillance.motion import MotionDetector, Region
+
+        with pytest.raises(ValueError):
+            MotionDetector().set_regions(1, [Region("bad", (0.5, 0, 0.2, 1))])
+
+    def test_motion_raises_detect_alarm(self):
+        """Test that camera motion is logged like a triggered motion sensor."""
+        from backend.common.device import AlarmType
+        from backend.surveillance.motion import MotionEvent
+        from backend.surveillance.surveillance import (
+            get_default_user,
+            record_motion_events,
+        )
+
+        user = get_default_user()
+        before = len(user.alarm_events)
+        record_motion_events([MotionEvent(1, "view", 0.5)])
+
+        assert len(user.alarm_events) == before + 1
+        event = user.alarm_events[-1]
+        assert event.alarm_type == AlarmType.DETECT
+        assert event.device_id == 1
+        assert event.location == CameraDB.get_camera(1).location
+        assert event.description == "Camera 1 detected motion in view (50% changed)"
+
+    def test_static_cameras_show_no_motion(self):
+        """Test the monitor on the real cameras, whose views do not change."""
+        from backend.surveillance.surveillance import (
+            get_or_create_camera,
+            sample_camera_motion,
+        )
+
+        client.post("/surveillance/cameras/1/enable")
+        get_or_create_camera(1)
+        sample_camera_motion()
+        assert sample_camera_motion() == []
+
+    def test_evicted_cameras_stay_monitored(self, monkeypatch):
+        """Test that sampling and recording go on after a camera is evicted."""
+        import asyncio
+        from time import monotonic
+        from unittest import mock
+
+        from backend.surveillance import surveillance
+
+        client.post("/surveillance/cameras/2/enable")
+        surveillance.get_or_create_camera(1)
+        surveillance.get_or_create_camera(2).set_position(pan=3, zoom=4)
+        with surveillance.camera_instances_lock:
+            surveillance.camera_last_used[2] = (
+                monotonic() - surveillance.CAMERA_IDLE_TIMEOUT - 1
+            )
+            monkeypatch.setattr(surveillance, "_last_eviction", 0.0)
+            surveillance._evict_idle_cameras(monotonic())
+        assert 2 not in surveillance.camera_instances
+        last_used = dict(surveillance.camera_last_used)
+
+        async def record_once():
+            task = asyncio.create_task(surveillance.record_camera_frames(0.01))
+            await asyncio.sleep(0.2)
+            task.cancel()
+
+        try:
+            with mock.patch.object(
+                surveillance.motion_detector,
+                "process",
+                wraps=surveillance.motion_detector.process,
+            ) as process:
+                surveillance.sample_camera_motion()
+            sampled = process.call_args.args[0]
+            assert sampled[2].get_view_state()[:2] == (3, 4)
+            asyncio.run(record_once())
+
+            # Monitoring neither reloads the camera nor counts as using it
+            assert 2 not in surveillance.camera_instances
+            assert surveillance.camera_last_used == last_used
+            assert {1, 2} <= set(surveillance.frame_recorder.camera_ids())
+        finally:
+            # Later tests load camera 2 at its default position
+            with surveillance.camera_instances_lock:
+                surveillance.saved_camera_ptz.pop(2, None)
+                surveillance._detached_cameras.pop(2, None)
+
+    def test_background_loops_are_opt_in(self, monkeypatch):
+        """Test that motion detection and recording only run when enabled."""
+        from backend.surveillance.motion import MOTION_ENV
+        from backend.surveillance.surveillance import background_enabled
+
+        monkeypatch.delenv(MOTION_ENV, raising=False)
+        assert not background_enabled(MOTION_ENV)
+        monkeypatch.setenv(MOTION_ENV, "0")
+        assert not background_enabled(MOTION_ENV)
+        monkeypatch.setenv(MOTION_ENV, "1")
+        assert background_enabled(MOTION_ENV)
+
+
+class TestCameraStream:
+    """Test the MJPEG stream endpoint."""
+
+    @staticmethod
+    def _collect(ticks):
+        """Run mjpeg_stream for the given number of ticks and return parts."""
+        import asyncio
+
+        from backend.surveillance import surveillance
+
+        calls = 0
+
+        async def is_disconnected():
+            nonlocal calls
+            calls += 1
+            return calls > ticks
+
+        async def collect():
+            spec = surveillance.FrameSpec(64, 64, 50, "jpeg", "preview")
+            stream = surveillance.mjpeg_stream(
+                1, None, 30.0, spec, is_disconnected=is_disconnected
+            )
+            return [part async for part in stream]
+
+        return asyncio.run(collect())
+
+    def test_stream_checks_access(self):
+        """Test that the stream obeys the same checks as the view."""
+        assert client.get("/surveillance/cameras/3/stream").status_code == 400
+        assert client.get("/surveillance/cameras/999/stream").status_code == 404
+        url = "/surveillance/cameras/1/stream"
+        assert client.get(url, params={"fps": 0}).status_code == 422
+
+    def test_stream_parts_are_jpeg_frames(self):
+        """Test that each part is a complete JPEG with the view state."""
+        parts = self._collect(1)
+        assert len(parts) == 1
+
+        head, body = parts[0].split(b"\r\n\r\n", 1)
+        lines = head.decode().split("\r\n")
+        assert lines[0] == "--frame"
+        headers = dict(line.split(": ", 1) for line in lines[1:])
+        assert headers["Content-Type"] == "image/jpeg"
+        assert "X-Camera-Zoom" in headers
+        assert body.endswith(b"\r\n")
+        assert len(body) - 2 == int(headers["Content-Length"])
+        assert body.startswith(b"\xff\xd8")
+
+    def test_unchanged_frames_are_skipped(self):
+        """Test that ticks showing the same view send nothing."""
+        import unittest.mock as mock
+
+        from device.device_camera import DeviceCamera
+
+        with mock.patch.object(DeviceCamera, "get_view_state", return_value=(0, 2, 7)):
+            parts = self._collect(4)
+        assert len(parts) == 1
+
+    def test_stream_ends_when_camera_disabled(self):
+        """Test that disabling the camera ends the stream."""
+        CameraDB.update_camera(1, is_enabled=False)
+        try:
+            assert self._collect(3) == []
+        finally:
+            CameraDB.update_camera(1, is_enabled=True)
+
+
 class TestPTZControl:
     """Test PTZ (Pan-Tilt-Zoom) control endpoints."""
 
@@ -153,6 +683,53 @@ class TestPTZControl:
         assert "pan_position" in data
         assert "zoom_level" in data
 
+    def test_ptz_clamps_both_axes(self):
+        """Test that an out-of-range move is clamped on both axes at once."""
+        client.post("/surveillance/cameras/1/enable")
+        response = client.post(
+            "/surveillance/cameras/1/ptz", json={"pan": -8, "zoom": 12}
+        )
+        assert response.status_code == 200
+
+        data = response.json()
+        assert data["pan_position"] == -5
+        assert data["zoom_level"] == 9
+        assert not data["success"]
+        assert data["message"] == "Pan limit reached at -5; Zoom limit reached at 9"
+
+        response = client.post(
+            "/surveillance/cameras/1/ptz", json={"pan": 0, "zoom": 2}
+        )
+        assert response.json()["success"]
+
+    def test_device_camera_set_position(self):
+        """Test absolute positioning of a device camera."""
+        import threading
+
+        from device.device_camera import DeviceCamera
+
+        camera = DeviceCamera()
+        assert camera.set_position(3, 7) == (3, 7)
+        assert camera.set_position(zoom=4) == (3, 4)
+        assert camera.set_position(pan=-20) == (-5, 4)
+
+        # Concurrent readers only ever see one of the two complete positions
+        seen = set()
+        stop = threading.Event()
+
+        def read():
+            while not stop.is_set():
+                seen.add(camera.get_view_state()[:2])
+
+        reader = threading.Thread(target=read)
+        reader.start()
+        for _ in range(2000):
+            camera.set_position(-5, 1)
+            camera.set_position(5, 9)
+        stop.set()
+        reader.join()
+        assert seen <= {(-5, 4), (-5, 1), (5, 9)}
+
     def test_ptz_disabled_camera(self):
         """Test PTZ control on disabled camera."""
         response = client.post("/surveillance/cameras/3/ptz", json={"pan": 1})
@@ -166,27 +743,15 @@ class TestPTZControl:
         # Enable camera first
         client.post("/surveillance/cameras/1/enable")
 
-        # Mock camera device to test pan limit reached
+        # Mock camera device that is stuck at its current position
         mock_camera = mock.Mock()
         mock_camera.pan = 5  # At max limit
         mock_camera.zoom = 2
 
-        def mock_pan_right():
-            return False  # Simulate limit reached
-
-        def mock_pan_left():
-            return False  # Simulate limit reached
-
-        def mock_zoom_in():
-            return False  # Simulate limit reached
+        def mock_set_position(pan=None, zoom=None):
+            return mock_camera.pan, mock_camera.zoom  # Simulate limit reached
 
-        def mock_zoom_out():
-            return False  # Simulate limit reached
-
-        mock_camera.pan_right = mock_pan_right
-        mock_camera.pan_left = mock_pan_left
-        mock_camera.zoom_in = mock_zoom_in
-        mock_camera.zoom_out = mock_zoom_out
+        mock_camera.set_position = mock_set_position
 
         with mock.patch(
             "backend.surveillance.surveillance.get_or_create_camera",
@@ -369,6 +934,16 @@ class TestCameraState:
 class TestThumbnails:
     """Test thumbnail retrieval."""
 
+    @pytest.fixture(autouse=True)
+    def thumbnail_store(self, tmp_path, monkeypatch):
+        """Capture thumbnails into a temporary directory."""
+        from backend.surveillance import surveillance
+        from backend.surveillance.thumbnails import ThumbnailStore
+
+        store = ThumbnailStore(str(tmp_path))
+        monkeypatch.setattr(surveillance, "thumbnail_store", store)
+        return store
+
     def test_get_camera_thumbnails(self):
         """Test getting camera thumbnails."""
         response = client.get("/surveillance/cameras/1/thumbnails")
@@ -379,6 +954,266 @@ class TestThumbnails:
         for field in required_fields:
             assert field in data
 
+    def test_thumbnail_is_captured_and_served(self, tmp_path):
+        """Test that a real capture is stored under its content hash."""
+        import hashlib
+        from datetime import datetime, timedelta, timezone
+        from io import BytesIO
+
+        from PIL import Image
+
+        before = datetime.now(timezone.utc).replace(microsecond=0)
+        data = client.get("/surveillance/cameras/1/thumbnails").json()
+        captured_at = datetime.strptime(
+            data["captured_at"], "%Y-%m-%dT%H:%M:%SZ"
+        ).replace(tzinfo=timezone.utc)
+        assert before <= captured_at <= before + timedelta(seconds=5)
+
+        response = client.get(data["image_url"])
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "image/jpeg"
+        assert "immutable" in response.headers["cache-control"]
+        assert Image.open(BytesIO(response.content)).size == (150, 150)
+
+        name = data["image_url"].rsplit("/", 1)[1]
+        assert name == hashlib.sha256(response.content).hexdigest()[:16] + ".jpg"
+        assert (tmp_path / name).read_bytes() == response.content
+
+    def test_recent_thumbnail_is_reused(self, thumbnail_store, monkeypatch):
+        """Test that thumbnails are only recaptured once they are old."""
+        first = client.get("/surveillance/cameras/1/thumbnails").json()
+        second = client.get("/surveillance/cameras/1/thumbnails").json()
+        assert second == first
+
+        monkeypatch.setattr("backend.surveillance.surveillance.THUMBNAIL_MAX_AGE", -1.0)
+        third = client.get("/surveillance/cameras/1/thumbnails").json()
+        assert third["id"] == first["id"] + 1
+
+    def test_unknown_thumbnail_not_found(self):
+        """Test that only stored content-hash names are served."""
+        for name in ("0123456789abcdef.jpg", "..%2Fcamera1.jpg", "camera1.jpg"):
+            response = client.get(f"/surveillance/thumbnails/{name}")
+            assert response.status_code == 404
+
+    def test_prune_removes_old_files(self, thumbnail_store, tmp_path):
+        """Test that old thumbnails are deleted unless kept."""
+        import os
+
+        old = tmp_path / "0000000000000000.jpg"
+        kept = tmp_path / "1111111111111111.jpg"
+        for path in (old, kept):
+            path.write_bytes(b"jpeg")
+            os.utime(path, (0, 0))
+
+        thumbnail_store.prune(3600, keep={kept.name})
+        assert not old.exists()
+        assert kept.exists()
+
+
+class TestAlarmClips:
+    """Test the frame recorder and alarm clip export."""
+
+    @pytest.fixture(autouse=True)
+    def clip_store(self, tmp_path, monkeypatch):
+        """Record into a fresh recorder and store clips in a temp directory."""
+        from backend.surveillance import surveillance
+        from backend.surveillance.recorder import ClipStore, FrameRecorder
+
+        store = ClipStore(str(tmp_path))
+        monkeypatch.setattr(surveillance, "clip_store", store)
+        monkeypatch.setattr(surveillance, "frame_recorder", FrameRecorder())
+        return store
+
+    def test_clip_store_prunes_unlinked_files(self, tmp_path):
+        """Test that saving prunes old clips unless an alarm links to them."""
+        import os
+
+        from backend.surveillance.recorder import ClipStore
+
+        old = tmp_path / "0000000000000000.webp"
+        linked = tmp_path / "1111111111111111.jpg"
+        for path in (old, linked):
+            path.write_bytes(b"clip")
+            os.utime(path, (0, 0))
+
+        store = ClipStore(str(tmp_path), lambda: {linked.name})
+        saved = store.save(b"new clip")
+        assert not old.exists()
+        assert linked.exists()
+        assert (tmp_path / saved).exists()
+
+    def test_linked_clip_files(self):
+        """Test that clips and snapshots of alarm events count as linked."""
+        from backend.common.device import AlarmType
+        from backend.surveillance import surveillance
+        from backend.surveillance.recorder import linked_clip_files
+
+        event = surveillance.get_default_user().add_alarm_event(
+            AlarmType.DETECT, 2, "", "test"
+        )
+        event.clip_urls.append("/surveillance/clips/0000000000000000.webp")
+        event.snapshot_urls.append("/surveillance/clips/1111111111111111.jpg")
+        assert {"0000000000000000.webp", "1111111111111111.jpg"} <= (
+            linked_clip_files()
+        )
+
+    @staticmethod
+    def _jpeg(shade: int) -> bytes:
+        from io import BytesIO
+
+        from PIL import Image
+
+        buf = BytesIO()
+        Image.new("RGB", (32, 24), (shade, shade, shade)).save(buf, "JPEG")
+        return buf.getvalue()
+
+    def test_oldest_frames_are_evicted_across_cameras(self):
+        """Test the memory cap evicting the oldest frame of any camera."""
+        from backend.surveillance.recorder import FrameRecorder
+
+        recorder = FrameRecorder(max_bytes=30, max_age=100)
+        recorder.add(1, b"a" * 10, now=1.0)
+        recorder.add(2, b"b" * 10, now=2.0)
+        recorder.add(1, b"c" * 10, now=3.0)
+        recorder.add(2, b"d" * 10, now=4.0)
+
+        assert recorder.total_bytes == 30
+        assert recorder.evicted == 1
+        assert [f.data for f in recorder.frames(1, 0, 10)] == [b"c" * 10]
+        assert [f.data for f in recorder.frames(2, 0, 10)] == [b"b" * 10, b"d" * 10]
+
+        recorder.add(3, b"e" * 25, now=5.0)  # Leaves only the newest frames
+        assert recorder.camera_ids() == [3]
+        assert recorder.total_bytes == 25
+
+    def test_old_frames_are_trimmed(self):
+        """Test that a ring only keeps max_age seconds."""
+        from backend.surveillance.recorder import FrameRecorder
+
+        recorder = FrameRecorder(max_age=5)
+        frame = b"jpeg"
+        for now in range(10):
+            recorder.add(1, frame, now=float(now))
+        frames = recorder.frames(1, 0, 100)
+        assert [f.recorded_at for f in frames] == [4.0, 5.0, 6.0, 7.0, 8.0, 9.0]
+        assert frames[0].data is frame  # Kept without copying
+        assert recorder.total_bytes == 6 * len(frame)
+
+    def test_encode_clip(self):
+        """Test that a clip is an animated WebP of the frames."""
+        from io import BytesIO
+
+        from PIL import Image
+
+        from backend.surveillance.recorder import RecordedFrame, encode_clip
+
+        frames = [RecordedFrame(i * 0.5, self._jpeg(i * 60)) for i in range(4)]
+        clip = Image.open(BytesIO(encode_clip(frames)))
+        assert clip.format == "WEBP"
+        assert clip.n_frames == 4
+        clip.seek(3)
+        clip.load()
+        assert clip.info["timestamp"] == 1500
+
+    def test_alarm_gets_clip_of_its_camera(self):
+        """Test that an alarm links a clip of the camera at its location."""
+        from datetime import datetime
+        from io import BytesIO
+
+        from PIL import Image
+
+        from backend.common.device import AlarmEvent, AlarmType
+        from backend.surveillance import surveillance
+
+        camera = CameraDB.get_camera(2)
+        for i in range(5):
+            surveillance.frame_recorder.add(1, self._jpeg(0), now=100.0 + i)
+            surveillance.frame_recorder.add(2, self._jpeg(i * 50), now=100.0 + i)
+        event = AlarmEvent(
+            id=1,
+            timestamp=datetime.now(),
+            alarm_type=AlarmType.DETECT,
+            device_id=2,
+            location=camera.location,
+            description="test",
+        )
+        urls = surveillance.save_alarm_clips(event, at=102.0, pre_roll=1, post_roll=1)
+
+        assert len(urls) == 1
+        response = client.get(urls[0])
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "image/webp"
+        assert "immutable" in response.headers["cache-control"]
+        assert Image.open(BytesIO(response.content)).n_frames == 3
+
+    def test_only_alarms_queue_clips(self, monkeypatch):
+        """Test that alarms, but not log entries, are queued for clips."""
+        import unittest.mock as mock
+
+        from backend.surveillance import surveillance
+        from backend.surveillance.motion import MotionEvent
+
+        pipeline = mock.Mock()
+        monkeypatch.setattr(surveillance, "clip_pipeline", pipeline)
+
+        # Nothing is recorded, so there is nothing to export
+        surveillance.record_motion_events([MotionEvent(1, "view", 0.5)])
+        pipeline.submit.assert_not_called()
+
+        surveillance.frame_recorder.add(1, self._jpeg(0))
+        for _ in range(3):
+            client.post("/surveillance/sensors/motion/1/arm")
+            client.post("/surveillance/sensors/motion/1/disarm")
+        pipeline.submit.assert_not_called()
+
+        surveillance.record_motion_events([MotionEvent(1, "view", 0.5)])
+        try:
+            client.post("/surveillance/sensors/motion/1/trigger")
+        finally:
+            SensorDB.update_motion_sensor(1, is_triggered=False)
+        events = surveillance.get_default_user().alarm_events
+        assert pipeline.submit.call_args_list == [
+            mock.call(events[-2], None),
+            mock.call(events[-1], SensorDB.get_motion_sensor(1)),
+        ]
+
+    def test_queued_clip_waits_for_post_roll(self, monkeypatch):
+        """Test that the clip worker exports after the post-roll only."""
+        import asyncio
+        from time import monotonic
+
+        from backend.common.device import AlarmType
+        from backend.surveillance import surveillance
+        from backend.surveillance.alarm_pipeline import AlarmPipeline
+
+        monkeypatch.setattr(surveillance, "CLIP_POST_ROLL", 0.2)
+        pipeline = AlarmPipeline()
+        event = surveillance.get_default_user().add_alarm_event(
+            AlarmType.DETECT, 2, "", "test"
+        )
+        surveillance.frame_recorder.add(2, self._jpeg(0))
+
+        async def scenario():
+            worker = asyncio.create_task(pipeline.run(surveillance.export_queued_clips))
+            await asyncio.sleep(0)
+            pipeline.submit(event)
+            await asyncio.sleep(0.05)
+            assert event.clip_urls == []
+            await pipeline._queue.join()
+            worker.cancel()
+
+        start = monotonic()
+        asyncio.run(scenario())
+        assert monotonic() - start >= 0.2
+        assert len(event.clip_urls) == 1
+        assert pipeline.stats()["attached"] == 1
+
+    def test_unknown_clip_not_found(self):
+        """Test that only stored content-hash names are served."""
+        for name in ("0123456789abcdef.webp", "..%2Fcamera1.jpg", "clip.webp"):
+            response = client.get(f"/surveillance/clips/{name}")
+            assert response.status_code == 404
+
 
 class TestSensors:
     """Test sensor management endpoints."""
@@ -752,11 +1587,11 @@ class TestErrorHandling:
         mock_camera.pan = 5  # Start at some position
         mock_camera.zoom = 2
 
-        def mock_pan_right_with_limit():
-            mock_camera.pan = 5  # Stay at limit
-            return False  # Indicate limit reached
+        def mock_set_position_with_limit(pan=None, zoom=None):
+            # Stay at the current position
+            return mock_camera.pan, mock_camera.zoom
 
-        mock_camera.pan_right = mock_pan_right_with_limit
+        mock_camera.set_position = mock_set_position_with_limit
 
         with mock.patch(
             "backend.surveillance.surveillance.get_or_create_camera",
@@ -766,20 +1601,13 @@ class TestErrorHandling:
             assert response.status_code == 200
             data = response.json()
             # This should trigger line 337:
-            # messages.append(f"Pan limit reached at {current_pan}")
-            # (Pan limit reached at current_pan)
+            # messages.append(f"Pan limit reached at {pan}")
             assert "Pan limit reached" in data["message"]
 
         # Test zoom limit scenario (line 354)
         mock_camera.pan = 0
         mock_camera.zoom = 9  # Start at max zoom
 
-        def mock_zoom_in_with_limit():
-            mock_camera.zoom = 9  # Stay at limit
-            return False  # Indicate limit reached
-
-        mock_camera.zoom_in = mock_zoom_in_with_limit
-
         with mock.patch(
             "backend.surveillance.surveillance.get_or_create_camera",
             return_value=mock_camera,
@@ -788,8 +1616,7 @@ class TestErrorHandling:
             assert response.status_code == 200
             data = response.json()
             # This should trigger line 354:
-            # messages.append(f"Zoom limit reached at current_zoom")
-            # (Zoom limit reached at current_zoom)
+            # messages.append(f"Zoom limit reached at {zoom}")
             assert "Zoom limit reached" in data["message"]
 
     def test_update_camera_not_found(self):
@@ -831,3 +1658,925 @@ class TestErrorHandling:
         ):
             with pytest.raises(HTTPException):
                 surveillance.get_default_user()
+
+
+class TestCameraClock:
+    """Test the camera time counter."""
+
+    def test_time_follows_monotonic_clock(self):
+        """Test that camera time advances without a camera thread."""
+        import threading
+        import unittest.mock as mock
+
+        from device.device_camera import DeviceCamera
+
+        with mock.patch("device.device_camera.monotonic", return_value=1000.0):
+            camera = DeviceCamera()
+        assert not isinstance(camera, threading.Thread)
+
+        with mock.patch("device.device_camera.monotonic", return_value=1007.5):
+            assert camera.time == 7
+        with mock.patch("device.device_camera.monotonic", return_value=1105.0):
+            assert camera.time == 5  # Wraps at 100
+
+    def test_time_can_be_set(self):
+        """Test that assigning time restarts the counter from that value."""
+        import unittest.mock as mock
+
+        from device.device_camera import DeviceCamera
+
+        with mock.patch("device.device_camera.monotonic", return_value=50.0):
+            camera = DeviceCamera()
+            camera.time = 42
+        with mock.patch("device.device_camera.monotonic", return_value=53.0):
+            assert camera.time == 45
+
+
+class TestPTZQueue:
+    """Test coalescing of PTZ commands."""
+
+    def test_burst_is_coalesced(self):
+        """Test that a burst of commands costs two moves, last writer wins."""
+        import asyncio
+
+        from backend.surveillance.ptz import PTZQueue
+        from device.device_camera import DeviceCamera
+
+        queue = PTZQueue(min_interval=0.05)
+        camera = DeviceCamera()
+        calls = []
+        set_position = camera.set_position
+
+        def counting_set_position(pan=None, zoom=None):
+            calls.append((pan, zoom))
+            return set_position(pan, zoom)
+
+        camera.set_position = counting_set_position
+
+        async def burst():
+            return await asyncio.gather(
+                queue.move(1, camera, 1, None),
+                queue.move(1, camera, 2, None),
+                queue.move(1, camera, None, 4),
+                queue.move(1, camera, 3, None),
+            )
+
+        results = asyncio.run(burst())
+        # The first command moves at once, the rest are merged into one move
+        assert calls == [(1, None), (3, 4)]
+        assert results[0].pan == 1
+        assert all(result == (3, 4, 3, 4) for result in results[1:])
+        assert (queue.commands, queue.moves) == (4, 2)
+        assert camera.get_view_state()[:2] == (3, 4)
+
+    def test_moves_are_rate_limited(self):
+        """Test that consecutive moves of a camera are spaced out."""
+        import asyncio
+        import time
+
+        from backend.surveillance.ptz import PTZQueue
+        from device.device_camera import DeviceCamera
+
+        queue = PTZQueue(min_interval=0.1)
+        camera = DeviceCamera()
+
+        async def two_moves():
+            await queue.move(1, camera, 1, None)
+            start = time.monotonic()
+            await queue.move(1, camera, 2, None)
+            return time.monotonic() - start
+
+        assert asyncio.run(two_moves()) >= 0.09
+
+    def test_cancelled_leader_still_moves(self):
+        """Test that a batch is applied when its first request goes away."""
+        import asyncio
+
+        from backend.surveillance.ptz import PTZQueue
+        from device.device_camera import DeviceCamera
+
+        queue = PTZQueue(min_interval=10)
+        camera = DeviceCamera()
+
+        async def scenario():
+            await queue.move(1, camera, 1, None)
+            leader = asyncio.create_task(queue.move(1, camera, 2, None))
+            await asyncio.sleep(0)
+            follower = asyncio.create_task(queue.move(1, camera, 4, None))
+            await asyncio.sleep(0)
+            leader.cancel()
+            return await follower
+
+        assert asyncio.run(scenario()).pan == 4
+
+    def test_wait_moved(self):
+        """Test that watchers are woken by a move and time out otherwise."""
+        import asyncio
+
+        from backend.surveillance.ptz import PTZQueue
+        from device.device_camera import DeviceCamera
+
+        queue = PTZQueue()
+        camera = DeviceCamera()
+
+        async def scenario():
+            assert not await queue.wait_moved(1, 0.01)
+            watcher = asyncio.create_task(queue.wait_moved(1, 5))
+            await asyncio.sleep(0)
+            await queue.move(1, camera, None, 5)
+            return await watcher
+
+        assert asyncio.run(scenario())
+        assert not queue._watchers.get(1)
+
+    def test_endpoint_reports_merged_result(self):
+        """Test the PTZ endpoint through the queue."""
+        from backend.surveillance.surveillance import ptz_queue
+
+        client.post("/surveillance/cameras/1/enable")
+        ptz_queue.clear()
+        response = client.post("/surveillance/cameras/1/ptz", json={"zoom": 6})
+        assert response.json()["zoom_level"] == 6
+        assert ptz_queue.moves == 1
+        client.post("/surveillance/cameras/1/ptz", json={"zoom": 2})
+
+
+class TestPTZViewCache:
+    """Test the precomputed PTZ views."""
+
+    def test_cached_view_is_reused(self):
+        """Test that a view is rendered once and shared by cameras."""
+        from device import device_camera
+
+        device_camera._base_views.clear()
+        camera = device_camera.DeviceCamera()
+        camera.set_id(1)
+        first = camera.render_view(2, 4, 7)
+        views = device_camera._base_views[camera.source_key]
+        base = views[(2, 4)]
+
+        other = device_camera.DeviceCamera()
+        other.set_id(1)
+        second = other.render_view(2, 4, 7)
+        assert views[(2, 4)] is base
+        assert second.tobytes() == first.tobytes()
+        # The caption is drawn on a copy, not on the cached view
+        assert base.tobytes() != first.tobytes()
+
+    def test_other_sizes_and_tiers_bypass_the_cache(self):
+        """Test that only the default full-quality view is cached."""
+        from device import device_camera
+
+        device_camera._base_views.clear()
+        camera = device_camera.DeviceCamera()
+        camera.set_id(1)
+
+        preview = camera.render_view(0, 2, 5, size=(64, 48), quality="preview")
+        fast = camera.render_view(0, 2, 5, quality="fast")
+        assert preview.size == (64, 48)
+        assert fast.size == (500, 500)
+        assert not device_camera._base_views
+        assert fast.tobytes() != camera.render_view(0, 2, 5).tobytes()
+
+    def test_preload_views_renders_every_position(self):
+        """Test that preloading fills the cache for every pan and zoom."""
+        import unittest.mock as mock
+
+        from device import device_camera
+
+        device_camera._base_views.clear()
+        with (
+            mock.patch.object(device_camera, "PAN_POSITIONS", range(-1, 2)),
+            mock.patch.object(device_camera, "ZOOM_LEVELS", range(1, 3)),
+        ):
+            device_camera.preload_views(1)
+        (views,) = device_camera._base_views.values()
+        assert len(views) == 6
+
+        device_camera._base_views.clear()
+        device_camera.preload_views(999)  # No source image
+        assert not device_camera._base_views
+
+    def test_least_recently_used_sources_are_dropped(self, monkeypatch):
+        """Test that views of at most BASE_VIEW_SOURCES sources are kept."""
+        from device import device_camera
+
+        monkeypatch.setattr(device_camera, "BASE_VIEW_SOURCES", 2)
+        device_camera._base_views.clear()
+        for source_key in ("a", "b", "a", "c"):
+            device_camera._base_view(source_key, None, 0, 2)
+        assert list(device_camera._base_views) == ["a", "c"]
+        device_camera._base_views.clear()
+
+
+class TestCaptionSprites:
+    """Test the pre-rendered view captions."""
+
+    def test_caption_matches_drawn_text(self):
+        """Test that the pasted caption equals drawing it on the view."""
+        from PIL import ImageDraw
+
+        from device import device_camera
+
+        camera = device_camera.DeviceCamera()
+        camera.set_id(1)
+        for pan, zoom, current_time in [(0, 2, 7), (3, 9, 42), (-5, 1, 99)]:
+            img = device_camera._render_base_view(camera.img_source, pan, zoom)
+            text = device_camera._caption_text(pan, zoom, current_time)
+            draw = ImageDraw.Draw(img)
+            bbox = draw.textbbox((0, 0), text, font=camera.font)
+            w_text, h_text = bbox[2] - bbox[0], bbox[3] - bbox[1]
+            draw.rounded_rectangle(
+                [(0, 0), (w_text + 10, h_text + 5)], radius=h_text // 2, fill="gray"
+            )
+            draw.text((5, 2), text, fill="cyan", font=camera.font)
+
+            view = camera.render_view(pan, zoom, current_time)
+            assert view.tobytes() == img.tobytes()
+
+    def test_caption_text(self):
+        """Test the caption wording."""
+        from device.device_camera import _caption_text
+
+        assert _caption_text(0, 2, 7) == "Time = 07, zoom x2, center"
+        assert _caption_text(3, 9, 42) == "Time = 42, zoom x9, right 3"
+        assert _caption_text(-5, 1, 99) == "Time = 99, zoom x1, left 5"
+
+    def test_sprites_are_reused_and_bounded(self, monkeypatch):
+        """Test that a caption is rendered once and the cache stays small."""
+        from device import device_camera
+
+        monkeypatch.setattr(device_camera, "CAPTION_CACHE_SIZE", 3)
+        device_camera._captions.clear()
+        camera = device_camera.DeviceCamera()
+        camera.set_id(1)
+
+        camera.render_view(0, 2, 7, (64, 64), "fast")
+        sprite = device_camera._captions["Time = 07, zoom x2, center"]
+        camera.render_view(0, 2, 7, (32, 32), "preview")
+        assert len(device_camera._captions) == 1
+        assert next(iter(device_camera._captions.values())) is sprite
+
+        for current_time in range(10, 15):
+            camera.render_view(0, 2, current_time, (32, 32), "fast")
+        assert len(device_camera._captions) == 3
+        device_camera._captions.clear()
+
+
+class TestRenderPool:
+    """Test rendering frames in worker processes."""
+
+    def test_pool_renders_like_in_process(self):
+        """Test frames through shared memory and too large for a slot."""
+        from io import BytesIO
+
+        from PIL import Image
+
+        from backend.surveillance.frames import encode_image
+        from backend.surveillance.render_pool import RenderJob, RenderPool
+        from device.device_camera import DeviceCamera
+
+        camera = DeviceCamera()
+        camera.set_id(1)
+        pool = RenderPool(1, slot_bytes=64 * 1024)
+        try:
+            small = RenderJob(1, 2, 3, 7, 160, 120, "preview", "jpeg", 80)
+            data = pool.render(small)
+            expected = encode_image(
+                camera.render_view(2, 3, 7, (160, 120), "preview"), "jpeg", 80
+            )
+            assert data == expected
+
+            # Returned pickled instead of through the slot
+            large = RenderJob(1, 0, 2, 7, 1200, 1200, "full", "jpeg", 95)
+            data = pool.render(large)
+            assert len(data) > 64 * 1024
+            assert Image.open(BytesIO(data)).size == (1200, 1200)
+            assert pool.renders == 2
+        finally:
+            pool.close()
+            camera.stop()
+
+    def test_from_env(self, monkeypatch):
+        """Test that the pool is only used when configured."""
+        import os
+
+        from backend.surveillance.render_pool import RenderPool
+
+        monkeypatch.delenv("SAFEHOME_RENDER_PROCESSES", raising=False)
+        assert RenderPool.from_env() is None
+        monkeypatch.setenv("SAFEHOME_RENDER_PROCESSES", "0")
+        assert RenderPool.from_env() is None
+        monkeypatch.setenv("SAFEHOME_RENDER_PROCESSES", "3")
+        assert RenderPool.from_env().processes == 3
+        monkeypatch.setenv("SAFEHOME_RENDER_PROCESSES", "auto")
+        assert RenderPool.from_env().processes == (os.cpu_count() or 1)
+
+    def test_frames_use_pool(self, monkeypatch):
+        """Test that camera frames are rendered by the configured pool."""
+        import asyncio
+        import unittest.mock as mock
+
+        from backend.surveillance import surveillance
+
+        pool = mock.Mock()
+        pool.render.return_value = b"frame"
+        monkeypatch.setattr(surveillance, "render_pool", pool)
+        surveillance.frame_cache.clear()
+
+        spec = surveillance.FrameSpec(123, 123)
+        frame = asyncio.run(surveillance.render_camera_frame(1, spec))
+        assert frame.content == b"frame"
+        job = pool.render.call_args.args[0]
+        assert (job.camera_id, job.width, job.height) == (1, 123, 123)
+        surveillance.frame_cache.clear()
+
+
+class TestImageCache:
+    """Test the process-wide decoded image cache."""
+
+    def test_cameras_share_one_decoded_source(self):
+        """Test that cameras reuse one read-only decoded buffer."""
+        from device import image_cache
+        from device.device_camera import DeviceCamera
+
+        first, second = DeviceCamera(), DeviceCamera()
+        first.set_id(1)
+        second.set_id(1)
+        assert first.source_key == second.source_key
+        assert first.img_source.readonly and second.img_source.readonly
+        assert (
+            image_cache.load("camera1.jpg").data is image_cache.load("camera1.jpg").data
+        )
+
+    def test_modifying_an_image_does_not_change_the_cache(self):
+        """Test that shared images are copied on write."""
+        from device import image_cache
+
+        img = image_cache.load_image("camera2.jpg")
+        pixel = img.getpixel((0, 0))
+        img.paste((1, 2, 3, 0), (0, 0, 10, 10))
+        assert image_cache.load_image("camera2.jpg").getpixel((0, 0)) == pixel
+
+    def test_changed_file_is_decoded_again(self, tmp_path):
+        """Test that entries are keyed by modification time."""
+        import os
+
+        from PIL import Image
+
+        from device import image_cache
+
+        path = tmp_path / "source.png"
+        Image.new("RGB", (8, 8), "red").save(path)
+        assert image_cache.load_image(path).getpixel((0, 0))[:3] == (255, 0, 0)
+
+        Image.new("RGB", (8, 8), "blue").save(path)
+        os.utime(path, ns=(0, os.stat(path).st_mtime_ns + 1_000_000))
+        assert image_cache.load_image(path).getpixel((0, 0))[:3] == (0, 0, 255)
+
+    def test_draft_decodes_at_reduced_scale(self):
+        """Test that reduce decodes JPEGs in draft mode at that scale."""
+        from device import image_cache
+
+        assert image_cache.load("camera1.jpg").size == (548, 378)
+        assert image_cache.load("camera1.jpg", reduce=2).size == (274, 189)
+        assert image_cache.load("camera1.jpg", reduce=8).size == (69, 48)
+
+    def test_small_views_render_from_reduced_decode(self, monkeypatch):
+        """Test that views smaller than their crop use a reduced decode."""
+        from PIL import ImageChops, ImageStat
+
+        from device import device_camera, image_cache
+        from device.device_camera import DeviceCamera
+
+        camera = DeviceCamera()
+        camera.set_id(1)
+        reductions = []
+        load = image_cache.load
+
+        def record_reduce(path, reduce=1):
+            reductions.append(reduce)
+            return load(path, reduce)
+
+        monkeypatch.setattr(image_cache, "load", record_reduce)
+
+        # Zoom 1 crops 360 source pixels: a 150 thumbnail needs only half
+        thumbnail = camera.render_view(0, 1, 0, (150, 150), caption=False)
+        assert reductions == [2]
+        full = device_camera._render_base_view(camera.img_source, 0, 1, (150, 150))
+        difference = ImageStat.Stat(ImageChops.difference(thumbnail, full)).mean
+        assert max(difference) < 10
+
+        # Zoom 5 crops 200 pixels, too few to reduce for the same thumbnail
+        camera.render_view(0, 5, 0, (150, 150), "preview")
+        assert reductions == [2]
+
+
+class TestCameraEviction:
+    """Test idle camera eviction."""
+
+    def test_idle_camera_is_evicted_and_keeps_ptz(self):
+        """Test that idle cameras are dropped and restored with their PTZ."""
+        import unittest.mock as mock
+
+        from backend.surveillance import surveillance
+
+        camera = surveillance.get_or_create_camera(1)
+        camera.pan, camera.zoom = 3, 6
+        idle = surveillance.CAMERA_IDLE_TIMEOUT + surveillance.CAMERA_EVICTION_INTERVAL
+        later = surveillance.camera_last_used[1] + idle + 1
+
+        with mock.patch(
+            "backend.surveillance.surveillance.monotonic", return_value=later
+        ):
+            surveillance.get_or_create_camera(2)
+            assert 1 not in surveillance.camera_instances
+            assert surveillance.saved_camera_ptz[1] == (3, 6)
+
+            restored = surveillance.get_or_create_camera(1)
+        assert restored is not camera
+        assert (restored.pan, restored.zoom) == (3, 6)
+        assert 1 not in surveillance.saved_camera_ptz
+        restored.pan, restored.zoom = 0, 2
+
+
+class TestCameraLoading:
+    """Test creating cameras off the event loop."""
+
+    @pytest.fixture
+    def slow_camera(self, monkeypatch):
+        """Unload camera 1 and make loading its source take 0.5 s."""
+        import time
+
+        from backend.surveillance import surveillance
+        from device.device_camera import DeviceCamera
+
+        loads = []
+        set_id = DeviceCamera.set_id
+
+        def slow_set_id(camera, id_):
+            loads.append(id_)
+            time.sleep(0.5)
+            set_id(camera, id_)
+
+        monkeypatch.setattr(DeviceCamera, "set_id", slow_set_id)
+        previous = surveillance.camera_instances.pop(1, None)
+        yield loads
+        if previous is not None:
+            surveillance.camera_instances[1] = previous
+
+    def test_other_endpoints_respond_while_camera_loads(self, slow_camera):
+        """Test that a slow camera load does not block the event loop."""
+        import asyncio
+        import time
+
+        import httpx
+
+        from backend.surveillance import surveillance
+
+        async def scenario():
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(
+                transport=transport, base_url="http://test"
+            ) as async_client:
+                loading = asyncio.gather(
+                    *(surveillance.load_camera(1) for _ in range(5))
+                )
+                await asyncio.sleep(0.05)
+
+                start = time.perf_counter()
+                response = await async_client.get("/surveillance/cameras")
+                elapsed = time.perf_counter() - start
+                assert response.status_code == 200
+                assert not loading.done()
+                return elapsed, await loading
+
+        elapsed, cameras = asyncio.run(scenario())
+        assert elapsed < 0.3
+        # Single flight: one load, shared by every caller
+        assert slow_camera == [1]
+        assert all(camera is cameras[0] for camera in cameras)
+        assert surveillance.camera_instances[1] is cameras[0]
+
+    def test_idle_camera_is_reloaded_off_the_event_loop(self, monkeypatch):
+        """Test that a camera evicted by the lookup is created on the loader."""
+        import asyncio
+        import threading
+        from time import monotonic
+
+        from backend.surveillance import surveillance
+        from device.device_camera import DeviceCamera
+
+        camera = surveillance.get_or_create_camera(1)
+        with surveillance.camera_instances_lock:
+            surveillance.camera_last_used[1] = (
+                monotonic() - surveillance.CAMERA_IDLE_TIMEOUT - 1
+            )
+            monkeypatch.setattr(surveillance, "_last_eviction", 0.0)
+
+        threads = []
+        set_id = DeviceCamera.set_id
+
+        def record_thread(self, camera_id):
+            threads.append(threading.current_thread())
+            return set_id(self, camera_id)
+
+        monkeypatch.setattr(DeviceCamera, "set_id", record_thread)
+        reloaded = asyncio.run(surveillance.load_camera(1))
+        assert reloaded is not camera
+        assert surveillance.camera_instances[1] is reloaded
+        assert threads and threading.main_thread() not in threads
+
+
+class TestWarmup:
+    """Test the camera warm-up at server start."""
+
+    @pytest.fixture(autouse=True)
+    def thumbnail_store(self, tmp_path, monkeypatch):
+        """Capture thumbnails into a temporary directory."""
+        from backend.surveillance import surveillance
+        from backend.surveillance.thumbnails import ThumbnailStore
+
+        monkeypatch.setattr(
+            surveillance, "thumbnail_store", ThumbnailStore(str(tmp_path))
+        )
+
+    def test_enabled_cameras_are_warmed_up(self):
+        """Test every step of every enabled camera, reported by /health."""
+        import asyncio
+        import unittest.mock as mock
+
+        from backend.surveillance import surveillance
+        from device import device_camera
+
+        device_camera._captions.clear()
+        enabled = [c.camera_id for c in CameraDB.get_all_cameras() if c.is_enabled]
+        with mock.patch.object(device_camera, "preload_views") as preload_views:
+            asyncio.run(surveillance.warm_up_cameras())
+
+        assert sorted(c.args[0] for c in preload_views.call_args_list) == enabled
+        for camera_id in enabled:
+            assert camera_id in surveillance.camera_instances
+            assert surveillance.thumbnail_store.latest(camera_id) is not None
+        # The captions of each camera's position for every time
+        assert len(device_camera._captions) >= device_camera.DeviceCamera.TIME_WRAP
+
+        data = client.get("/health").json()
+        assert data["status"] == "ok"
+        warmup = data["warmup"]
+        assert warmup["state"] == "done"
+        assert warmup["progress"] == 1.0
+        assert sorted(int(c) for c in warmup["cameras"]) == enabled
+        for camera in warmup["cameras"].values():
+            assert camera == {
+                "completed": ["camera", "views", "captions", "thumbnail"],
+                "error": None,
+            }
+
+    def test_failed_camera_is_reported(self):
+        """Test that one failing camera does not stop the others."""
+        import asyncio
+        import unittest.mock as mock
+
+        from backend.surveillance import surveillance
+
+        def preload_views(camera_id):
+            if camera_id == 1:
+                raise OSError("disk error")
+
+        CameraDB.update_camera(1, is_enabled=True)
+        with mock.patch("device.device_camera.preload_views", preload_views):
+            asyncio.run(surveillance.warm_up_cameras())
+
+        snapshot = surveillance.warmup_progress.snapshot()
+        assert snapshot["state"] == "done"
+        assert snapshot["progress"] < 1.0
+        assert snapshot["cameras"][1] == {
+            "completed": ["camera"],
+            "error": "disk error",
+        }
+
+    def test_progress_before_start(self):
+        """Test the report while the warm-up has not started yet."""
+        progress = WarmupProgress()
+        assert progress.snapshot() == {
+            "state": "pending",
+            "progress": 0.0,
+            "elapsed": 0.0,
+            "cameras": {},
+        }
+        progress.start([])
+        assert progress.snapshot()["progress"] == 0.0
+        progress.finish()
+        assert progress.snapshot()["progress"] == 1.0
+
+        progress.start([1, 2])
+        progress.step(1, "camera")
+        snapshot = progress.snapshot()
+        assert snapshot["state"] == "running"
+        assert snapshot["progress"] == 1 / 8
+
+
+class TestAlarmSnapshots:
+    """Test snapshots of the cameras near a triggered sensor."""
+
+    @pytest.fixture(autouse=True)
+    def pipeline(self, tmp_path, monkeypatch):
+        """Use a fresh pipeline and store snapshots in a temp directory."""
+        from backend.surveillance import surveillance
+        from backend.surveillance.alarm_pipeline import AlarmPipeline
+        from backend.surveillance.recorder import ClipStore
+
+        pipeline = AlarmPipeline(maxsize=2)
+        monkeypatch.setattr(surveillance, "snapshot_pipeline", pipeline)
+        monkeypatch.setattr(surveillance, "clip_store", ClipStore(str(tmp_path)))
+        return pipeline
+
+    def test_full_queue_drops_jobs(self, pipeline):
+        """Test that submitting never waits and overload is counted."""
+        import asyncio
+
+        # No worker yet
+        assert not pipeline.submit("event 0", "sensor")
+
+        captured = []
+
+        async def capture(job):
+            captured.append(job.event)
+            if job.event == "event 2":
+                raise RuntimeError("render failed")
+            return 1
+
+        async def drain():
+            worker = asyncio.create_task(pipeline.run(capture))
+            await asyncio.sleep(0)
+            assert pipeline.submit("event 1", "sensor")
+            assert pipeline.submit("event 2", "sensor")
+            assert not pipeline.submit("event 3", "sensor")
+            await pipeline._queue.join()
+            worker.cancel()
+
+        asyncio.run(drain())
+        assert captured == ["event 1", "event 2"]
+        stats = pipeline.stats()
+        assert stats["queued"] == 0
+        assert (stats["submitted"], stats["dropped"]) == (4, 2)
+        assert (stats["completed"], stats["failed"], stats["attached"]) == (1, 1, 1)
+
+    def test_cameras_for_sensor(self, monkeypatch):
+        """Test the camera lookup of a sensor, with the shipped cameras."""
+        from backend.common.device import SafetyZone
+        from backend.surveillance.surveillance import (
+            cameras_for_sensor,
+            get_default_user,
+        )
+
+        CameraDB.update_camera(1, is_enabled=True)
+        assert cameras_for_sensor(SensorDB.get_motion_sensor(1)) == [1]
+        assert cameras_for_sensor(SensorDB.get_windoor_sensor(5)) == [1]
+        assert cameras_for_sensor(SensorDB.get_motion_sensor(2)) == []
+
+        # The front door is in view of the entrance camera, unless disabled
+        front_door = SensorDB.get_windoor_sensor(7)
+        assert cameras_for_sensor(front_door) == [2]
+        CameraDB.update_camera(2, is_enabled=False)
+        try:
+            assert cameras_for_sensor(front_door) == []
+        finally:
+            CameraDB.update_camera(2, is_enabled=True)
+
+        # A safety zone adds the cameras it shares with the sensor
+        user = get_default_user()
+        kitchen = SensorDB.get_motion_sensor(2)
+        devices = [
+            device
+            for device in user.devices
+            if device.sensor_info is kitchen
+            or device.camera_info is CameraDB.get_camera(2)
+        ]
+        monkeypatch.setattr(user, "safety_zones", [SafetyZone("Hall", devices, False)])
+        assert cameras_for_sensor(kitchen) == [2]
+
+    def test_trigger_attaches_snapshot(self, pipeline):
+        """Test a trigger through the pipeline to the served snapshot."""
+        import asyncio
+        from io import BytesIO
+
+        import httpx
+        from PIL import Image
+
+        from backend.surveillance import surveillance
+
+        CameraDB.update_camera(1, is_enabled=True)
+
+        async def scenario():
+            worker = asyncio.create_task(
+                pipeline.run(surveillance.capture_alarm_snapshots)
+            )
+            await asyncio.sleep(0)
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(
+                transport=transport, base_url="http://test"
+            ) as async_client:
+                response = await async_client.post(
+                    "/surveillance/sensors/motion/1/trigger"
+                )
+                assert response.status_code == 200
+                await pipeline._queue.join()
+            worker.cancel()
+
+        try:
+            asyncio.run(scenario())
+        finally:
+            SensorDB.update_motion_sensor(1, is_triggered=False)
+
+        event = surveillance.get_default_user().alarm_events[-1]
+        assert event.description == "Motion sensor 1 triggered"
+        assert len(event.snapshot_urls) == 1
+        response = client.get(event.snapshot_urls[0])
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "image/jpeg"
+        assert Image.open(BytesIO(response.content)).size == (640, 480)
+        assert pipeline.stats()["attached"] == 1
+
+
+class TestDeliveryLevels:
+    """Test client-negotiated and adaptive frame delivery."""
+
+    def test_negotiate_level(self):
+        """Test picking the best level within a client's limits."""
+        from backend.surveillance.delivery import DELIVERY_LEVELS, negotiate_level
+
+        names = [level.name for level in DELIVERY_LEVELS]
+        # Unconstrained clients get "high"; "max" must be asked for
+        assert names[negotiate_level()] == "high"
+        assert names[negotiate_level(quality=100)] == "high"
+        assert names[negotiate_level(max_width=2000)] == "max"
+        assert names[negotiate_level(max_width=800)] == "high"
+        assert names[negotiate_level(max_width=800, quality=70)] == "medium"
+        assert names[negotiate_level(max_width=100)] == "low"
+
+    def test_adaptive_level_steps(self):
+        """Test stepping down when late and back up, at most to the ceiling."""
+        from backend.surveillance.delivery import (
+            ADAPT_DOWN_AFTER,
+            ADAPT_UP_AFTER,
+            AdaptiveLevel,
+        )
+
+        levels = AdaptiveLevel(2)
+        assert levels.record(late=True).name == "high"
+        assert levels.record(late=True).name == "medium"
+        for _ in range(ADAPT_DOWN_AFTER * 3):
+            levels.record(late=True)
+        assert levels.index == 0
+
+        for _ in range(ADAPT_UP_AFTER - 1):
+            levels.record(late=False)
+        assert levels.index == 0
+        assert levels.record(late=False).name == "medium"
+        for _ in range(ADAPT_UP_AFTER * 3):
+            levels.record(late=False)
+        assert levels.index == 2
+        assert levels.changes == 4
+
+    def test_clients_in_a_level_share_one_encode(self):
+        """Test that different limits within one level reuse the frame."""
+        import unittest.mock as mock
+        from io import BytesIO
+
+        from PIL import Image
+
+        from backend.surveillance.surveillance import frame_cache
+        from device.device_camera import DeviceCamera
+
+        client.post("/surveillance/cameras/2/enable")
+        frame_cache.clear()
+        url = "/surveillance/cameras/2/frame"
+        with mock.patch.object(DeviceCamera, "get_view_state", return_value=(2, 4, 9)):
+            first = client.get(url, params={"password": "camera123", "max_width": 500})
+            second = client.get(
+                url, params={"password": "camera123", "max_width": 700, "quality": 70}
+            )
+        assert first.status_code == second.status_code == 200
+        assert first.headers["x-delivery-level"] == "medium"
+        assert first.content == second.content
+        assert (frame_cache.misses, frame_cache.hits) == (1, 1)
+        assert Image.open(BytesIO(first.content)).size == (480, 480)
+
+    def test_limits_below_the_lowest_level(self):
+        """Test that frames never exceed the client's width and quality."""
+        from io import BytesIO
+
+        from PIL import Image
+
+        from backend.surveillance.delivery import AdaptiveLevel
+
+        client.post("/surveillance/cameras/2/enable")
+        response = client.get(
+            "/surveillance/cameras/2/frame",
+            params={"password": "camera123", "max_width": 100, "quality": 30},
+        )
+        assert response.status_code == 200
+        assert response.headers["x-delivery-level"] == "low"
+        assert Image.open(BytesIO(response.content)).size == (100, 100)
+
+        data = client.get(
+            "/surveillance/cameras/2/view",
+            params={"password": "camera123", "max_width": 100, "quality": 30},
+        ).json()
+        assert data["frame_url"] == (
+            "/surveillance/cameras/2/frame?size=100&quality=30&tier=preview"
+        )
+
+        levels = AdaptiveLevel(1, max_width=300, quality=60)
+        assert levels.level.width == 300
+        for _ in range(10):
+            levels.record(late=True)
+        assert (levels.level.width, levels.level.quality) == (240, 50)
+
+    def test_view_defaults_to_high(self):
+        """Test that a view without limits links the "high" level."""
+        data = client.get(
+            "/surveillance/cameras/2/view", params={"password": "camera123"}
+        ).json()
+        assert data["delivery_level"] == "high"
+        assert data["frame_url"] == (
+            "/surveillance/cameras/2/frame?size=720&quality=80&tier=full"
+        )
+
+    def test_view_reads_state_at_once(self, monkeypatch):
+        """Test that the view reports pan, zoom and time read together."""
+        from device.device_camera import DeviceCamera
+
+        monkeypatch.setattr(DeviceCamera, "get_view_state", lambda self: (3, 4, 5))
+        data = client.get(
+            "/surveillance/cameras/2/view", params={"password": "camera123"}
+        ).json()
+        assert (data["pan_position"], data["zoom_level"], data["current_time"]) == (
+            3,
+            4,
+            5,
+        )
+
+    def test_view_links_negotiated_level(self):
+        """Test that the view returns URLs for the negotiated level."""
+        url = "/surveillance/cameras/2/view"
+        params = {"password": "camera123", "max_width": 800}
+        assert client.get(url, params={**params, "fps": 60}).status_code == 422
+
+        response = client.get(url, params={**params, "fps": 20})
+        data = response.json()
+        assert data["delivery_level"] == "high"
+        assert data["frame_url"] == (
+            "/surveillance/cameras/2/frame?size=720&quality=80&tier=full"
+        )
+        assert data["live_url"] == (
+            "/surveillance/cameras/2/stream"
+            "?max_width=720&quality=80&fps=15&adaptive=true"
+        )
+
+    def test_slow_client_gets_lower_levels(self):
+        """Test that an adaptive stream steps down while the client lags."""
+        import asyncio
+        import itertools
+        import unittest.mock as mock
+        from io import BytesIO
+
+        from PIL import Image
+
+        from backend.surveillance import surveillance
+        from backend.surveillance.delivery import AdaptiveLevel
+        from device.device_camera import DeviceCamera
+
+        levels = AdaptiveLevel(2)
+        calls = 0
+
+        async def is_disconnected():
+            nonlocal calls
+            calls += 1
+            return calls > 5
+
+        async def collect():
+            spec = surveillance.FrameSpec(4, 3)
+            stream = surveillance.mjpeg_stream(
+                2, "camera123", 30.0, spec, is_disconnected, levels
+            )
+            parts = []
+            async for part in stream:
+                parts.append(part)
+                await asyncio.sleep(0.1)  # Slower than the 15 fps of "high"
+            return parts
+
+        times = ((0, 2, t) for t in itertools.count())
+        with mock.patch.object(DeviceCamera, "get_view_state", side_effect=times):
+            parts = asyncio.run(collect())
+
+        names = [
+            part.split(b"X-Delivery-Level: ")[1].split(b"\r\n")[0] for part in parts
+        ]
+        assert names == [b"high", b"high", b"medium", b"medium", b"low"]
+        assert b"Content-Type: image/jpeg" in parts[-1]
+        body = parts[-1].split(b"\r\n\r\n", 1)[1]
+        assert Image.open(BytesIO(body)).size == (240, 180)
+        assert levels.changes == 2
@@ -1,40 +1,253 @@
 """Camera device implementation."""
 
 import threading
-import time
+from collections import OrderedDict
+from time import monotonic
 
 from PIL import Image, ImageDraw, ImageFont
 
+from . import image_cache
 from .interface_camera import InterfaceCamera
 
+PAN_POSITIONS = range(-5, 6)
+ZOOM_LEVELS = range(1, 10)
+
+# Resampling filter per rendering quality tier
+QUALITY_TIERS = {
+    "fast": Image.NEAREST,
+    "preview": Image.BILINEAR,
+    "full": Image.LANCZOS,
+}
+
+# Cropped and resized views keyed by source key, then by (pan, zoom), where
+# the source key identifies the decoded source in image_cache. There are only
+# 11 x 9 PTZ positions per camera and only the caption changes over time, so
+# each view is rendered once and every frame is a copy plus the caption.
+# A full set takes 99 x 500 x 500 x 3 bytes, about 74 MB per camera, so only
+# the views of the BASE_VIEW_SOURCES most recently used sources are kept.
+BASE_VIEW_SOURCES = 4
+_base_views = OrderedDict()
+_base_views_lock = threading.Lock()
+
+# Every camera draws its captions with this font, so rendered captions are
+# keyed by text alone. There are 100 x 9 x 11 possible captions, but only
+# the ones of the positions in use recur, every TIME_WRAP seconds. Each
+# sprite is a few kilobytes.
+CAPTION_FONT = ImageFont.load_default()
+CAPTION_CACHE_SIZE = 1024
+_captions = OrderedDict()
+_captions_lock = threading.Lock()
+
+
+def _source_file_name(id_):
+    return f"camera{id_}.jpg"
+
+
+def preload_source(id_):
+    """Decode a camera's source image into the shared image cache.
+
+    Args:
+        id_: The camera identifier.
+
+    Returns:
+        image_cache.DecodedImage: The decoded source, or None if the file
+        does not exist.
+    """
+    try:
+        return image_cache.load(_source_file_name(id_))
+    except FileNotFoundError:
+        return None
+
+
+def preload_views(id_):
+    """Decode a camera's source image and render the view of every position.
+
+    Args:
+        id_: The camera identifier.
+    """
+    source = preload_source(id_)
+    if source is None:
+        return
+    img = source.image()
+    for zoom in ZOOM_LEVELS:
+        for pan in PAN_POSITIONS:
+            _base_view(source.key, img, pan, zoom)
+
 
-class DeviceCamera(threading.Thread, InterfaceCamera):
+def preload_captions(camera):
+    """Render the captions of a camera's current position for every time.
+
+    Args:
+        camera: The DeviceCamera whose next frames should find them cached.
+    """
+    pan, zoom, _ = camera.get_view_state()
+    for current_time in range(camera.TIME_WRAP):
+        _caption_sprite(_caption_text(pan, zoom, current_time))
+
+
+def _base_view(source_key, img_source, pan, zoom):
+    """Return the cached view of a source image, rendering it if needed."""
+    with _base_views_lock:
+        views = _base_views.get(source_key)
+        if views is not None:
+            _base_views.move_to_end(source_key)
+            view = views.get((pan, zoom))
+            if view is not None:
+                return view
+    view = _render_base_view(img_source, pan, zoom)
+    with _base_views_lock:
+        views = _base_views.setdefault(source_key, {})
+        _base_views.move_to_end(source_key)
+        view = views.setdefault((pan, zoom), view)
+        while len(_base_views) > BASE_VIEW_SOURCES:
+            _base_views.popitem(last=False)
+    return view
+
+
+def _caption_text(pan, zoom, current_time):
+    """Return the caption of a view, e.g. "Time = 07, zoom x2, left 3"."""
+    if pan > 0:
+        direction = f"right {pan}"
+    elif pan == 0:
+        direction = "center"
+    else:
+        direction = f"left {-pan}"
+    return f"Time = {current_time:02d}, zoom x{zoom}, {direction}"
+
+
+def _caption_sprite(text):
+    """Return the cached (image, mask) of a caption, rendering it if needed."""
+    with _captions_lock:
+        sprite = _captions.get(text)
+        if sprite is not None:
+            _captions.move_to_end(text)
+            return sprite
+    sprite = _render_caption(text, CAPTION_FONT)
+    with _captions_lock:
+        _captions[text] = sprite
+        while len(_captions) > CAPTION_CACHE_SIZE:
+            _captions.popitem(last=False)
+    return sprite
+
+
+def _render_caption(text, font):
+    """Draw a caption as cyan text on a gray rounded box.
+
+    Returns the box and a mask of its rounded shape, so that pasting it
+    at (0, 0) gives the same pixels as drawing it on the view.
+    """
+    bbox = font.getbbox(text)
+    w_text = bbox[2] - bbox[0]
+    h_text = bbox[3] - bbox[1]
+    box = [(0, 0), (w_text + 10, h_text + 5)]
+    size = (max(w_text + 11, bbox[2] + 5), max(h_text + 6, bbox[3] + 2))
+
+    img = Image.new("RGB", size, "black")
+    mask = Image.new("L", size, 0)
+    ImageDraw.Draw(img).rounded_rectangle(box, radius=h_text // 2, fill="gray")
+    ImageDraw.Draw(mask).rounded_rectangle(box, radius=h_text // 2, fill=255)
+    ImageDraw.Draw(img).text((5, 2), text, fill="cyan", font=font)
+    return img, mask
+
+
+def _reduced_source(source_key, img_source, zoom, size):
+    """Return the smallest decode of a source that still resolves a view.
+
+    A view smaller than its crop of the source is rendered from a JPEG
+    draft decode at 1/2, 1/4 or 1/8 scale, as long as that leaves at least
+    one source pixel per view pixel, so resizing has fewer pixels to read.
+    Falls back to the full-size img_source.
+    """
+    crop = 2 * (DeviceCamera.SOURCE_SIZE * (10 - zoom) // 10)
+    reduce = next(
+        (r for r in reversed(image_cache.DRAFT_REDUCTIONS) if crop // r >= max(size)),
+        1,
+    )
+    if reduce == 1:
+        return img_source
+    try:
+        return image_cache.load(source_key[0], reduce).image()
+    except FileNotFoundError:
+        return img_source
+
+
+def _render_base_view(
+    img_source, pan, zoom, size=None, resample=Image.LANCZOS, source_size=None
+):
+    """Crop and resize the source for a PTZ position, without the caption.
+
+    The crop is resized straight to the output size in a single pass.
+    img_source may be a reduced decode of a source of source_size, in
+    which case the crop is scaled to match.
+    """
+    if size is None:
+        size = (DeviceCamera.RETURN_SIZE, DeviceCamera.RETURN_SIZE)
+    img_view = Image.new("RGB", size, "black")
+    if img_source is None:
+        return img_view
+
+    source_width, source_height = source_size or img_source.size
+    center_width = source_width // 2
+    center_height = source_height // 2
+    zoomed = DeviceCamera.SOURCE_SIZE * (10 - zoom) // 10
+    panned = pan * DeviceCamera.SOURCE_SIZE // 5
+
+    left = center_width + panned - zoomed
+    top = center_height - zoomed
+    right = center_width + panned + zoomed
+    bottom = center_height + zoomed
+    if (source_width, source_height) != img_source.size:
+        x_scale = img_source.width / source_width
+        y_scale = img_source.height / source_height
+        left, right = round(left * x_scale), round(right * x_scale)
+        top, bottom = round(top * y_scale), round(bottom * y_scale)
+
+    # Crop and resize to fill the view
+    try:
+        cropped = img_source.crop((left, top, right, bottom))
+        resized = cropped.resize(size, resample)
+        img_view.paste(resized, (0, 0))
+    except Exception:
+        # If crop fails, keep black background
+        pass
+    return img_view
+
+
+class DeviceCamera(InterfaceCamera):
     """Camera device that provides pan, zoom, and view capabilities.
 
-    The camera runs in a separate thread and updates its internal time counter.
+    The camera's time counter counts seconds since the camera was created,
+    wrapping at 100. It is derived from the monotonic clock when read, so
+    cameras need no thread of their own to keep it ticking.
     """
 
     RETURN_SIZE = 500
     SOURCE_SIZE = 200
+    TIME_WRAP = 100
 
     def __init__(self):
         """Initialize the camera device."""
-        super().__init__(daemon=True)
-
         self.camera_id = 0
-        self.time = 0
+        self._epoch = monotonic()
         self.pan = 0
         self.zoom = 2
         self.img_source = None
+        self.source_key = None
         self.center_width = 0
         self.center_height = 0
-        self._running = True
         self._lock = threading.Lock()
         # Font was previously missing; using a default PIL font prevents
         # AttributeError in getView
-        self.font = ImageFont.load_default()
+        self.font = CAPTION_FONT
 
-        self.start()
+    @property
+    def time(self):
+        """Seconds since the camera started, wrapping at TIME_WRAP."""
+        return int(monotonic() - self._epoch) % self.TIME_WRAP
+
+    @time.setter
+    def time(self, value):
+        self._epoch = monotonic() - value
 
     def set_id(self, id_):
         """Set the camera ID and load associated image (synchronized).
@@ -44,16 +257,21 @@ class DeviceCamera(threading.Thread, InterfaceCamera):
         """
         with self._lock:
             self.camera_id = id_
-            file_name = f"camera{id_}.jpg"
+            file_name = _source_file_name(id_)
 
-            try:
-                self.img_source = Image.open(file_name)
-                self.center_width = self.img_source.width // 2
-                self.center_height = self.img_source.height // 2
-            except FileNotFoundError:
+            # Decoded up front: views are rendered without the camera lock,
+            # and decoding a lazily opened image from two threads is unsafe.
+            # The pixels are shared with every other user of the source.
+            source = preload_source(id_)
+            if source is None:
                 self.img_source = None
+                self.source_key = None
                 print(f"ERROR: {file_name} file open error")
                 return
+            self.img_source = source.image()
+            self.source_key = source.key
+            self.center_width = self.img_source.width // 2
+            self.center_height = self.img_source.height // 2
 
     def get_id(self):
         """Get the camera ID.
@@ -63,70 +281,73 @@ class DeviceCamera(threading.Thread, InterfaceCamera):
         """
         return self.camera_id
 
+    def get_view_state(self):
+        """Get the pan, zoom and time the next view would show (synchronized).
+
+        Returns:
+            tuple: (pan, zoom, time) read in one critical section.
+        """
+        with self._lock:
+            return self.pan, self.zoom, self.time
+
     def get_view(self):
         """Get the current camera view as a PIL Image (synchronized).
 
         Returns:
             PIL.Image: The current camera view image.
         """
-        with self._lock:
-            view = "Time = "
-            if self.time < 10:
-                view += "0"
-            view += f"{self.time}, zoom x{self.zoom}, "
-
-            if self.pan > 0:
-                view += f"right {self.pan}"
-            elif self.pan == 0:
-                view += "center"
-            else:
-                view += f"left {-self.pan}"
-
-            # Create the view image (500x500)
-            img_view = Image.new("RGB", (self.RETURN_SIZE, self.RETURN_SIZE), "black")
-
-            if self.img_source is not None:
-                zoomed = self.SOURCE_SIZE * (10 - self.zoom) // 10
-                panned = self.pan * self.SOURCE_SIZE // 5
-
-                left = self.center_width + panned - zoomed
-                top = self.center_height - zoomed
-                right = self.center_width + panned + zoomed
-                bottom = self.center_height + zoomed
-
-                # Crop and resize to fill the view
-                try:
-                    cropped = self.img_source.crop((left, top, right, bottom))
-                    resized = cropped.resize(
-                        (self.RETURN_SIZE, self.RETURN_SIZE), Image.LANCZOS
-                    )
-                    img_view.paste(resized, (0, 0))
-                except Exception:
-                    # If crop fails, keep black background
-                    pass
-
-            draw = ImageDraw.Draw(img_view)
-
-            # Get text size
-            bbox = draw.textbbox((0, 0), view, font=self.font)
-            w_text = bbox[2] - bbox[0]
-            h_text = bbox[3] - bbox[1]
-
-            # Draw rounded rectangle background (gray)
-            r_x = 0
-            r_y = 0
-            draw.rounded_rectangle(
-                [(r_x, r_y), (r_x + w_text + 10, r_y + h_text + 5)],
-                radius=h_text // 2,
-                fill="gray",
+        return self.render_view(*self.get_view_state())
+
+    def render_view(
+        self, pan, zoom, current_time, size=None, quality="full", caption=True
+    ):
+        """Render the view for the given pan, zoom and time.
+
+        The view is rendered straight to the requested size in one pass.
+        The default 500x500 full-quality view of each pan/zoom position is
+        rendered once and shared by all cameras with the same source; views
+        smaller than their crop of the source, such as thumbnails and
+        previews, are rendered from a reduced decode of the source; and
+        captions are pasted from pre-rendered sprites, so a call is a copy
+        and a paste. Needs no lock, so several views of the same camera can
+        be rendered at once.
+
+        Args:
+            pan: Pan position (-5 to 5).
+            zoom: Zoom level (1 to 9).
+            current_time: Camera time shown in the caption.
+            size: Optional (width, height), defaults to RETURN_SIZE square.
+            quality: One of QUALITY_TIERS: "fast" (nearest neighbour) or
+                "preview" (bilinear) for live previews, "full" (LANCZOS)
+                for stills.
+            caption: Draw the time/zoom/pan caption; video analytics turn
+                it off so the ticking time is not seen as motion.
+
+        Returns:
+            PIL.Image: The camera view image.
+        """
+        resample = QUALITY_TIERS[quality]
+        if size is None:
+            size = (self.RETURN_SIZE, self.RETURN_SIZE)
+
+        cacheable = size == (self.RETURN_SIZE, self.RETURN_SIZE) and quality == "full"
+        if self.img_source is not None and cacheable:
+            img_view = _base_view(self.source_key, self.img_source, pan, zoom)
+            img_view = img_view.copy()
+        elif self.img_source is not None:
+            img_source = _reduced_source(self.source_key, self.img_source, zoom, size)
+            img_view = _render_base_view(
+                img_source, pan, zoom, size, resample, self.img_source.size
             )
+        else:
+            img_view = _render_base_view(None, pan, zoom, size, resample)
 
-            # Draw text (cyan)
-            x_text = r_x + 5
-            y_text = r_y + 2
-            draw.text((x_text, y_text), view, fill="cyan", font=self.font)
+        if caption:
+            # The caption is pasted from a pre-rendered sprite
+            sprite, mask = _caption_sprite(_caption_text(pan, zoom, current_time))
+            img_view.paste(sprite, (0, 0), mask)
 
-            return img_view
+        return img_view
 
     def pan_right(self):
         """Pan camera to the right (synchronized).
@@ -180,22 +401,30 @@ class DeviceCamera(threading.Thread, InterfaceCamera):
                 return False
             return True
 
-    def _tick(self):
-        """Increment time counter (synchronized, private)."""
+    def set_position(self, pan=None, zoom=None):
+        """Move to an absolute position (synchronized).
+
+        Both axes change under one lock acquisition, so no viewer ever sees
+        a move half applied.
+
+        Args:
+            pan: Target pan position, or None to keep the current one
+            zoom: Target zoom level, or None to keep the current one
+
+        Returns:
+            tuple: (pan, zoom) after clamping to PAN_POSITIONS and
+            ZOOM_LEVELS.
+        """
         with self._lock:
-            self.time += 1
-            if self.time >= 100:
-                self.time = 0
-
-    def run(self):
-        """Thread run method - updates time every second."""
-        while self._running:
-            try:
-                time.sleep(1.0)
-            except InterruptedError:
-                pass
-            self._tick()
+            if pan is not None:
+                self.pan = min(max(pan, PAN_POSITIONS[0]), PAN_POSITIONS[-1])
+            if zoom is not None:
+                self.zoom = min(max(zoom, ZOOM_LEVELS[0]), ZOOM_LEVELS[-1])
+            return self.pan, self.zoom
 
     def stop(self):
-        """Stop the camera thread."""
-        self._running = False
+        """Stop the camera.
+
+        The camera no longer runs a thread, so there is nothing to release;
+        kept so existing callers keep working.
+        """
@@ -0,0 +1,91 @@
+"""Process-wide cache of decoded images."""
+
+import os
+import threading
+from typing import NamedTuple
+
+from PIL import Image
+
+
+class DecodedImage(NamedTuple):
+    """Decoded pixels of an image file.
+
+    ``data`` is an immutable bytes object in RGBX layout, so every image
+    made from it by ``image()`` shares the same memory.
+    """
+
+    key: tuple  # (absolute path, mtime_ns, reduce)
+    size: tuple[int, int]
+    data: bytes
+
+    def image(self):
+        """Return a read-only PIL image backed by the shared buffer.
+
+        PIL copies the pixels the first time the image is modified, so
+        callers may draw on it without affecting other users.
+        """
+        return Image.frombuffer("RGBX", self.size, self.data, "raw", "RGBX", 0, 1)
+
+
+# Scales JPEG draft mode can decode at
+DRAFT_REDUCTIONS = (1, 2, 4, 8)
+
+_cache: dict[tuple, DecodedImage] = {}
+_lock = threading.Lock()
+
+
+def load(path, reduce: int = 1) -> DecodedImage:
+    """Return the decoded pixels of an image file, decoding it at most once.
+
+    Entries are keyed by path, modification time and scale, so a replaced
+    file is decoded again. With reduce, JPEG files are decoded in draft
+    mode at 1/reduce of their size, which is much cheaper than a full
+    decode and gives renders of small views fewer pixels to resample.
+    Other formats are always decoded at full size.
+
+    Args:
+        path: Image file path
+        reduce: One of DRAFT_REDUCTIONS
+
+    Raises:
+        FileNotFoundError: If the file does not exist.
+    """
+    path = os.path.abspath(path)
+    mtime_ns = os.stat(path).st_mtime_ns
+    key = (path, mtime_ns, reduce)
+    with _lock:
+        decoded = _cache.get(key)
+    if decoded is not None:
+        return decoded
+
+    with Image.open(path) as img:
+        if reduce > 1 and img.format == "JPEG":
+            width, height = img.size
+            img.draft("RGB", (width // reduce, height // reduce))
+        data = img.convert("RGBX").tobytes()
+        decoded = DecodedImage(key, img.size, data)
+
+    with _lock:
+        # Drop entries for older versions of the same file and scale
+        for old in [k for k in _cache if k[0] == path and k[2] == reduce]:
+            del _cache[old]
+        return _cache.setdefault(key, decoded)
+
+
+def load_image(path, reduce: int = 1):
+    """Return a read-only PIL image of a file from the cache.
+
+    Args:
+        path: Image file path
+        reduce: One of DRAFT_REDUCTIONS
+
+    Raises:
+        FileNotFoundError: If the file does not exist.
+    """
+    return load(path, reduce).image()
+
+
+def clear() -> None:
+    """Forget every decoded image."""
+    with _lock:
+        _cache.clear()
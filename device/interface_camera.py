@@ -40,3 +40,12 @@ class InterfaceCamera(ABC):
     def zoom_out(self):
         """Zoom out. Returns True if successful."""
         pass
+
+    @abstractmethod
+    def set_position(self, pan=None, zoom=None):
+        """Move to an absolute pan and zoom in one step.
+
+        Values outside the camera's range are clamped. Returns the
+        resulting (pan, zoom).
+        """
+        pass
@@ -1,5 +1,6 @@
 """API client for surveillance operations."""
 
+from collections.abc import Iterator
 from typing import Optional
 
 import requests
@@ -33,15 +34,26 @@ class SurveillanceAPIClient:
             error_detail = response.json().get("detail", "Failed to list cameras")
             raise requests.HTTPError(f"{response.status_code}: {error_detail}")
 
-    def get_camera_view(self, camera_id: int, password: Optional[str] = None) -> dict:
+    def get_camera_view(
+        self,
+        camera_id: int,
+        password: Optional[str] = None,
+        max_width: Optional[int] = None,
+        quality: Optional[int] = None,
+        fps: Optional[float] = None,
+    ) -> dict:
         """Get camera view with current settings.
 
         Args:
             camera_id: Camera identifier
             password: Optional password if camera is password protected
+            max_width: Optional widest frame the client wants
+            quality: Optional highest encoder quality the client wants
+            fps: Optional highest frame rate for the live view
 
         Returns:
-            Camera view data including base64 image
+            Camera view data including base64 image, and the frame and
+            live URLs of the negotiated delivery level
 
         Raises:
             requests.HTTPException: If request fails
@@ -50,6 +62,12 @@ class SurveillanceAPIClient:
         params = {}
         if password is not None:
             params["password"] = password
+        if max_width is not None:
+            params["max_width"] = max_width
+        if quality is not None:
+            params["quality"] = quality
+        if fps is not None:
+            params["fps"] = fps
         response = requests.get(url, params=params)
         if response.status_code == 200:
             return response.json()
@@ -57,6 +75,145 @@ class SurveillanceAPIClient:
             error_detail = response.json().get("detail", "Failed to get camera view")
             raise requests.HTTPError(f"{response.status_code}: {error_detail}")
 
+    def get_camera_frame(
+        self,
+        camera_id: int,
+        password: Optional[str] = None,
+        size: Optional[int] = None,
+        quality: Optional[int] = None,
+        height: Optional[int] = None,
+        tier: Optional[str] = None,
+    ) -> bytes:
+        """Get the current camera view rendered by the server.
+
+        Args:
+            camera_id: Camera identifier
+            password: Optional password if camera is password protected
+            size: Optional width of the frame in pixels
+            quality: Optional JPEG quality
+            height: Optional height of the frame, defaults to size
+            tier: Optional rendering quality: "fast", "preview" or "full"
+
+        Returns:
+            JPEG-encoded camera view
+
+        Raises:
+            requests.HTTPException: If request fails
+        """
+        url = f"{self.base_url}/surveillance/cameras/{camera_id}/frame"
+        params = {}
+        if password is not None:
+            params["password"] = password
+        if size is not None:
+            params["size"] = size
+        if quality is not None:
+            params["quality"] = quality
+        if height is not None:
+            params["height"] = height
+        if tier is not None:
+            params["tier"] = tier
+        response = requests.get(url, params=params)
+        if response.status_code == 200:
+            return response.content
+        else:
+            error_detail = response.json().get("detail", "Failed to get camera frame")
+            raise requests.HTTPError(f"{response.status_code}: {error_detail}")
+
+    def get_camera_mosaic(
+        self,
+        width: Optional[int] = None,
+        height: Optional[int] = None,
+        tier: Optional[str] = None,
+    ) -> bytes:
+        """Get every viewable camera composed into one image by the server.
+
+        Args:
+            width: Optional width of the mosaic in pixels
+            height: Optional height of the mosaic in pixels
+            tier: Optional rendering quality: "fast", "preview" or "full"
+
+        Returns:
+            JPEG-encoded mosaic
+
+        Raises:
+            requests.HTTPException: If request fails
+        """
+        url = f"{self.base_url}/surveillance/mosaic"
+        params = {}
+        if width is not None:
+            params["width"] = width
+        if height is not None:
+            params["height"] = height
+        if tier is not None:
+            params["tier"] = tier
+        response = requests.get(url, params=params)
+        if response.status_code == 200:
+            return response.content
+        else:
+            error_detail = response.json().get("detail", "Failed to get camera mosaic")
+            raise requests.HTTPError(f"{response.status_code}: {error_detail}")
+
+    def stream_camera_frames(
+        self,
+        camera_id: int,
+        password: Optional[str] = None,
+        fps: Optional[float] = None,
+        size: Optional[int] = None,
+        height: Optional[int] = None,
+        max_width: Optional[int] = None,
+        adaptive: bool = False,
+    ) -> Iterator[dict]:
+        """Iterate over the live MJPEG stream of a camera.
+
+        Args:
+            camera_id: Camera identifier
+            password: Optional password if camera is password protected
+            fps: Optional maximum frames per second
+            size: Optional width of the frames in pixels
+            height: Optional height of the frames, defaults to size
+            max_width: Optional widest frame, to negotiate a delivery level
+            adaptive: Let the server lower the level while we fall behind
+
+        Yields:
+            Dictionaries with the JPEG "frame", the "pan_position",
+            "zoom_level" and "current_time" it shows, and its
+            "delivery_level" (None unless negotiated)
+
+        Raises:
+            requests.HTTPException: If request fails
+        """
+        url = f"{self.base_url}/surveillance/cameras/{camera_id}/stream"
+        params = {}
+        if password is not None:
+            params["password"] = password
+        if fps is not None:
+            params["fps"] = fps
+        if size is not None:
+            params["size"] = size
+        if height is not None:
+            params["height"] = height
+        if max_width is not None:
+            params["max_width"] = max_width
+        if adaptive:
+            params["adaptive"] = "true"
+        response = requests.get(url, params=params, stream=True)
+        if response.status_code != 200:
+            error_detail = response.json().get("detail", "Failed to stream camera")
+            raise requests.HTTPError(f"{response.status_code}: {error_detail}")
+
+        with response:
+            # chunk_size=None yields data as soon as it arrives, so frames
+            # are shown without waiting for a read buffer to fill up.
+            chunks = response.iter_content(chunk_size=None)
+            for headers, frame in _iter_multipart(chunks):
+                yield {
+                    "frame": frame,
+                    "pan_position": int(headers.get("x-camera-pan", 0)),
+                    "zoom_level": int(headers.get("x-camera-zoom", 2)),
+                    "current_time": int(headers.get("x-camera-time", 0)),
+                    "delivery_level": headers.get("x-delivery-level"),
+                }
+
     def control_camera_ptz(
         self, camera_id: int, pan: Optional[int] = None, zoom: Optional[int] = None
     ) -> dict:
@@ -155,6 +312,25 @@ class SurveillanceAPIClient:
             error_detail = response.json().get("detail", "Failed to get thumbnails")
             raise requests.HTTPError(f"{response.status_code}: {error_detail}")
 
+    def get_thumbnail_image(self, image_url: str) -> bytes:
+        """Download a thumbnail image.
+
+        Args:
+            image_url: Path returned in a thumbnail's image_url
+
+        Returns:
+            JPEG-encoded thumbnail
+
+        Raises:
+            requests.HTTPException: If request fails
+        """
+        response = requests.get(f"{self.base_url}{image_url}")
+        if response.status_code == 200:
+            return response.content
+        else:
+            error_detail = response.json().get("detail", "Failed to get thumbnail")
+            raise requests.HTTPError(f"{response.status_code}: {error_detail}")
+
     def enable_camera(self, camera_id: int) -> dict:
         """Enable a camera.
 
@@ -406,3 +582,29 @@ class SurveillanceAPIClient:
         else:
             error_detail = response.json().get("detail", "Failed to get sensor status")
             raise requests.HTTPError(f"{response.status_code}: {error_detail}")
+
+
+def _iter_multipart(chunks: Iterator[bytes]) -> Iterator[tuple[dict, bytes]]:
+    """Split a multipart/x-mixed-replace body into (headers, body) parts.
+
+    Every part must carry a Content-Length header. Header names are
+    lower-cased.
+    """
+    buf = b""
+    for chunk in chunks:
+        buf += chunk
+        while True:
+            head_end = buf.find(b"\r\n\r\n")
+            if head_end < 0:
+                break
+            lines = buf[:head_end].strip().split(b"\r\n")
+            headers = {}
+            for line in lines[1:]:
+                name, _, value = line.decode("latin-1").partition(":")
+                headers[name.strip().lower()] = value.strip()
+            start = head_end + 4
+            end = start + int(headers["content-length"])
+            if len(buf) < end:
+                break
+            yield headers, buf[start:end]
+            buf = buf[end:]
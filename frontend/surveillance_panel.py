@@ -1,10 +1,12 @@
 """Surveillance panel for camera management."""
 
+import threading
 import tkinter as tk
+from io import BytesIO
 from pathlib import Path
 from tkinter import messagebox, simpledialog, ttk
 
-from PIL import Image, ImageDraw, ImageFont, ImageTk
+from PIL import Image, ImageTk
 
 from .api_client import APIClient
 from .sensor_panel import SensorPanel
@@ -13,6 +15,10 @@ from .sensor_panel import SensorPanel
 class SurveillancePanel(ttk.Frame):
     """Panel for surveillance camera management."""
 
+    LIVE_VIEW_FPS = 5
+    # Pan/zoom clicks within this many milliseconds are sent as one move
+    PTZ_DEBOUNCE_MS = 250
+
     def __init__(self, parent, app):
         """Initialize the surveillance panel."""
         super().__init__(parent)
@@ -27,6 +33,20 @@ class SurveillancePanel(ttk.Frame):
         self.current_zoom = 2
         self.camera_passwords = {}
         self.thumbnails_loaded = 0
+        self.thumbnail_images = {}
+
+        # Live view: a reader thread keeps only the newest streamed frame and
+        # the Tk loop draws it, so a slow UI drops frames instead of lagging.
+        self.live_view_stop = None
+        self.live_frame = None
+        self.live_frame_lock = threading.Lock()
+        self.camera_image_item = None
+        self.camera_info_item = None
+
+        # PTZ clicks update the target locally and are sent once the user
+        # pauses, so a burst of clicks costs one request.
+        self.ptz_target = {}
+        self.ptz_after_id = None
 
         self.setup_ui()
         self.load_cameras()
@@ -121,6 +141,14 @@ class SurveillancePanel(ttk.Frame):
         )
         thumbnail_btn.pack(pady=2)
 
+        mosaic_btn = ttk.Button(
+            control_frame,
+            text="View All Cameras",
+            command=self.show_mosaic,
+            width=18,
+        )
+        mosaic_btn.pack(pady=2)
+
         sensor_btn = ttk.Button(
             control_frame,
             text="Sensor Management",
@@ -296,12 +324,14 @@ class SurveillancePanel(ttk.Frame):
             self.current_camera = cam_id
             self.load_camera_view(cam_id, password)
 
-    def load_camera_view(self, cam_id, password=None):
+    def load_camera_view(self, cam_id, password=None, tier="full"):
         """Load and display the camera view from API.
 
         Args:
             cam_id: Camera identifier
             password: Optional password if camera is password protected
+            tier: Rendering quality of the first frame; "preview" is cheaper
+                and is used while the camera is being moved
         """
         try:
             response = self.api_client.get_camera_view(cam_id, password=password)
@@ -313,53 +343,27 @@ class SurveillancePanel(ttk.Frame):
             self.pan_label.config(text=str(self.current_pan))
 
             self.camera_canvas.delete("all")
+            self.camera_image_item = None
 
-            image_url = response.get("image_url")
-            if image_url:
-                try:
-                    filename = image_url.split("/")[-1]
-                    image_path = self.project_root / filename
-
-                    if image_path.exists():
-                        source_img = Image.open(str(image_path))
-                        view_img = self._generate_camera_view(
-                            source_img, self.current_pan, self.current_zoom
-                        )
-
-                        canvas_width = self.camera_canvas.winfo_width()
-                        canvas_height = self.camera_canvas.winfo_height()
-                        if canvas_width > 1 and canvas_height > 1:
-                            view_img = view_img.resize(
-                                (canvas_width, canvas_height), Image.Resampling.LANCZOS
-                            )
-                        else:
-                            view_img = view_img.resize(
-                                (640, 480), Image.Resampling.LANCZOS
-                            )
-
-                        self.camera_image = ImageTk.PhotoImage(view_img)
-                        self.camera_canvas.create_image(
-                            canvas_width // 2 if canvas_width > 1 else 320,
-                            canvas_height // 2 if canvas_height > 1 else 240,
-                            image=self.camera_image,
-                            anchor=tk.CENTER,
-                        )
-                    else:
-                        self.camera_canvas.create_text(
-                            320,
-                            240,
-                            text=f"Image not found: {filename}",
-                            fill="white",
-                            font=("Arial", 14),
-                        )
-                except Exception as e:
-                    self.camera_canvas.create_text(
-                        320,
-                        240,
-                        text=f"Failed to load image: {str(e)}",
-                        fill="white",
-                        font=("Arial", 14),
-                    )
+            try:
+                # The server renders the view; only scale it to the canvas
+                canvas_width, canvas_height = self._canvas_size()
+                frame = self.api_client.get_camera_frame(
+                    cam_id,
+                    password=password,
+                    size=canvas_width,
+                    height=canvas_height,
+                    tier=tier,
+                )
+                self._draw_frame(frame)
+            except Exception as e:
+                self.camera_canvas.create_text(
+                    320,
+                    240,
+                    text=f"Failed to load image: {str(e)}",
+                    fill="white",
+                    font=("Arial", 14),
+                )
 
             # Display camera info
             self.camera_canvas.create_text(
@@ -374,7 +378,7 @@ class SurveillancePanel(ttk.Frame):
                 f"Pan: {self.current_pan}, Zoom: {self.current_zoom}, "
                 f"Time: {response.get('current_time', 0)}"
             )
-            self.camera_canvas.create_text(
+            self.camera_info_item = self.camera_canvas.create_text(
                 10,
                 30,
                 text=info_text,
@@ -383,7 +387,10 @@ class SurveillancePanel(ttk.Frame):
                 anchor=tk.NW,
             )
 
+            self.start_live_view(cam_id, password)
+
         except Exception as e:
+            self.stop_live_view()
             error_message = str(e)
             if "400" in error_message:
                 messagebox.showerror("Error", "Camera is disabled")
@@ -421,6 +428,122 @@ class SurveillancePanel(ttk.Frame):
                 font=("Arial", 14),
             )
 
+    def _canvas_size(self):
+        """Return the camera canvas size, or 640x480 before it is mapped."""
+        canvas_width = self.camera_canvas.winfo_width()
+        canvas_height = self.camera_canvas.winfo_height()
+        if canvas_width <= 1 or canvas_height <= 1:
+            return 640, 480
+        return canvas_width, canvas_height
+
+    def _draw_frame(self, frame):
+        """Draw an encoded camera frame, scaled to the canvas if needed.
+
+        Frames are requested at the canvas size, so they are only resized
+        when the canvas changed size since the request.
+
+        Args:
+            frame: JPEG bytes from the backend
+        """
+        canvas_width, canvas_height = self._canvas_size()
+        view_img = Image.open(BytesIO(frame))
+        if view_img.size != (canvas_width, canvas_height):
+            view_img = view_img.resize(
+                (canvas_width, canvas_height), Image.Resampling.BILINEAR
+            )
+
+        self.camera_image = ImageTk.PhotoImage(view_img)
+        if self.camera_image_item is not None:
+            self.camera_canvas.itemconfig(
+                self.camera_image_item, image=self.camera_image
+            )
+            return
+        self.camera_image_item = self.camera_canvas.create_image(
+            canvas_width // 2,
+            canvas_height // 2,
+            image=self.camera_image,
+            anchor=tk.CENTER,
+        )
+        self.camera_canvas.tag_lower(self.camera_image_item)
+
+    def start_live_view(self, cam_id, password=None):
+        """Start streaming the camera view onto the canvas.
+
+        Args:
+            cam_id: Camera identifier
+            password: Optional password if camera is password protected
+        """
+        self.stop_live_view()
+        stop = threading.Event()
+        self.live_view_stop = stop
+        threading.Thread(
+            target=self._read_live_stream,
+            args=(cam_id, password, self._canvas_size(), stop),
+            daemon=True,
+        ).start()
+        self.after(1000 // self.LIVE_VIEW_FPS, self._show_live_frame, stop)
+
+    def stop_live_view(self):
+        """Stop the live view, if any."""
+        if self.live_view_stop is not None:
+            self.live_view_stop.set()
+            self.live_view_stop = None
+        with self.live_frame_lock:
+            self.live_frame = None
+
+    def _read_live_stream(self, cam_id, password, size, stop):
+        """Keep the newest streamed frame (runs on the reader thread)."""
+        try:
+            width, height = size
+            for update in self.api_client.stream_camera_frames(
+                cam_id,
+                password=password,
+                fps=self.LIVE_VIEW_FPS,
+                size=width,
+                height=height,
+            ):
+                if stop.is_set():
+                    return
+                with self.live_frame_lock:
+                    self.live_frame = update
+        except Exception:
+            # The last frame stays on screen; selecting the camera retries
+            stop.set()
+
+    def _show_live_frame(self, stop):
+        """Draw the newest streamed frame (runs on the Tk loop)."""
+        if stop.is_set():
+            return
+        with self.live_frame_lock:
+            update, self.live_frame = self.live_frame, None
+        if update is not None:
+            try:
+                self._draw_frame(update["frame"])
+                # Keep the locally chosen target while a move is pending
+                if not self.ptz_target:
+                    self.current_pan = update["pan_position"]
+                    self.current_zoom = update["zoom_level"]
+                    self.pan_label.config(text=str(self.current_pan))
+                    self.zoom_label.config(text=str(self.current_zoom))
+                self.camera_canvas.itemconfig(
+                    self.camera_info_item,
+                    text=(
+                        f"Pan: {self.current_pan}, Zoom: {self.current_zoom}, "
+                        f"Time: {update['current_time']}"
+                    ),
+                )
+            except Exception:
+                pass
+        self.after(1000 // self.LIVE_VIEW_FPS, self._show_live_frame, stop)
+
+    def destroy(self):
+        """Stop the live view and pending PTZ move before destroying the panel."""
+        self.stop_live_view()
+        if self.ptz_after_id is not None:
+            self.after_cancel(self.ptz_after_id)
+            self.ptz_after_id = None
+        super().destroy()
+
     def adjust_zoom(self, direction):
         """Adjust zoom level (1 = zoom in, -1 = zoom out)."""
         if not self.current_camera:
@@ -433,35 +556,19 @@ class SurveillancePanel(ttk.Frame):
         else:
             new_zoom = max(1, self.current_zoom - 1)
 
-        try:
-            response = self.api_client.control_camera_ptz(
-                self.current_camera, zoom=new_zoom
-            )
-            self.current_zoom = response.get("zoom_level", self.current_zoom)
-            self.zoom_label.config(text=str(self.current_zoom))
-            if response.get("success"):
-                password = self.camera_passwords.get(self.current_camera)
-                self.load_camera_view(self.current_camera, password=password)
-            else:
-                messagebox.showwarning(
-                    "Warning", response.get("message", "Zoom limit reached")
-                )
-        except Exception as e:
-            error_message = str(e)
-            if "Connection" in error_message or "refused" in error_message.lower():
-                messagebox.showerror(
-                    "Error",
-                    "Cannot connect to backend server. "
-                    "Please ensure the backend is running.",
-                )
-            else:
-                messagebox.showerror("Error", f"Failed to adjust zoom: {error_message}")
+        if new_zoom == self.current_zoom:
+            messagebox.showwarning("Warning", "Zoom limit reached")
+            return
+        self.current_zoom = new_zoom
+        self.zoom_label.config(text=str(self.current_zoom))
+        self._queue_ptz(zoom=new_zoom)
 
     def reset_zoom(self):
         """Reset zoom to default."""
         if not self.current_camera:
             return
 
+        self.ptz_target.pop("zoom", None)
         try:
             response = self.api_client.control_camera_ptz(self.current_camera, zoom=2)
             self.current_zoom = response.get("zoom_level", 2)
@@ -488,19 +595,45 @@ class SurveillancePanel(ttk.Frame):
         new_pan = self.current_pan + direction
         new_pan = max(-5, min(5, new_pan))
 
+        if new_pan == self.current_pan:
+            messagebox.showwarning("Warning", "Pan limit reached")
+            return
+        self.current_pan = new_pan
+        self.pan_label.config(text=str(self.current_pan))
+        self._queue_ptz(pan=new_pan)
+
+    def _queue_ptz(self, **target):
+        """Merge a pan and/or zoom target and (re)start the debounce timer."""
+        if self.ptz_target.get("camera_id") != self.current_camera:
+            self.ptz_target = {"camera_id": self.current_camera}
+        self.ptz_target.update(target)
+        if self.ptz_after_id is not None:
+            self.after_cancel(self.ptz_after_id)
+        self.ptz_after_id = self.after(self.PTZ_DEBOUNCE_MS, self._send_ptz)
+
+    def _send_ptz(self):
+        """Send the debounced PTZ target as a single move."""
+        self.ptz_after_id = None
+        target, self.ptz_target = self.ptz_target, {}
+        cam_id = target.pop("camera_id", None)
+        if not target or cam_id != self.current_camera:
+            return
+
         try:
-            response = self.api_client.control_camera_ptz(
-                self.current_camera, pan=new_pan
-            )
+            response = self.api_client.control_camera_ptz(cam_id, **target)
             self.current_pan = response.get("pan_position", self.current_pan)
+            self.current_zoom = response.get("zoom_level", self.current_zoom)
             self.pan_label.config(text=str(self.current_pan))
-            if response.get("success"):
-                password = self.camera_passwords.get(self.current_camera)
-                self.load_camera_view(self.current_camera, password=password)
-            else:
+            self.zoom_label.config(text=str(self.current_zoom))
+            if not response.get("success"):
                 messagebox.showwarning(
-                    "Warning", response.get("message", "Pan limit reached")
+                    "Warning", response.get("message", "PTZ limit reached")
                 )
+            elif self.live_view_stop is None:
+                # Without a live view the moved frame has to be fetched;
+                # a running stream receives it from the backend.
+                password = self.camera_passwords.get(cam_id)
+                self.load_camera_view(cam_id, password=password, tier="preview")
         except Exception as e:
             error_message = str(e)
             if "Connection" in error_message or "refused" in error_message.lower():
@@ -510,13 +643,14 @@ class SurveillancePanel(ttk.Frame):
                     "Please ensure the backend is running.",
                 )
             else:
-                messagebox.showerror("Error", f"Failed to adjust pan: {error_message}")
+                messagebox.showerror("Error", f"Failed to move camera: {error_message}")
 
     def reset_pan(self):
         """Reset pan to center."""
         if not self.current_camera:
             return
 
+        self.ptz_target.pop("pan", None)
         try:
             response = self.api_client.control_camera_ptz(self.current_camera, pan=0)
             self.current_pan = response.get("pan_position", 0)
@@ -535,80 +669,6 @@ class SurveillancePanel(ttk.Frame):
             else:
                 messagebox.showerror("Error", f"Failed to reset pan: {error_message}")
 
-    def _generate_camera_view(
-        self, source_img: Image.Image, pan: int, zoom: int
-    ) -> Image.Image:
-        """Generate camera view based on pan and zoom values.
-
-        This mimics the logic from DeviceCamera.get_view() to generate
-        a view that reflects the current pan/zoom state.
-
-        Args:
-            source_img: Source camera image
-            pan: Pan position (-5 to 5)
-            zoom: Zoom level (1 to 9)
-
-        Returns:
-            PIL Image with pan/zoom applied
-        """
-        return_size = 500
-        source_size = 200
-
-        view_img = Image.new("RGB", (return_size, return_size), "black")
-
-        if source_img:
-            center_width = source_img.width // 2
-            center_height = source_img.height // 2
-
-            zoomed = source_size * (10 - zoom) // 10
-            panned = pan * source_size // 5
-
-            left = center_width + panned - zoomed
-            top = center_height - zoomed
-            right = center_width + panned + zoomed
-            bottom = center_height + zoomed
-
-            try:
-                cropped = source_img.crop((left, top, right, bottom))
-                resized = cropped.resize(
-                    (return_size, return_size), Image.Resampling.LANCZOS
-                )
-                view_img.paste(resized, (0, 0))
-            except Exception:
-                pass
-
-        draw = ImageDraw.Draw(view_img)
-        try:
-            font = ImageFont.load_default()
-        except Exception:
-            font = None
-
-        view_text = f"zoom x{zoom}, "
-        if pan > 0:
-            view_text += f"right {pan}"
-        elif pan == 0:
-            view_text += "center"
-        else:
-            view_text += f"left {-pan}"
-
-        bbox = draw.textbbox((0, 0), view_text, font=font) if font else (0, 0, 100, 20)
-        w_text = bbox[2] - bbox[0]
-        h_text = bbox[3] - bbox[1]
-
-        r_x = 0
-        r_y = 0
-        draw.rounded_rectangle(
-            [(r_x, r_y), (r_x + w_text + 10, r_y + h_text + 5)],
-            radius=h_text // 2,
-            fill="gray",
-        )
-
-        x_text = r_x + 5
-        y_text = r_y + 2
-        draw.text((x_text, y_text), view_text, fill="cyan", font=font)
-
-        return view_img
-
     def enable_camera(self):
         """Enable the selected camera."""
         selected = self.camera_tree.selection()
@@ -811,6 +871,41 @@ class SurveillancePanel(ttk.Frame):
                         "Error", f"Failed to delete password: {error_message}"
                     )
 
+    def show_mosaic(self):
+        """Show every viewable camera in one window, refreshed every second."""
+        mosaic_window = tk.Toplevel(self)
+        mosaic_window.title("All Cameras")
+        mosaic_window.geometry("960x720")
+
+        canvas = tk.Canvas(mosaic_window, bg="black")
+        canvas.pack(fill=tk.BOTH, expand=True)
+        self._refresh_mosaic(mosaic_window, canvas)
+
+    def _refresh_mosaic(self, window, canvas):
+        """Fetch and draw the mosaic, then schedule the next refresh."""
+        if not window.winfo_exists():
+            return
+        width, height = canvas.winfo_width(), canvas.winfo_height()
+        if width <= 1 or height <= 1:
+            width, height = 960, 720
+        try:
+            mosaic = self.api_client.get_camera_mosaic(
+                width=width, height=height, tier="preview"
+            )
+            canvas.image = ImageTk.PhotoImage(Image.open(BytesIO(mosaic)))
+            canvas.delete("all")
+            canvas.create_image(0, 0, image=canvas.image, anchor=tk.NW)
+        except Exception as e:
+            canvas.delete("all")
+            canvas.create_text(
+                width // 2,
+                height // 2,
+                text=f"Failed to load cameras: {e}",
+                fill="white",
+                font=("Arial", 14),
+            )
+        window.after(1000, self._refresh_mosaic, window, canvas)
+
     def show_floor_plan(self):
         """Show the floor plan with camera locations."""
         floor_plan_window = tk.Toplevel(self)
@@ -930,6 +1025,7 @@ class SurveillancePanel(ttk.Frame):
         row = 0
         col = 0
         self.thumbnails_loaded = 0
+        shown_urls = set()
 
         for cam_id, camera in eligible_cameras:
             try:
@@ -948,44 +1044,38 @@ class SurveillancePanel(ttk.Frame):
                 # Load and display thumbnail image
                 image_url = thumb.get("image_url", "")
                 if image_url:
+                    shown_urls.add(image_url)
                     try:
-                        # Extract filename from URL
-                        filename = image_url.split("/")[-1]
-                        image_path = self.project_root / filename
-
-                        if image_path.exists():
-                            # Load and resize thumbnail
-                            img = Image.open(str(image_path))
-                            img.thumbnail((200, 150), Image.Resampling.LANCZOS)
-                            thumb_image = ImageTk.PhotoImage(img)
-
-                            # Create label with image
-                            img_label = ttk.Label(thumb_frame, image=thumb_image)
-                            img_label.image = thumb_image  # Keep a reference
-                            img_label.pack(pady=5)
-
-                            # Make thumbnail clickable
-                            def make_click_handler(cid):
-                                def handler(event):
-                                    self.view_camera_from_thumbnail(
-                                        cid, thumbnail_window
-                                    )
-
-                                return handler
-
-                            img_label.bind("<Button-1>", make_click_handler(cam_id))
-                            thumb_frame.bind("<Button-1>", make_click_handler(cam_id))
-
-                            # Add caption
-                            ttk.Label(
-                                thumb_frame,
-                                text=f"Captured: {thumb.get('captured_at', 'Unknown')}",
-                                font=("Arial", 9),
-                            ).pack()
-                        else:
-                            ttk.Label(
-                                thumb_frame, text=f"Image not found: {filename}"
-                            ).pack()
+                        # Thumbnail URLs are content hashes, so a downloaded
+                        # thumbnail never changes and is kept for reuse
+                        data = self.thumbnail_images.get(image_url)
+                        if data is None:
+                            data = self.api_client.get_thumbnail_image(image_url)
+                            self.thumbnail_images[image_url] = data
+                        img = Image.open(BytesIO(data))
+                        thumb_image = ImageTk.PhotoImage(img)
+
+                        # Create label with image
+                        img_label = ttk.Label(thumb_frame, image=thumb_image)
+                        img_label.image = thumb_image  # Keep a reference
+                        img_label.pack(pady=5)
+
+                        # Make thumbnail clickable
+                        def make_click_handler(cid):
+                            def handler(event):
+                                self.view_camera_from_thumbnail(cid, thumbnail_window)
+
+                            return handler
+
+                        img_label.bind("<Button-1>", make_click_handler(cam_id))
+                        thumb_frame.bind("<Button-1>", make_click_handler(cam_id))
+
+                        # Add caption
+                        ttk.Label(
+                            thumb_frame,
+                            text=f"Captured: {thumb.get('captured_at', 'Unknown')}",
+                            font=("Arial", 9),
+                        ).pack()
                     except Exception as e:
                         ttk.Label(
                             thumb_frame,
@@ -1013,6 +1103,10 @@ class SurveillancePanel(ttk.Frame):
                 # Continue with other cameras if one fails
                 continue
 
+        # Forget thumbnails that were replaced by a newer capture
+        for url in set(self.thumbnail_images) - shown_urls:
+            del self.thumbnail_images[url]
+
         if self.thumbnails_loaded == 0:
             ttk.Label(
                 scrollable_frame,
@@ -1,6 +1,6 @@
 """Tests for surveillance API client."""
 
-from unittest.mock import Mock, patch
+from unittest.mock import MagicMock, Mock, patch
 
 import pytest
 import requests
@@ -94,6 +94,23 @@ class TestSurveillanceAPIClient:
         assert result == {"camera_id": 1, "image_url": "url"}
         mock_get.assert_called_once()
 
+    @patch("frontend.surveillance_api_client.requests.get")
+    def test_get_camera_view_delivery_limits(self, mock_get):
+        """Test passing the client's delivery limits to the view."""
+        mock_response = Mock()
+        mock_response.status_code = 200
+        mock_response.json.return_value = {"camera_id": 1, "delivery_level": "low"}
+        mock_get.return_value = mock_response
+
+        client = SurveillanceAPIClient()
+        result = client.get_camera_view(1, max_width=320, quality=60, fps=5)
+
+        assert result["delivery_level"] == "low"
+        mock_get.assert_called_once_with(
+            "http://localhost:8000/surveillance/cameras/1/view",
+            params={"max_width": 320, "quality": 60, "fps": 5},
+        )
+
     @patch("frontend.surveillance_api_client.requests.get")
     def test_get_camera_view_error(self, mock_get):
         """Test get camera view with error."""
@@ -109,6 +126,170 @@ class TestSurveillanceAPIClient:
         assert "401" in str(exc_info.value)
         assert "Unauthorized" in str(exc_info.value)
 
+    @patch("frontend.surveillance_api_client.requests.get")
+    def test_get_camera_frame_success(self, mock_get):
+        """Test successful get camera frame."""
+        mock_response = Mock()
+        mock_response.status_code = 200
+        mock_response.content = b"jpeg"
+        mock_get.return_value = mock_response
+
+        client = SurveillanceAPIClient()
+        result = client.get_camera_frame(1, "password123", size=320)
+
+        assert result == b"jpeg"
+        mock_get.assert_called_once_with(
+            "http://localhost:8000/surveillance/cameras/1/frame",
+            params={"password": "password123", "size": 320},
+        )
+
+    @patch("frontend.surveillance_api_client.requests.get")
+    def test_get_camera_frame_tier(self, mock_get):
+        """Test requesting a preview frame at a non-square size."""
+        mock_response = Mock()
+        mock_response.status_code = 200
+        mock_response.content = b"jpeg"
+        mock_get.return_value = mock_response
+
+        client = SurveillanceAPIClient()
+        client.get_camera_frame(1, size=640, height=480, tier="preview")
+
+        assert mock_get.call_args.kwargs["params"] == {
+            "size": 640,
+            "height": 480,
+            "tier": "preview",
+        }
+
+    @patch("frontend.surveillance_api_client.requests.get")
+    def test_get_camera_frame_error(self, mock_get):
+        """Test get camera frame with error."""
+        mock_response = Mock()
+        mock_response.status_code = 401
+        mock_response.json.return_value = {}
+        mock_get.return_value = mock_response
+
+        client = SurveillanceAPIClient()
+        with pytest.raises(requests.HTTPError) as exc_info:
+            client.get_camera_frame(1)
+
+        assert "401" in str(exc_info.value)
+        assert "Failed to get camera frame" in str(exc_info.value)
+
+    @patch("frontend.surveillance_api_client.requests.get")
+    def test_get_camera_mosaic_success(self, mock_get):
+        """Test getting the mosaic of all cameras."""
+        mock_response = Mock()
+        mock_response.status_code = 200
+        mock_response.content = b"jpeg"
+        mock_get.return_value = mock_response
+
+        client = SurveillanceAPIClient()
+        result = client.get_camera_mosaic(width=960, height=720, tier="preview")
+
+        assert result == b"jpeg"
+        mock_get.assert_called_once_with(
+            "http://localhost:8000/surveillance/mosaic",
+            params={"width": 960, "height": 720, "tier": "preview"},
+        )
+
+    @patch("frontend.surveillance_api_client.requests.get")
+    def test_get_camera_mosaic_error(self, mock_get):
+        """Test getting the mosaic when no camera can be shown."""
+        mock_response = Mock()
+        mock_response.status_code = 404
+        mock_response.json.return_value = {"detail": "No cameras to show"}
+        mock_get.return_value = mock_response
+
+        client = SurveillanceAPIClient()
+        with pytest.raises(requests.HTTPError) as exc_info:
+            client.get_camera_mosaic()
+
+        assert "404: No cameras to show" in str(exc_info.value)
+
+    @patch("frontend.surveillance_api_client.requests.get")
+    def test_stream_camera_frames(self, mock_get):
+        """Test parsing the MJPEG stream, split across arbitrary chunks."""
+        parts = b""
+        for time, frame in ((1, b"\xff\xd8one"), (2, b"\xff\xd8two")):
+            parts += (
+                b"--frame\r\nContent-Type: image/jpeg\r\n"
+                + f"Content-Length: {len(frame)}\r\n".encode()
+                + b"X-Camera-Pan: -1\r\nX-Camera-Zoom: 4\r\n"
+                + f"X-Camera-Time: {time}\r\n\r\n".encode()
+                + frame
+                + b"\r\n"
+            )
+        mock_response = MagicMock()
+        mock_response.status_code = 200
+        mock_response.iter_content.return_value = [
+            parts[i : i + 7] for i in range(0, len(parts), 7)
+        ]
+        mock_get.return_value = mock_response
+
+        client = SurveillanceAPIClient()
+        updates = list(client.stream_camera_frames(1, fps=5))
+
+        assert [u["frame"] for u in updates] == [b"\xff\xd8one", b"\xff\xd8two"]
+        assert [u["current_time"] for u in updates] == [1, 2]
+        assert updates[0]["pan_position"] == -1
+        assert updates[0]["zoom_level"] == 4
+        assert mock_get.call_args.kwargs == {"params": {"fps": 5}, "stream": True}
+        assert updates[0]["delivery_level"] is None
+
+    @patch("frontend.surveillance_api_client.requests.get")
+    def test_stream_camera_frames_adaptive(self, mock_get):
+        """Test requesting an adaptive stream and reading each part's level."""
+        frame = b"\xff\xd8one"
+        mock_response = MagicMock()
+        mock_response.status_code = 200
+        mock_response.iter_content.return_value = [
+            b"--frame\r\nContent-Type: image/jpeg\r\n"
+            + f"Content-Length: {len(frame)}\r\n".encode()
+            + b"X-Delivery-Level: medium\r\n\r\n"
+            + frame
+            + b"\r\n"
+        ]
+        mock_get.return_value = mock_response
+
+        client = SurveillanceAPIClient()
+        updates = list(client.stream_camera_frames(1, max_width=600, adaptive=True))
+
+        assert [u["delivery_level"] for u in updates] == ["medium"]
+        assert mock_get.call_args.kwargs["params"] == {
+            "max_width": 600,
+            "adaptive": "true",
+        }
+
+    @patch("frontend.surveillance_api_client.requests.get")
+    def test_stream_camera_frames_error(self, mock_get):
+        """Test stream camera frames with error."""
+        mock_response = Mock()
+        mock_response.status_code = 400
+        mock_response.json.return_value = {"detail": "Camera is disabled"}
+        mock_get.return_value = mock_response
+
+        client = SurveillanceAPIClient()
+        with pytest.raises(requests.HTTPError) as exc_info:
+            next(client.stream_camera_frames(3))
+
+        assert "Camera is disabled" in str(exc_info.value)
+
+    @patch("frontend.surveillance_api_client.requests.get")
+    def test_get_thumbnail_image(self, mock_get):
+        """Test downloading a thumbnail image."""
+        mock_response = Mock()
+        mock_response.status_code = 200
+        mock_response.content = b"jpeg"
+        mock_get.return_value = mock_response
+
+        client = SurveillanceAPIClient()
+        result = client.get_thumbnail_image("/surveillance/thumbnails/ab.jpg")
+
+        assert result == b"jpeg"
+        mock_get.assert_called_once_with(
+            "http://localhost:8000/surveillance/thumbnails/ab.jpg"
+        )
+
     @patch("frontend.surveillance_api_client.requests.get")
     def test_get_camera_view_error_no_detail(self, mock_get):
         """Test get camera view with error without detail."""
@@ -123,6 +123,52 @@ class TestSurveillancePanel:
         assert panel.current_zoom >= initial_zoom
         assert panel.current_zoom <= 9
 
+        # The move is sent once the debounce timer fires
+        mock_api_client.control_camera_ptz.assert_not_called()
+        panel._send_ptz()
+        mock_api_client.control_camera_ptz.assert_called_once_with(1, zoom=3)
+
+        root.destroy()
+
+    @patch("frontend.surveillance_panel.messagebox")
+    @patch("frontend.surveillance_panel.APIClient")
+    def test_ptz_clicks_are_debounced(self, mock_api_client_class, mock_messagebox):
+        """Test that a burst of pan/zoom clicks is sent as one move."""
+        mock_api_client = Mock()
+        mock_api_client.list_cameras.return_value = {"cameras": []}
+        mock_api_client.control_camera_ptz.return_value = {
+            "success": False,
+            "message": "Zoom limit reached at 9",
+            "pan_position": 3,
+            "zoom_level": 4,
+        }
+        mock_api_client_class.return_value = mock_api_client
+
+        root = tk.Tk()
+        root.withdraw()
+        app = Mock()
+
+        panel = SurveillancePanel(root, app)
+        panel.current_camera = 1
+        panel.current_pan = 0
+        panel.current_zoom = 2
+
+        for _ in range(3):
+            panel.adjust_pan(1)
+        panel.adjust_zoom(1)
+        panel.adjust_zoom(1)
+        assert panel.pan_label.cget("text") == "3"
+        assert panel.ptz_after_id is not None
+
+        panel._send_ptz()
+        mock_api_client.control_camera_ptz.assert_called_once_with(1, pan=3, zoom=4)
+        mock_messagebox.showwarning.assert_called_once()
+        assert panel.ptz_target == {}
+
+        # Nothing left to send
+        panel._send_ptz()
+        assert mock_api_client.control_camera_ptz.call_count == 1
+
         root.destroy()
 
     @patch("frontend.surveillance_panel.messagebox")
@@ -194,6 +240,9 @@ class TestSurveillancePanel:
         assert panel.current_pan <= 5
         assert panel.current_pan >= -5
 
+        panel._send_ptz()
+        mock_api_client.control_camera_ptz.assert_called_once_with(1, pan=1)
+
         root.destroy()
 
     @patch("frontend.surveillance_panel.messagebox")
@@ -831,6 +880,9 @@ class TestSurveillancePanel:
         panel.adjust_zoom(1)
 
         mock_messagebox.showwarning.assert_called_once()
+        # Already at the limit: nothing is sent
+        assert panel.ptz_after_id is None
+        mock_api_client.control_camera_ptz.assert_not_called()
 
         root.destroy()
 
@@ -900,6 +952,9 @@ class TestSurveillancePanel:
         panel.adjust_pan(1)
 
         mock_messagebox.showwarning.assert_called_once()
+        # Already at the limit: nothing is sent
+        assert panel.ptz_after_id is None
+        mock_api_client.control_camera_ptz.assert_not_called()
 
         root.destroy()
 
@@ -1139,6 +1194,33 @@ class TestSurveillancePanel:
 
         root.destroy()
 
+    @patch("frontend.surveillance_panel.ImageTk")
+    @patch("frontend.surveillance_panel.Image")
+    @patch("frontend.surveillance_panel.messagebox")
+    @patch("frontend.surveillance_panel.APIClient")
+    def test_show_mosaic(
+        self, mock_api_client_class, mock_messagebox, mock_image, mock_imagetk
+    ):
+        """Test showing all cameras as one server-rendered mosaic."""
+        mock_api_client = Mock()
+        mock_api_client.list_cameras.return_value = {"cameras": []}
+        mock_api_client.get_camera_mosaic.return_value = b"jpeg"
+        mock_api_client_class.return_value = mock_api_client
+
+        root = tk.Tk()
+        root.withdraw()
+        app = Mock()
+
+        panel = SurveillancePanel(root, app)
+        panel.show_mosaic()
+
+        mock_api_client.get_camera_mosaic.assert_called_once_with(
+            width=960, height=720, tier="preview"
+        )
+        mock_image.open.assert_called_once()
+
+        root.destroy()
+
     @patch("frontend.surveillance_panel.ImageTk")
     @patch("frontend.surveillance_panel.Image")
     @patch("frontend.surveillance_panel.messagebox")
@@ -1287,32 +1369,67 @@ class TestSurveillancePanel:
         panel = SurveillancePanel(root, app)
         panel.current_camera = 1
 
-        # Mock image file exists
-        mock_img = Mock()
-        mock_img.width = 640
-        mock_img.height = 480
-        mock_image.open.return_value = mock_img
-
-        # Mock _generate_camera_view
+        # The frame is rendered by the server
+        mock_api_client.get_camera_frame.return_value = b"jpeg bytes"
         mock_view_img = Mock()
         mock_view_img.resize = Mock(return_value=mock_view_img)
-        with patch.object(panel, "_generate_camera_view", return_value=mock_view_img):
-            with patch("pathlib.Path.exists", return_value=True):
-                panel.load_camera_view(1)
+        mock_image.open.return_value = mock_view_img
+
+        panel.load_camera_view(1)
 
+        mock_api_client.get_camera_frame.assert_called_once()
+        assert mock_api_client.get_camera_frame.call_args.args == (1,)
         mock_image.open.assert_called()
         mock_view_img.resize.assert_called()
 
         root.destroy()
 
+    @patch("frontend.surveillance_panel.ImageTk")
+    @patch("frontend.surveillance_panel.Image")
+    @patch("frontend.surveillance_panel.APIClient")
+    def test_show_live_frame(self, mock_api_client_class, mock_image, mock_imagetk):
+        """Test that the newest streamed frame is drawn once."""
+        import threading
+
+        mock_api_client = Mock()
+        mock_api_client.list_cameras.return_value = {"cameras": []}
+        mock_api_client_class.return_value = mock_api_client
+
+        root = tk.Tk()
+        root.withdraw()
+        panel = SurveillancePanel(root, Mock())
+        panel.camera_info_item = panel.camera_canvas.create_text(0, 0, text="")
+
+        mock_view_img = Mock()
+        mock_view_img.resize = Mock(return_value=mock_view_img)
+        mock_image.open.return_value = mock_view_img
+        panel.live_frame = {
+            "frame": b"jpeg",
+            "pan_position": 2,
+            "zoom_level": 5,
+            "current_time": 9,
+        }
+
+        stop = threading.Event()
+        panel._show_live_frame(stop)
+        panel._show_live_frame(stop)
+
+        mock_image.open.assert_called_once()
+        assert panel.live_frame is None
+        assert (panel.current_pan, panel.current_zoom) == (2, 5)
+        assert panel.pan_label.cget("text") == "2"
+
+        stop.set()
+        root.destroy()
+
     @patch("frontend.surveillance_panel.ImageTk")
     @patch("frontend.surveillance_panel.Image")
     @patch("frontend.surveillance_panel.messagebox")
     @patch("frontend.surveillance_panel.APIClient")
-    def test_load_camera_view_image_not_found(
+    def test_load_camera_view_frame_error(
         self, mock_api_client_class, mock_messagebox, mock_image, mock_imagetk
     ):
-        """Test load_camera_view with image file not found."""
+        """Test load_camera_view when the frame cannot be fetched."""
         mock_api_client = Mock()
         mock_api_client.list_cameras.return_value = {
             "cameras": [
@@ -1341,11 +1458,12 @@ class TestSurveillancePanel:
         panel = SurveillancePanel(root, app)
         panel.current_camera = 1
 
-        with patch("pathlib.Path.exists", return_value=False):
-            panel.load_camera_view(1)
+        mock_api_client.get_camera_frame.side_effect = Exception("500: Render failed")
+        panel.load_camera_view(1)
 
-        # Should show "Image not found" message on canvas
-        # (We can't easily verify canvas content, but we can verify it doesn't error)
+        # Shown on the canvas instead of as an error dialog
+        mock_messagebox.showerror.assert_not_called()
+        mock_image.open.assert_not_called()
 
         root.destroy()
 
@@ -1385,50 +1503,15 @@ class TestSurveillancePanel:
         panel = SurveillancePanel(root, app)
         panel.current_camera = 1
 
+        mock_api_client.get_camera_frame.return_value = b"not an image"
         mock_image.open.side_effect = Exception("Image load error")
 
-        with patch("pathlib.Path.exists", return_value=True):
-            panel.load_camera_view(1)
+        panel.load_camera_view(1)
 
         # Should handle error gracefully
 
         root.destroy()
 
-    def test_generate_camera_view(self):
-        """Test _generate_camera_view method."""
-        from PIL import Image
-
-        root = tk.Tk()
-        root.withdraw()
-        app = Mock()
-
-        with patch("frontend.surveillance_panel.APIClient") as mock_api:
-            mock_api.return_value.list_cameras.return_value = {"cameras": []}
-            panel = SurveillancePanel(root, app)
-
-            # Create a test image
-            source_img = Image.new("RGB", (400, 300), "blue")
-
-            # Test with different pan/zoom values
-            result = panel._generate_camera_view(source_img, pan=0, zoom=5)
-            assert result is not None
-            assert result.size == (500, 500)
-
-            result = panel._generate_camera_view(source_img, pan=3, zoom=2)
-            assert result is not None
-            assert result.size == (500, 500)
-
-            result = panel._generate_camera_view(source_img, pan=-2, zoom=8)
-            assert result is not None
-            assert result.size == (500, 500)
-
-            # Test with None source image
-            result = panel._generate_camera_view(None, pan=0, zoom=2)
-            assert result is not None
-            assert result.size == (500, 500)
-
-        root.destroy()
-
     @patch("frontend.surveillance_panel.ImageTk")
     @patch("frontend.surveillance_panel.Image")
     @patch("frontend.surveillance_panel.messagebox")
@@ -1451,9 +1534,10 @@ class TestSurveillancePanel:
             ]
         }
         mock_api_client.get_camera_thumbnails.return_value = {
-            "image_url": "/path/to/camera1.jpg",
-            "captured_at": "2024-01-01 12:00:00",
+            "image_url": "/surveillance/thumbnails/0123456789abcdef.jpg",
+            "captured_at": "2024-01-01T12:00:00Z",
         }
+        mock_api_client.get_thumbnail_image.return_value = b"jpeg"
         mock_api_client_class.return_value = mock_api_client
 
         root = tk.Tk()
@@ -1462,12 +1546,25 @@ class TestSurveillancePanel:
 
         panel = SurveillancePanel(root, app)
 
-        mock_img = Mock()
-        mock_img.thumbnail = Mock()
-        mock_image.open.return_value = mock_img
+        panel.show_thumbnails()
+        panel.show_thumbnails()
 
-        with patch("pathlib.Path.exists", return_value=True):
-            panel.show_thumbnails()
+        # Thumbnails are fetched at their final size and downloaded once
+        mock_api_client.get_thumbnail_image.assert_called_once_with(
+            "/surveillance/thumbnails/0123456789abcdef.jpg"
+        )
+        assert mock_image.open.call_count == 2
+        assert panel.thumbnails_loaded == 1
+
+        # A newer capture replaces the cached thumbnail of the old one
+        mock_api_client.get_camera_thumbnails.return_value = {
+            "image_url": "/surveillance/thumbnails/fedcba9876543210.jpg",
+            "captured_at": "2024-01-01T12:05:00Z",
+        }
+        panel.show_thumbnails()
+        assert list(panel.thumbnail_images) == [
+            "/surveillance/thumbnails/fedcba9876543210.jpg"
+        ]
 
         # Should create thumbnail window
         # (We can't easily verify window content, but we can verify it doesn't error)
@@ -0,0 +1,151 @@
+"""GIL versus free-threaded interpreter scaling benchmark.
+
+Runs the same workload on 1, 2, 4, ... ``--max-threads`` threads and
+reports operations per second, once per interpreter given with
+``--python`` (each run in its own subprocess). Pass a regular and a
+free-threaded build of the same Python to compare them, e.g. ``python3.14``
+and ``python3.14t``; by default only the current interpreter runs.
+
+Workloads:
+
+* ``db``: the pure-Python work of the sync paths, i.e. user lookups,
+  camera listing and sensor status reads and updates through the locked
+  databases.
+* ``render``: rendering and JPEG-encoding a 320px camera view, the work
+  of the camera threads.
+
+Usage (from the repository root):
+
+    python -m tests.benchmarks.bench_free_threading --python python3.14 python3.14t
+    python -m tests.benchmarks.bench_free_threading --workload render
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+
+from tests.benchmarks.common import REPO_ROOT
+
+
+def _db_operation(i: int) -> None:
+    from backend.common.device import CameraDB, SensorDB
+    from backend.common.user import UserDB
+
+    UserDB.find_user_by_id("homeowner1")
+    CameraDB.get_all_cameras()
+    sensor_id = i % 2 + 1
+    SensorDB.update_motion_sensor(sensor_id, is_armed=bool(i & 2))
+    SensorDB.get_all_windoor_sensors()
+
+
+def _render_operation(i: int) -> None:
+    from backend.surveillance.frames import encode_image
+
+    camera = _cameras[i % len(_cameras)]
+    img = camera.render_view(i % 11 - 5, i % 9 + 1, i % 100, (320, 320), "preview")
+    encode_image(img, "jpeg", 80)
+
+
+_cameras = []
+
+
+def _run(workload: str, threads: int, duration: float) -> float:
+    """Return operations per second of workload on threads threads."""
+    operation = _db_operation if workload == "db" else _render_operation
+    counts = [0] * threads
+    start_barrier = threading.Barrier(threads + 1)
+    stop = threading.Event()
+
+    def worker(index: int) -> None:
+        start_barrier.wait()
+        i = index
+        while not stop.is_set():
+            operation(i)
+            i += threads
+            counts[index] += 1
+
+    pool = [threading.Thread(target=worker, args=(n,)) for n in range(threads)]
+    for thread in pool:
+        thread.start()
+    start_barrier.wait()
+    start = time.perf_counter()
+    time.sleep(duration)
+    stop.set()
+    for thread in pool:
+        thread.join()
+    return sum(counts) / (time.perf_counter() - start)
+
+
+def _measure(args) -> None:
+    """Run the workload in this interpreter and print JSON results."""
+    os.chdir(REPO_ROOT)
+    if args.workload == "render":
+        from device.device_camera import DeviceCamera
+
+        for camera_id in (1, 2, 3):
+            camera = DeviceCamera()
+            camera.set_id(camera_id)
+            _cameras.append(camera)
+    _run(args.workload, 1, 0.2)  # Warm up
+
+    results = {}
+    threads = 1
+    while threads <= args.max_threads:
+        results[threads] = _run(args.workload, threads, args.duration)
+        threads *= 2
+    gil = getattr(sys, "_is_gil_enabled", lambda: True)()
+    print(json.dumps({"gil": gil, "results": results}))
+
+
+def main():
+    """Run the benchmark from the command line."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workload", choices=("db", "render"), default="db")
+    parser.add_argument("--python", nargs="+", default=[sys.executable])
+    parser.add_argument("--max-threads", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=2.0)
+    parser.add_argument("--measure", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.measure:
+        _measure(args)
+        return
+
+    print(f"{args.workload} workload, {os.cpu_count()} CPUs")
+    for python in args.python:
+        output = subprocess.run(
+            [
+                python,
+                "-m",
+                "tests.benchmarks.bench_free_threading",
+                "--measure",
+                "--workload",
+                args.workload,
+                "--max-threads",
+                str(args.max_threads),
+                "--duration",
+                str(args.duration),
+            ],
+            cwd=REPO_ROOT,
+            check=True,
+            capture_output=True,
+            text=True,
+        ).stdout
+        measured = json.loads(output.splitlines()[-1])
+        results = measured["results"]
+        single = results["1"]
+        label = "GIL" if measured["gil"] else "free-threaded"
+        print(f"{python} ({label}):")
+        for threads, ops in results.items():
+            print(
+                f"  {int(threads):2d} threads: {ops:10.0f} ops/s "
+                f"({ops / single:.2f}x one thread)"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""Motion detection benchmark.
+
+Runs ``MotionDetector`` over ``--cameras`` simulated cameras on one core
+and reports how long sampling (rendering each view at the analysis size)
+and the batched NumPy detection take per round. From that it derives how
+many cameras one core can watch at the monitor's sample rate.
+
+Usage (from the repository root):
+
+    python -m tests.benchmarks.bench_motion --cameras 48 --rounds 50
+"""
+
+import argparse
+import itertools
+import os
+import statistics
+import time
+
+from tests.benchmarks.common import REPO_ROOT
+
+
+def main():
+    """Run the benchmark from the command line."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--cameras", type=int, default=48)
+    parser.add_argument("--rounds", type=int, default=50)
+    args = parser.parse_args()
+
+    # Camera sources are looked up relative to the working directory
+    os.chdir(REPO_ROOT)
+    from backend.surveillance.motion import MOTION_SAMPLE_INTERVAL, MotionDetector
+    from device import device_camera
+
+    positions = itertools.cycle(
+        itertools.product(device_camera.PAN_POSITIONS, device_camera.ZOOM_LEVELS)
+    )
+    cameras = {}
+    for camera_id in range(1, args.cameras + 1):
+        camera = device_camera.DeviceCamera()
+        camera.set_id((camera_id - 1) % 3 + 1)
+        camera.set_position(*next(positions))
+        cameras[camera_id] = camera
+
+    detector = MotionDetector()
+    detector.process(cameras)  # Reference views
+
+    sampling, detection = [], []
+    for _ in range(args.rounds):
+        start = time.perf_counter()
+        samples = {
+            camera_id: detector.sample(camera) for camera_id, camera in cameras.items()
+        }
+        sampled = time.perf_counter()
+        detector.detect(samples)
+        sampling.append(sampled - start)
+        detection.append(time.perf_counter() - sampled)
+
+    sample_ms = statistics.median(sampling) * 1000
+    detect_ms = statistics.median(detection) * 1000
+    per_camera = (sample_ms + detect_ms) / args.cameras
+    rate = 1 / MOTION_SAMPLE_INTERVAL
+    print(
+        f"{args.cameras} cameras per round: sampling {sample_ms:.2f} ms, "
+        f"batched detection {detect_ms:.2f} ms "
+        f"({detect_ms * 1000 / args.cameras:.1f} us per camera)"
+    )
+    print(
+        f"{per_camera:.3f} ms per camera per round -> "
+        f"{1000 / (per_camera * rate):.0f} cameras per core at {rate:g} samples/s"
+    )
+
+
+if __name__ == "__main__":
+    main()
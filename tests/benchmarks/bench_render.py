@@ -0,0 +1,124 @@
+"""Per-frame camera render benchmark.
+
+Compares ``DeviceCamera.render_view`` when every frame has to crop and
+resize the source (the PTZ view cache is emptied before each frame) with
+frames served from the precomputed PTZ views, where only the caption is
+drawn. Also reports how long precomputing the views of one camera takes.
+
+With ``--tiers`` it instead reports, for each rendering quality tier, how
+many frames one core renders and JPEG-encodes per second at ``--size``.
+With ``--profile`` it also prints where the precomputed-view frames spend
+their time, e.g. to check that drawing the caption is not among it.
+
+Usage (from the repository root):
+
+    python -m tests.benchmarks.bench_render --frames 200
+    python -m tests.benchmarks.bench_render --tiers --size 640x480
+    python -m tests.benchmarks.bench_render --profile
+"""
+
+import argparse
+import cProfile
+import itertools
+import os
+import pstats
+import statistics
+import time
+
+from tests.benchmarks.common import REPO_ROOT, percentile
+
+
+def _time_frames(camera, frames: int, before_each=None, render=None) -> list[float]:
+    """Render frames while cycling through every PTZ position."""
+    from device import device_camera
+
+    if render is None:
+        render = camera.render_view
+
+    positions = itertools.cycle(
+        itertools.product(device_camera.PAN_POSITIONS, device_camera.ZOOM_LEVELS)
+    )
+    samples = []
+    for i in range(frames):
+        pan, zoom = next(positions)
+        if before_each is not None:
+            before_each()
+        start = time.perf_counter()
+        render(pan, zoom, i % camera.TIME_WRAP)
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def _report(label: str, samples: list[float]) -> None:
+    ms = sorted(s * 1000 for s in samples)
+    print(
+        f"{label}: mean {statistics.mean(ms):.2f} ms, "
+        f"p50 {percentile(ms, 50):.2f} ms, p99 {percentile(ms, 99):.2f} ms"
+    )
+
+
+def measure_tiers(camera, frames: int, size: tuple[int, int]) -> None:
+    """Print frames per second per core for each quality tier."""
+    from backend.surveillance.frames import encode_image
+    from device import device_camera
+
+    for tier in device_camera.QUALITY_TIERS:
+
+        def render(pan, zoom, current_time, tier=tier):
+            img = camera.render_view(pan, zoom, current_time, size, tier)
+            encode_image(img, "jpeg", 80)
+
+        # Single-threaded, so frames per second is per core
+        samples = _time_frames(camera, frames, render=render)
+        print(
+            f"{tier:>7} {size[0]}x{size[1]}: "
+            f"{len(samples) / sum(samples):.0f} frames/s per core "
+            f"(p99 {percentile(sorted(samples), 99) * 1000:.2f} ms)"
+        )
+
+
+def main():
+    """Run the benchmark from the command line."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--camera", type=int, default=1)
+    parser.add_argument("--frames", type=int, default=200)
+    parser.add_argument("--tiers", action="store_true")
+    parser.add_argument("--size", default="640x480", help="WIDTHxHEIGHT")
+    parser.add_argument("--profile", action="store_true")
+    args = parser.parse_args()
+
+    # Camera sources are looked up relative to the working directory
+    os.chdir(REPO_ROOT)
+    from device import device_camera
+
+    camera = device_camera.DeviceCamera()
+    camera.set_id(args.camera)
+
+    if args.tiers:
+        width, height = (int(n) for n in args.size.split("x"))
+        measure_tiers(camera, args.frames, (width, height))
+        return
+
+    cold = _time_frames(camera, args.frames, device_camera._base_views.clear)
+
+    device_camera._base_views.clear()
+    start = time.perf_counter()
+    device_camera.preload_views(args.camera)
+    build = time.perf_counter() - start
+    # The first pass renders the captions, the measured one reuses them
+    _time_frames(camera, args.frames)
+    warm = _time_frames(camera, args.frames)
+
+    _report("crop + resize per frame", cold)
+    _report("precomputed PTZ views", warm)
+    views = sum(len(views) for views in device_camera._base_views.values())
+    print(f"precomputing {views} views: {build * 1000:.0f} ms")
+
+    if args.profile:
+        profiler = cProfile.Profile()
+        profiler.runcall(_time_frames, camera, args.frames)
+        pstats.Stats(profiler).sort_stats("tottime").print_stats(10)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""Render farm scaling benchmark.
+
+Renders and encodes ``--frames`` distinct camera frames with
+``--concurrency`` callers, once on threads in the server process and once
+through ``RenderPool`` with 1, 2, 4, ... worker processes up to
+``--processes``, and reports frames per second for each. Frames cycle
+through every PTZ position and caption time, so none of them repeats.
+
+Usage (from the repository root):
+
+    python -m tests.benchmarks.bench_render_pool --frames 400 --processes 8
+"""
+
+import argparse
+import itertools
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from tests.benchmarks.common import REPO_ROOT
+
+
+def _jobs(frames: int, size: int, tier: str):
+    from backend.surveillance.render_pool import RenderJob
+    from device import device_camera
+
+    states = itertools.cycle(
+        itertools.product(
+            (1, 2, 3),
+            device_camera.PAN_POSITIONS,
+            device_camera.ZOOM_LEVELS,
+            range(device_camera.DeviceCamera.TIME_WRAP),
+        )
+    )
+    return [
+        RenderJob(camera_id, pan, zoom, t, size, size, tier, "jpeg", 80)
+        for camera_id, pan, zoom, t in itertools.islice(states, frames)
+    ]
+
+
+def _frames_per_second(render, jobs, concurrency: int) -> float:
+    with ThreadPoolExecutor(concurrency) as executor:
+        list(executor.map(render, jobs[:concurrency]))  # Warm up
+        start = time.perf_counter()
+        list(executor.map(render, jobs))
+        return len(jobs) / (time.perf_counter() - start)
+
+
+def main():
+    """Run the benchmark from the command line."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--frames", type=int, default=400)
+    parser.add_argument("--processes", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--size", type=int, default=640)
+    parser.add_argument("--tier", default="full")
+    args = parser.parse_args()
+
+    # Camera sources are looked up relative to the working directory
+    os.chdir(REPO_ROOT)
+    from backend.surveillance.frames import encode_image
+    from backend.surveillance.render_pool import RenderPool
+    from device.device_camera import DeviceCamera
+
+    jobs = _jobs(args.frames, args.size, args.tier)
+    cameras = {}
+    for camera_id in (1, 2, 3):
+        cameras[camera_id] = DeviceCamera()
+        cameras[camera_id].set_id(camera_id)
+
+    def render_on_thread(job):
+        img = cameras[job.camera_id].render_view(
+            job.pan, job.zoom, job.time, (job.width, job.height), job.tier
+        )
+        return encode_image(img, job.image_format, job.quality)
+
+    baseline = _frames_per_second(render_on_thread, jobs, args.concurrency)
+    print(f"threads:       {baseline:7.1f} frames/s")
+
+    processes = 1
+    while processes <= args.processes:
+        pool = RenderPool(processes)
+        try:
+            fps = _frames_per_second(pool.render, jobs, args.concurrency)
+        finally:
+            pool.close()
+        print(
+            f"{processes:2d} processes:  {fps:7.1f} frames/s "
+            f"({fps / baseline:.2f}x threads)"
+        )
+        processes *= 2
+
+
+if __name__ == "__main__":
+    main()
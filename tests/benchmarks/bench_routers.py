@@ -0,0 +1,144 @@
+"""Load test for the common and security routers.
+
+Starts the backend with uvicorn and drives it over many concurrent
+keep-alive connections, then reports requests per second and latency
+percentiles. The client speaks HTTP/1.1 over raw asyncio streams so that the
+load generator, not the server, is the cheap side of the measurement.
+
+Usage (from the repository root):
+
+    python -m tests.benchmarks.bench_routers --connections 1000
+
+To compare with another revision, check it out with ``git worktree add`` and
+pass its path with ``--app-dir``.
+"""
+
+import argparse
+import asyncio
+import json
+import time
+from urllib.parse import urlsplit
+
+from tests.benchmarks.common import REPO_ROOT, percentile, run_server
+
+USER_ID = "homeowner1"
+
+REQUESTS = [
+    (
+        "POST",
+        "/login/",
+        {"user_id": USER_ID, "password1": "12345678", "password2": "abcdefgh"},
+    ),
+    ("POST", "/control-panel-login/", {"user_id": USER_ID, "password": "1234"}),
+    ("GET", f"/get-safety-zones/?user_id={USER_ID}", None),
+    ("GET", f"/get-safehome-modes/?user_id={USER_ID}", None),
+    ("GET", f"/configure-safety-zone/?user_id={USER_ID}", None),
+    ("POST", "/view-intrusion-log/", {"user_id": USER_ID}),
+]
+
+
+def _encode(method: str, path: str, body: dict | None) -> bytes:
+    """Encode one HTTP/1.1 keep-alive request."""
+    payload = json.dumps(body).encode() if body is not None else b""
+    head = f"{method} {path} HTTP/1.1\r\nHost: bench\r\n"
+    if body is not None:
+        head += "Content-Type: application/json\r\n"
+    head += f"Content-Length: {len(payload)}\r\n\r\n"
+    return head.encode() + payload
+
+
+ENCODED = [_encode(*request) for request in REQUESTS]
+
+
+async def _read_response(reader: asyncio.StreamReader) -> int:
+    """Read one response and return its status code."""
+    head = await reader.readuntil(b"\r\n\r\n")
+    lines = head.decode("latin-1").split("\r\n")
+    status = int(lines[0].split(" ", 2)[1])
+    length = 0
+    for line in lines[1:]:
+        name, _, value = line.partition(":")
+        if name.lower() == "content-length":
+            length = int(value)
+    await reader.readexactly(length)
+    return status
+
+
+async def _connection(host, port, count, offset, latencies, errors, start_event):
+    """Send count requests sequentially over one keep-alive connection."""
+    reader, writer = await asyncio.open_connection(host, port)
+    await start_event.wait()
+    try:
+        for i in range(count):
+            start = time.perf_counter()
+            writer.write(ENCODED[(offset + i) % len(ENCODED)])
+            status = await _read_response(reader)
+            latencies.append(time.perf_counter() - start)
+            if status != 200:
+                errors.append(status)
+    except (OSError, asyncio.IncompleteReadError) as e:
+        errors.append(type(e).__name__)
+    finally:
+        writer.close()
+
+
+async def run_load(base_url: str, connections: int, total: int) -> dict:
+    """Drive the server with the given number of concurrent connections.
+
+    Returns:
+        Dictionary with throughput and latency statistics.
+    """
+    url = urlsplit(base_url)
+    latencies: list[float] = []
+    errors: list = []
+    per_connection = max(1, total // connections)
+    start_event = asyncio.Event()
+    tasks = [
+        asyncio.create_task(
+            _connection(
+                url.hostname,
+                url.port,
+                per_connection,
+                i,
+                latencies,
+                errors,
+                start_event,
+            )
+        )
+        for i in range(connections)
+    ]
+    # Let every connection finish its handshake before the clock starts.
+    await asyncio.sleep(1.0)
+    start = time.perf_counter()
+    start_event.set()
+    await asyncio.gather(*tasks)
+    elapsed = time.perf_counter() - start
+    return {
+        "requests": len(latencies),
+        "errors": len(errors),
+        "rps": len(latencies) / elapsed,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+    }
+
+
+def main():
+    """Run the benchmark from the command line."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--app-dir", default=REPO_ROOT)
+    parser.add_argument("--connections", type=int, default=1000)
+    parser.add_argument("--requests", type=int, default=20000)
+    args = parser.parse_args()
+
+    with run_server(args.app_dir) as base_url:
+        stats = asyncio.run(run_load(base_url, args.connections, args.requests))
+
+    print(
+        f"{stats['requests']} requests, {stats['errors']} errors, "
+        f"{stats['rps']:.0f} req/s, p50 {stats['p50_ms']:.1f} ms, "
+        f"p99 {stats['p99_ms']:.1f} ms"
+    )
+
+
+if __name__ == "__main__":
+    main()
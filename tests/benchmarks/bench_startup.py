@@ -0,0 +1,113 @@
+"""Startup benchmark for the backend entry point.
+
+Reports how long ``import backend.app`` takes in a fresh interpreter, how
+long a freshly started server takes to answer its first request, and how long
+the first camera view takes once the server is up.
+
+Usage (from the repository root):
+
+    python -m tests.benchmarks.bench_startup --runs 5
+
+Pass ``--app-dir`` to measure another checkout, e.g. one created with
+``git worktree add``.
+"""
+
+import argparse
+import statistics
+import subprocess
+import sys
+import time
+import urllib.request
+
+from tests.benchmarks.common import REPO_ROOT, free_port
+
+IMPORT_SNIPPET = (
+    "import sys, time\n"
+    "start = time.perf_counter()\n"
+    "import backend.app\n"
+    "print(time.perf_counter() - start, 'PIL' in sys.modules)\n"
+)
+
+
+def measure_import(app_dir: str) -> tuple[float, bool]:
+    """Import backend.app in a fresh interpreter.
+
+    Returns:
+        Seconds spent importing and whether PIL was imported.
+    """
+    out = subprocess.run(
+        [sys.executable, "-c", IMPORT_SNIPPET],
+        cwd=app_dir,
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout.split()
+    return float(out[0]), out[1] == "True"
+
+
+def _get(url: str) -> float:
+    """GET url and return the request latency in seconds."""
+    start = time.perf_counter()
+    with urllib.request.urlopen(url, timeout=30) as response:
+        response.read()
+    return time.perf_counter() - start
+
+
+def measure_first_request(app_dir: str) -> tuple[float, float]:
+    """Start the server and time its first responses.
+
+    Returns:
+        Seconds from process start until the first successful response, and
+        latency of the first camera view request.
+    """
+    port = free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    start = time.perf_counter()
+    proc = subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "uvicorn",
+            "backend.app:app",
+            "--port",
+            str(port),
+            "--log-level",
+            "warning",
+        ],
+        cwd=app_dir,
+    )
+    try:
+        while True:
+            try:
+                _get(f"{base_url}/surveillance/sensors")
+                break
+            except OSError:
+                time.sleep(0.005)
+        ready = time.perf_counter() - start
+        first_view = _get(f"{base_url}/surveillance/cameras/1/view")
+    finally:
+        proc.terminate()
+        proc.wait(timeout=10)
+    return ready, first_view
+
+
+def main():
+    """Run the benchmark from the command line."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--app-dir", default=REPO_ROOT)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    imports = [measure_import(args.app_dir) for _ in range(args.runs)]
+    firsts = [measure_first_request(args.app_dir) for _ in range(args.runs)]
+
+    import_ms = statistics.median(t for t, _ in imports) * 1000
+    ready_ms = statistics.median(r for r, _ in firsts) * 1000
+    view_ms = statistics.median(v for _, v in firsts) * 1000
+    print(f"import backend.app: {import_ms:.1f} ms (PIL imported: {imports[0][1]})")
+    print(f"time to first response: {ready_ms:.1f} ms")
+    print(f"first camera view: {view_ms:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""Shared helpers for the benchmark scripts."""
+
+import contextlib
+import os
+import socket
+import subprocess
+import sys
+import time
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "../.."))
+
+
+def free_port() -> int:
+    """Return a TCP port that is free on localhost."""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def wait_for_port(port: int, timeout: float = 30.0) -> float:
+    """Block until the port accepts connections.
+
+    Returns:
+        Seconds spent waiting.
+    """
+    start = time.perf_counter()
+    while time.perf_counter() - start < timeout:
+        with contextlib.suppress(OSError):
+            with socket.create_connection(("127.0.0.1", port), timeout=0.1):
+                return time.perf_counter() - start
+        time.sleep(0.01)
+    raise TimeoutError(f"Server did not start on port {port}")
+
+
+@contextlib.contextmanager
+def run_server(app_dir: str = REPO_ROOT, port: int | None = None, extra_args=()):
+    """Run the backend with uvicorn in a subprocess.
+
+    Args:
+        app_dir: Checkout to serve the backend from.
+        port: Port to listen on. A free port is picked when omitted.
+        extra_args: Additional uvicorn command line arguments.
+
+    Yields:
+        Base URL of the running server.
+    """
+    port = port or free_port()
+    cmd = [
+        sys.executable,
+        "-m",
+        "uvicorn",
+        "backend.app:app",
+        "--port",
+        str(port),
+        "--log-level",
+        "warning",
+        "--no-access-log",
+        "--backlog",
+        "4096",
+        *extra_args,
+    ]
+    proc = subprocess.Popen(cmd, cwd=app_dir)
+    try:
+        wait_for_port(port)
+        yield f"http://127.0.0.1:{port}"
+    finally:
+        proc.terminate()
+        proc.wait(timeout=10)
+
+
+def percentile(values: list[float], pct: float) -> float:
+    """Return the pct-th percentile of values (nearest rank)."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]